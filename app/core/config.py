@@ -32,6 +32,103 @@ class Settings(BaseSettings):
     SEC_USER_AGENT: str
     SEC_BASE_URL: str = "https://www.sec.gov"
     SEC_ARCHIVE_URL: str = "https://www.sec.gov/Archives/edgar/data"
+    SEC_DATA_URL: str = "https://data.sec.gov"  # Point all three at scripts/sec_replay_server.py to benchmark offline
+    
+    # SEC request budget (SEC enforced ceiling is 10 requests/second)
+    SEC_REQUESTS_PER_SECOND: float = 10.0
+    SEC_RATE_LIMIT_BURST: int = 1  # 1 = evenly spaced requests, no bursts
+    SEC_RATE_LIMIT_BACKEND: str = "redis"  # "redis" (shared by all workers) or "local"
+    SEC_RATE_LIMIT_KEY: str = "sec:ratelimit"
+    
+    # JSON submissions scan: max requests in flight (1 = serial scan)
+    SEC_SCAN_CONCURRENCY: int = 8
+    
+    # Pooled EDGAR HTTP client (shared by scanner, RSS and downloader)
+    SEC_HTTP2_ENABLED: bool = True  # Requires the 'h2' package, falls back to HTTP/1.1
+    SEC_HTTP_MAX_CONNECTIONS: int = 10
+    SEC_HTTP_MAX_KEEPALIVE: int = 10
+    SEC_HTTP_KEEPALIVE_EXPIRY: float = 60.0
+    SEC_HTTP_TIMEOUT: float = 30.0
+    
+    # Submissions ETag store (survives restarts, shared across replicas)
+    SEC_ETAG_STORE_BACKEND: str = "redis"  # "redis" (disk fallback) or "disk"
+    SEC_ETAG_TTL_SECONDS: int = 7 * 24 * 3600
+    SEC_ETAG_DISK_PATH: str = "data/cache/sec_etags.sqlite3"
+    
+    # 8-K exhibit downloads: fetched concurrently in priority order under the shared limiter
+    SEC_EXHIBIT_CONCURRENCY: int = 4
+    SEC_EXHIBIT_EARLY_START: bool = False  # Start extraction once main doc + top exhibit are on disk
+    
+    # Filing document storage: "blob" = content-addressed, compressed (blobs/), "raw" = plain files
+    FILING_STORE_MODE: str = "blob"
+    FILING_STORE_ZSTD_LEVEL: int = 6
+    FILING_STORE_ARCHIVE_ZSTD_LEVEL: int = 19  # Recompression level for filings past the archive age
+    FILING_STORE_ARCHIVE_AFTER_DAYS: int = 30
+    FILING_STORE_RETENTION_DAYS: int = 0  # 0 = keep forever
+    
+    # Object storage backend for filing documents: "local" (under STORAGE_LOCAL_ROOT)
+    # or "s3" (any S3-compatible service - AWS S3, MinIO, R2) so every worker sees every filing
+    STORAGE_BACKEND: str = "local"
+    STORAGE_LOCAL_ROOT: str = "data"
+    S3_BUCKET: str = ""
+    S3_PREFIX: str = ""
+    S3_ENDPOINT_URL: Optional[str] = None  # e.g. http://localhost:9000 for MinIO
+    S3_REGION: Optional[str] = None
+    S3_ACCESS_KEY_ID: Optional[str] = None
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    
+    # Scanner mode: "json" = per-CIK submissions sweep every interval
+    #               "firehose" = poll the all-forms current feed, JSON sweep only to reconcile
+    SCANNER_MODE: str = "json"
+    SCANNER_FEED_INTERVAL_SECONDS: int = 5
+    SCANNER_RECONCILE_INTERVAL_SECONDS: int = 900
+    
+    # Priority polling (json mode): per-tier poll intervals driven by the earnings calendar
+    SCANNER_PRIORITY_ENABLED: bool = True
+    SCANNER_TICK_SECONDS: int = 15
+    SCANNER_HOT_INTERVAL_SECONDS: int = 15  # Earnings today/tomorrow
+    SCANNER_WARM_INTERVAL_SECONDS: int = 60  # 8-K within SCANNER_WARM_LOOKBACK_DAYS
+    SCANNER_COLD_INTERVAL_SECONDS: int = 300  # Everyone else
+    SCANNER_WARM_LOOKBACK_DAYS: int = 7
+    SCANNER_TIER_REFRESH_SECONDS: int = 600
+    SCANNER_POLL_BUDGET_SHARE: float = 0.6  # Max share of the SEC budget one tick may use
+    SCANNER_COMPANY_DIRECTORY_RELOAD_SECONDS: int = 3600  # Backstop for writes that bypass the ORM
+    
+    # Scheduler leader election: only the Redis lease holder runs the scan loop
+    SCHEDULER_LEADER_ELECTION_ENABLED: bool = True
+    SCHEDULER_LEADER_LEASE_SECONDS: int = 15
+    SCHEDULER_LEADER_HEARTBEAT_SECONDS: int = 5
+    
+    # Sharded scanning: >1 splits monitored CIKs into shards claimed via Redis leases
+    # (replaces single-leader election; every scanner polls the shards it holds)
+    SCANNER_SHARD_COUNT: int = 1
+    SCANNER_SHARD_LEASE_SECONDS: int = 15
+    
+    # Ingestion backpressure: new filings stay PENDING in the database while the Celery
+    # queue is at the high watermark; admissions resume (newest first) at the low watermark
+    INGESTION_BACKPRESSURE_ENABLED: bool = True
+    INGESTION_QUEUE_HIGH_WATERMARK: int = 50
+    INGESTION_QUEUE_LOW_WATERMARK: int = 10
+    INGESTION_QUEUE_DEPTH_CACHE_SECONDS: float = 2.0
+    INGESTION_DRAIN_INTERVAL_SECONDS: int = 60  # Scheduler re-admits held PENDING filings
+    INGESTION_REQUEUE_AFTER_SECONDS: int = 3600  # Admitted but unprocessed -> eligible again
+    
+    # Text extraction HTML parser: "auto" (lxml for XHTML/iXBRL, html.parser for legacy HTML),
+    # "lxml" (everything) or "html.parser" (pure Python)
+    TEXT_EXTRACTOR_PARSER: str = "auto"
+    
+    # Extraction cache: TextExtractor results stored compressed, keyed by the input
+    # documents' checksums + extractor version (re-runs skip parsing)
+    EXTRACTION_CACHE_ENABLED: bool = True
+    EXTRACTION_CACHE_RETENTION_DAYS: int = 180  # Entries older than this are purged (0 = keep)
+    
+    # Extraction process pool: text extraction runs in child processes (per worker
+    # process) so CPU-heavy documents never block the task threads' event loops
+    EXTRACTION_POOL_ENABLED: bool = True
+    EXTRACTION_POOL_WORKERS: int = 2  # Concurrent extraction processes per Celery worker
+    EXTRACTION_JOB_TIMEOUT_SECONDS: int = 120  # Killed after this (all attempts stay under task_soft_time_limit)
+    EXTRACTION_JOB_MEMORY_MB: int = 2048  # Address-space cap per job (0 = no cap)
+    EXTRACTION_JOB_MAX_ATTEMPTS: int = 2  # Crashed/timed-out jobs retried in a fresh process
     
     # Limits
     FREE_USER_DAILY_LIMIT: int = 3
@@ -0,0 +1,177 @@
+# app/core/leader_election.py
+"""
+Redis lease based leader election for singleton background loops
+
+Every uvicorn worker and API replica starts the filing scheduler, but only
+the holder of the lease may scan. The lease is a Redis key with a TTL that
+the leader renews on a heartbeat; if the leader dies the key expires and a
+standby takes over within one lease period.
+
+Each acquisition gets a fencing token from a monotonically increasing
+counter. The token is part of the lease value, so a paused ex-leader whose
+lease was taken over can no longer renew it and sees that it was fenced off.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Dict, Optional
+
+from app.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+# Take the lease if free and stamp it with a fresh fencing token
+ACQUIRE_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+local token = redis.call('INCR', KEYS[2])
+redis.call('SET', KEYS[1], ARGV[1] .. '|' .. token, 'PX', ARGV[2])
+return token
+"""
+
+# Extend the lease only if we still hold it with the same token
+RENEW_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderElection:
+    """Lease-based leadership for one named role (e.g. "scheduler")"""
+
+    def __init__(self, name: str, lease_seconds: int = 15):
+        self.name = name
+        self.lease_seconds = lease_seconds
+        self.lease_key = f"leader:{name}"
+        self.fence_key = f"leader:{name}:fence"
+        self.node_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self.token: Optional[int] = None
+        self._renewed_at = 0.0
+        self._lock = threading.Lock()
+        self._scripts = None
+
+    @property
+    def redis(self):
+        return cache.redis_client
+
+    def _get_scripts(self):
+        if self._scripts is None:
+            self._scripts = {
+                "acquire": self.redis.register_script(ACQUIRE_LUA),
+                "renew": self.redis.register_script(RENEW_LUA),
+                "release": self.redis.register_script(RELEASE_LUA),
+            }
+        return self._scripts
+
+    @property
+    def lease_value(self) -> Optional[str]:
+        if self.token is None:
+            return None
+        return f"{self.node_id}|{self.token}"
+
+    @property
+    def is_leader(self) -> bool:
+        """Leader only while the last successful renewal is inside the lease period"""
+        with self._lock:
+            return (
+                self.token is not None
+                and time.monotonic() - self._renewed_at < self.lease_seconds
+            )
+
+    def heartbeat(self) -> bool:
+        """
+        Renew our lease, or try to acquire it if we are a standby
+
+        Returns:
+            True if this node holds the lease after the call
+        """
+        lease_ms = int(self.lease_seconds * 1000)
+        try:
+            scripts = self._get_scripts()
+            with self._lock:
+                if self.token is not None:
+                    if scripts["renew"](keys=[self.lease_key], args=[self.lease_value, lease_ms]):
+                        self._renewed_at = time.monotonic()
+                        return True
+                    logger.warning(f"Lost {self.name} leadership (fencing token {self.token} superseded)")
+                    self.token = None
+
+                token = int(scripts["acquire"](
+                    keys=[self.lease_key, self.fence_key],
+                    args=[self.node_id, lease_ms]
+                ))
+                if token:
+                    self.token = token
+                    self._renewed_at = time.monotonic()
+                    logger.info(f"Acquired {self.name} leadership: {self.node_id} (fencing token {token})")
+                    return True
+                return False
+
+        except Exception as e:
+            # Can't reach Redis: keep leadership only until our lease would expire
+            logger.warning(f"{self.name} leader heartbeat failed: {e}")
+            return self.is_leader
+
+    def check_fence(self) -> bool:
+        """Confirm in Redis that our token is still the current lease holder"""
+        value = self.lease_value
+        if value is None:
+            return False
+        try:
+            return self.redis.get(self.lease_key) == value
+        except Exception as e:
+            logger.warning(f"{self.name} fence check failed: {e}")
+            return self.is_leader
+
+    def release(self):
+        """Give up the lease (graceful shutdown) so a standby takes over at once"""
+        with self._lock:
+            value = self.lease_value
+            self.token = None
+        if value is None:
+            return
+        try:
+            self._get_scripts()["release"](keys=[self.lease_key], args=[value])
+            logger.info(f"Released {self.name} leadership: {self.node_id}")
+        except Exception as e:
+            logger.warning(f"Error releasing {self.name} leadership: {e}")
+
+    def current_leader(self) -> Optional[Dict]:
+        """Lease holder as seen in Redis"""
+        try:
+            value = self.redis.get(self.lease_key)
+            if not value:
+                return None
+            node_id, _, token = value.rpartition("|")
+            ttl_ms = self.redis.pttl(self.lease_key)
+            return {
+                "node_id": node_id,
+                "fencing_token": int(token),
+                "lease_expires_in": round(ttl_ms / 1000, 1) if ttl_ms and ttl_ms > 0 else None,
+            }
+        except Exception as e:
+            return {"error": str(e)}
+
+    def get_status(self) -> Dict:
+        return {
+            "node_id": self.node_id,
+            "is_leader": self.is_leader,
+            "fencing_token": self.token,
+            "lease_seconds": self.lease_seconds,
+            "leader": self.current_leader(),
+        }
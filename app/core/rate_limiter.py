@@ -0,0 +1,240 @@
+# app/core/rate_limiter.py
+"""
+Async rate limiting primitives for SEC EDGAR traffic
+SEC enforces a hard ceiling of 10 requests/second per client
+"""
+
+import asyncio
+import threading
+import time
+import logging
+from typing import Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTokenBucket:
+    """
+    Token bucket shared by concurrent coroutines
+
+    Each acquire() reserves the next free slot under a thread lock and then
+    sleeps until that slot, so N coroutines in flight are spaced exactly at
+    `rate` requests/second instead of racing on a last_request_time field.
+    The lock is never held across an await, which keeps the bucket usable
+    from any event loop (Celery tasks create their own loops).
+    """
+
+    def __init__(self, rate: float, capacity: int = 1):
+        """
+        Args:
+            rate: Tokens added per second (requests/second ceiling)
+            capacity: Maximum burst size (1 = evenly spaced requests)
+        """
+        self.rate = float(rate)
+        self.capacity = max(1, int(capacity))
+        self._tokens = float(self.capacity)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take one token (possibly going into debt) and return seconds to wait"""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._last_refill
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._last_refill = now
+
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            # Negative balance = queued reservations ahead of us
+            return -self._tokens / self.rate
+
+    async def acquire(self) -> float:
+        """
+        Wait until a request may be sent
+
+        Returns:
+            Seconds spent waiting
+        """
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+# Atomic token bucket shared by every process talking to SEC.
+# Callers may go into debt: the returned wait (ms) is the reserved slot,
+# so concurrent callers across workers are queued rather than retried.
+TOKEN_BUCKET_LUA = """
+if redis.replicate_commands then pcall(redis.replicate_commands) end
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local ttl = tonumber(ARGV[3])
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+if now > ts then
+    tokens = math.min(capacity, tokens + (now - ts) * rate)
+else
+    now = ts
+end
+
+tokens = tokens - 1
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], ttl)
+
+local wait_ms = 0
+if tokens < 0 then
+    wait_ms = math.ceil(-tokens / rate * 1000)
+end
+
+redis.call('HINCRBY', KEYS[2], 'acquired', 1)
+if wait_ms > 0 then
+    redis.call('HINCRBY', KEYS[2], 'waited', 1)
+    redis.call('HINCRBY', KEYS[2], 'wait_ms_total', wait_ms)
+end
+return wait_ms
+"""
+
+
+class SECRateLimiter:
+    """
+    Process-wide (and, with Redis, cluster-wide) SEC request budget
+    
+    Every SEC-bound request - submissions JSON, browse-edgar atom feed and
+    Archives downloads - acquires a slot here before being sent. With the
+    redis backend all Celery workers and the API scheduler draw from one
+    atomic Lua token bucket; if Redis is unreachable we fall back to an
+    in-process AsyncTokenBucket and retry Redis after a cooldown.
+    """
+    
+    def __init__(self):
+        self.rate = settings.SEC_REQUESTS_PER_SECOND
+        self.capacity = settings.SEC_RATE_LIMIT_BURST
+        self.backend = settings.SEC_RATE_LIMIT_BACKEND
+        self.redis_url = settings.REDIS_URL
+        self.bucket_key = f"{settings.SEC_RATE_LIMIT_KEY}:bucket"
+        self.stats_key = f"{settings.SEC_RATE_LIMIT_KEY}:stats"
+        self.key_ttl = 60  # bucket state is only meaningful for a few seconds
+        self.redis_retry_seconds = 30
+        
+        self.local_bucket = AsyncTokenBucket(rate=self.rate, capacity=self.capacity)
+        self._redis_client = None
+        self._script = None
+        self._redis_down_until = 0.0
+        
+        # Local wait-time metrics (this process only)
+        self._stats_lock = threading.Lock()
+        self.acquired = 0
+        self.waited = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.fallback_count = 0
+    
+    def _get_script(self):
+        """Lazily connect to Redis and register the Lua script"""
+        if self._script is None:
+            import redis
+            self._redis_client = redis.from_url(
+                self.redis_url,
+                socket_timeout=0.5,
+                socket_connect_timeout=0.5
+            )
+            self._script = self._redis_client.register_script(TOKEN_BUCKET_LUA)
+        return self._script
+    
+    def _redis_usable(self) -> bool:
+        return self.backend == "redis" and time.monotonic() >= self._redis_down_until
+    
+    def _reserve_redis(self) -> Optional[float]:
+        """Reserve a slot in the shared bucket; None if Redis is unavailable (blocking)"""
+        if not self._redis_usable():
+            return None
+        
+        try:
+            script = self._get_script()
+            wait_ms = script(
+                keys=[self.bucket_key, self.stats_key],
+                args=[self.rate, self.capacity, self.key_ttl]
+            )
+            return int(wait_ms) / 1000.0
+        except Exception as e:
+            logger.warning(
+                f"SEC rate limiter: Redis unavailable ({e}), "
+                f"using local bucket for {self.redis_retry_seconds}s"
+            )
+            self._redis_down_until = time.monotonic() + self.redis_retry_seconds
+            return None
+    
+    def _record(self, wait: float, fallback: bool):
+        with self._stats_lock:
+            self.acquired += 1
+            if fallback:
+                self.fallback_count += 1
+            if wait > 0:
+                self.waited += 1
+                self.wait_total += wait
+                self.wait_max = max(self.wait_max, wait)
+    
+    async def acquire(self) -> float:
+        """
+        Wait for a slot in the SEC request budget
+        
+        Returns:
+            Seconds spent waiting
+        """
+        wait = None
+        if self._redis_usable():
+            # Sync redis-py call (up to the 0.5s socket timeout) - keep it off the
+            # event loop. redis.asyncio clients are tied to one loop, and this
+            # limiter is shared by every Celery task's loop.
+            wait = await asyncio.to_thread(self._reserve_redis)
+        fallback = wait is None
+        
+        if fallback:
+            wait = await self.local_bucket.acquire()
+        elif wait > 0:
+            await asyncio.sleep(wait)
+        
+        self._record(wait, fallback)
+        return wait
+    
+    def get_stats(self) -> Dict:
+        """Wait-time metrics: how saturated the SEC budget is"""
+        with self._stats_lock:
+            stats = {
+                "backend": self.backend,
+                "rate_per_second": self.rate,
+                "acquired": self.acquired,
+                "waited": self.waited,
+                "wait_ratio": round(self.waited / self.acquired, 3) if self.acquired else 0.0,
+                "avg_wait_ms": round(self.wait_total / self.acquired * 1000, 1) if self.acquired else 0.0,
+                "max_wait_ms": round(self.wait_max * 1000, 1),
+                "local_fallbacks": self.fallback_count,
+            }
+        
+        if self.backend == "redis":
+            try:
+                self._get_script()
+                raw = self._redis_client.hgetall(self.stats_key)
+                cluster = {k.decode(): int(v) for k, v in raw.items()}
+                acquired = cluster.get("acquired", 0)
+                stats["cluster"] = {
+                    "acquired": acquired,
+                    "waited": cluster.get("waited", 0),
+                    "avg_wait_ms": round(cluster.get("wait_ms_total", 0) / acquired, 1) if acquired else 0.0,
+                }
+            except Exception as e:
+                stats["cluster"] = {"error": str(e)}
+        
+        return stats
+
+
+# Shared limiter for all SEC-bound traffic in this process
+sec_rate_limiter = SECRateLimiter()
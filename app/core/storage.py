@@ -0,0 +1,266 @@
+# app/core/storage.py
+"""
+Object storage backends for filing documents
+
+Keys are POSIX-style paths ("filings/{cik}/{acc}/manifest.json",
+"blobs/ab/abcd....zst"). The local backend maps a key onto a file under
+STORAGE_LOCAL_ROOT, so with the default root ("data") keys land exactly
+where the downloader has always written them. The S3 backend talks to any
+S3-compatible service (AWS S3, MinIO, R2) so every Celery worker sees the
+same documents and any worker can pick up any stage of a filing.
+
+Reads and writes stream: put_file() uploads from a file on disk (multipart
+for large objects) and open_read() returns a file-like body, so a 150MB
+S-1 never has to be held in memory by the storage layer.
+
+Local stand-in for S3: run MinIO and point the S3 backend at it, e.g.
+    docker run -p 9000:9000 minio/minio server /data
+    STORAGE_BACKEND=s3 S3_ENDPOINT_URL=http://localhost:9000 S3_BUCKET=filings
+    S3_ACCESS_KEY_ID=minioadmin S3_SECRET_ACCESS_KEY=minioadmin
+(scripts/check_storage_backend.py round-trips the configured backend).
+"""
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import BinaryIO, Iterator, NamedTuple, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ObjectInfo(NamedTuple):
+    key: str
+    size: int
+    mtime: float
+
+
+class StorageBackend:
+    """Interface shared by the local and S3 backends"""
+
+    name = "base"
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Where the object lives on this machine (None if remote)"""
+        return None
+
+    def is_same_file(self, key: str, path: Path) -> bool:
+        """True when `path` already is the stored object (nothing to upload)"""
+        local = self.local_path(key)
+        return local is not None and os.path.abspath(local) == os.path.abspath(path)
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def size(self, key: str) -> int:
+        raise NotImplementedError
+
+    def put_file(self, key: str, path: Path, move: bool = False):
+        """Store the contents of a local file; `move` removes the source afterwards"""
+        raise NotImplementedError
+
+    def put_bytes(self, key: str, data: bytes):
+        raise NotImplementedError
+
+    def touch(self, key: str):
+        """Set the object's modification time to now (keeps it out of gc grace-period races)"""
+        raise NotImplementedError
+
+    def open_read(self, key: str) -> BinaryIO:
+        """Streaming binary reader; raises FileNotFoundError if the key is absent"""
+        raise NotImplementedError
+
+    def get_bytes(self, key: str) -> bytes:
+        with self.open_read(key) as f:
+            return f.read()
+
+    def download_file(self, key: str, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with self.open_read(key) as src, open(tmp_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.replace(tmp_path, path)
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def list(self, prefix: str) -> Iterator[ObjectInfo]:
+        raise NotImplementedError
+
+
+class LocalStorageBackend(StorageBackend):
+    """Objects are files under a root directory"""
+
+    name = "local"
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def local_path(self, key: str) -> Path:
+        return self.root / key
+
+    def exists(self, key: str) -> bool:
+        return self.local_path(key).is_file()
+
+    def size(self, key: str) -> int:
+        return self.local_path(key).stat().st_size
+
+    def put_file(self, key: str, path: Path, move: bool = False):
+        dest = self.local_path(key)
+        if self.is_same_file(key, path):
+            return
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if move:
+            try:
+                os.replace(path, dest)
+                return
+            except OSError:
+                pass  # Different filesystem - copy below
+        tmp_path = dest.with_name(f"{dest.name}.{os.getpid()}.tmp")
+        shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, dest)
+        if move:
+            Path(path).unlink(missing_ok=True)
+
+    def put_bytes(self, key: str, data: bytes):
+        dest = self.local_path(key)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = dest.with_name(f"{dest.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, dest)
+
+    def touch(self, key: str):
+        os.utime(self.local_path(key))
+
+    def open_read(self, key: str) -> BinaryIO:
+        return open(self.local_path(key), 'rb')
+
+    def delete(self, key: str):
+        self.local_path(key).unlink(missing_ok=True)
+
+    def list(self, prefix: str) -> Iterator[ObjectInfo]:
+        base = self.local_path(prefix)
+        if not base.exists():
+            return
+        for path in base.rglob("*"):
+            if path.is_file() and not path.name.endswith(".tmp"):
+                stat = path.stat()
+                yield ObjectInfo(path.relative_to(self.root).as_posix(), stat.st_size, stat.st_mtime)
+
+
+class S3StorageBackend(StorageBackend):
+    """S3-compatible object storage (AWS S3, MinIO, R2) via boto3"""
+
+    name = "s3"
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None,
+                 region: Optional[str] = None, access_key_id: Optional[str] = None,
+                 secret_access_key: Optional[str] = None):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+        except ImportError:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires the 'boto3' package")
+        if not bucket:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires S3_BUCKET")
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+        )
+        # Multipart above 16MB, so large S-1s upload in parts instead of one PUT
+        self.transfer_config = TransferConfig(multipart_threshold=16 * 1024 * 1024,
+                                              multipart_chunksize=16 * 1024 * 1024)
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def _strip(self, full_key: str) -> str:
+        return full_key[len(self.prefix) + 1:] if self.prefix else full_key
+
+    @staticmethod
+    def _is_not_found(error) -> bool:
+        code = str(getattr(error, "response", {}).get("Error", {}).get("Code", ""))
+        return code in ("404", "NoSuchKey", "NotFound")
+
+    def _head(self, key: str) -> Optional[dict]:
+        from botocore.exceptions import ClientError
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if self._is_not_found(e):
+                return None
+            raise
+
+    def exists(self, key: str) -> bool:
+        return self._head(key) is not None
+
+    def size(self, key: str) -> int:
+        head = self._head(key)
+        if head is None:
+            raise FileNotFoundError(key)
+        return head["ContentLength"]
+
+    def put_file(self, key: str, path: Path, move: bool = False):
+        self.client.upload_file(str(path), self.bucket, self._key(key), Config=self.transfer_config)
+        if move:
+            Path(path).unlink(missing_ok=True)
+
+    def put_bytes(self, key: str, data: bytes):
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data)
+
+    def touch(self, key: str):
+        # S3 has no utime: an in-place copy (metadata replaced) sets LastModified
+        full_key = self._key(key)
+        self.client.copy_object(Bucket=self.bucket, Key=full_key,
+                                CopySource={"Bucket": self.bucket, "Key": full_key},
+                                MetadataDirective="REPLACE")
+
+    def open_read(self, key: str) -> BinaryIO:
+        from botocore.exceptions import ClientError
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"]
+        except ClientError as e:
+            if self._is_not_found(e):
+                raise FileNotFoundError(key)
+            raise
+
+    def download_file(self, key: str, path: Path):
+        if not self.exists(key):
+            raise FileNotFoundError(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        self.client.download_file(self.bucket, self._key(key), str(tmp_path), Config=self.transfer_config)
+        os.replace(tmp_path, path)
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def list(self, prefix: str) -> Iterator[ObjectInfo]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+            for obj in page.get("Contents", []):
+                yield ObjectInfo(self._strip(obj["Key"]), obj["Size"], obj["LastModified"].timestamp())
+
+
+def create_storage_backend() -> StorageBackend:
+    if settings.STORAGE_BACKEND == "s3":
+        return S3StorageBackend(
+            bucket=settings.S3_BUCKET,
+            prefix=settings.S3_PREFIX,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region=settings.S3_REGION,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+        )
+    return LocalStorageBackend(settings.STORAGE_LOCAL_ROOT)
+
+
+# Create singleton instance
+storage = create_storage_backend()
@@ -8,6 +8,8 @@ import logging
 from app.api.api import api_router
 # Import scheduler
 from app.services.scheduler import filing_scheduler
+# Import pooled SEC HTTP client (closed on shutdown)
+from app.services.sec_http import sec_http_client
 # Import settings for secure CORS
 from app.core.config import settings
 
@@ -25,7 +27,7 @@ async def lifespan(app: FastAPI):
     
     # Start the filing scheduler
     await filing_scheduler.start()
-    logger.info("Filing scheduler started - scanning every 5 minutes")
+    logger.info("Filing scheduler started")
     
     yield
     
@@ -35,6 +37,9 @@ async def lifespan(app: FastAPI):
     # Stop the filing scheduler
     await filing_scheduler.stop()
     logger.info("Filing scheduler stopped")
+    
+    # Close pooled SEC connections
+    await sec_http_client.aclose()
 
 # Create FastAPI app
 app = FastAPI(
@@ -108,7 +113,7 @@ async def root():
         "message": "Welcome to Fintellic API",
         "version": "1.0.0",
         "status": "operational",
-        "scanner": "active" if filing_scheduler.is_running else "inactive",
+        "scanner": "active" if filing_scheduler.is_active else ("standby" if filing_scheduler.is_running else "inactive"),
         "environment": settings.ENVIRONMENT
     }
 
@@ -119,6 +124,7 @@ async def health_check():
         "status": "healthy",
         "service": "fintellic-api",
         "scanner_running": filing_scheduler.is_running,
+        "scanner_leader": filing_scheduler.is_active,
         "email_verification_enabled": settings.ENABLE_EMAIL_VERIFICATION,
         "password_reset_enabled": settings.ENABLE_PASSWORD_RESET
     }
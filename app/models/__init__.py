@@ -30,6 +30,7 @@ from app.models.earnings_calendar import EarningsCalendar
 from app.models.comment import Comment
 from app.models.comment_vote import CommentVote  # Only CommentVote, no VoteType here
 from app.models.user_vote import UserVote, VoteType  # VoteType is here!
+from app.models.financial_fact import FinancialFact
 
 # Try to import optional enums that might exist
 try:
@@ -66,6 +67,7 @@ __all__ = [
     "ProcessingStatus",
     "ManagementTone",
     "UserFilingView",
+    "FinancialFact",
     
     # Subscription and payment
     "Subscription",
@@ -257,6 +257,7 @@ class Filing(Base):
     comments = relationship("Comment", back_populates="filing", cascade="all, delete-orphan")
     user_votes = relationship("UserVote", back_populates="filing", cascade="all, delete-orphan")
     user_views = relationship("UserFilingView", back_populates="filing", cascade="all, delete-orphan")
+    financial_facts = relationship("FinancialFact", back_populates="filing", cascade="all, delete-orphan", passive_deletes=True)
     
     def __repr__(self):
         return f"<Filing(id={self.id}, ticker='{self.ticker}', type='{self.filing_type.value}', date={self.filing_date})>"
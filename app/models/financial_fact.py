@@ -0,0 +1,45 @@
+# app/models/financial_fact.py
+"""
+Financial fact model - Inline XBRL facts tagged in a filing's main document
+One row per (concept, context, unit); written by app/services/ixbrl_facts.py
+"""
+from sqlalchemy import Column, Integer, String, Text, Date, Boolean, Float, ForeignKey, Index
+from sqlalchemy.orm import relationship
+
+from app.models.base import Base
+
+
+class FinancialFact(Base):
+    """A tagged XBRL fact (ix:nonFraction / short ix:nonNumeric)"""
+    __tablename__ = "financial_facts"
+
+    # Primary key
+    id = Column(Integer, primary_key=True)
+
+    # Foreign key
+    filing_id = Column(Integer, ForeignKey("filings.id", ondelete="CASCADE"), nullable=False)
+
+    # Concept and context
+    concept = Column(String(255), nullable=False)  # e.g. "us-gaap:Revenues"
+    context_ref = Column(String(255), nullable=False)
+    period_start = Column(Date)  # NULL for instant facts
+    period_end = Column(Date)  # Instant date or end of the duration
+    dimensional = Column(Boolean, default=False)  # Segment/axis member breakdown
+
+    # Value
+    unit = Column(String(50))  # "USD", "USD/shares", "shares"
+    value = Column(Float)  # Numeric facts, scale and sign applied (full units, not millions)
+    value_text = Column(Text)  # Non-numeric facts (dei cover page data, short text)
+    decimals = Column(String(10))  # Reported precision: "-6", "2", "INF"
+    scale = Column(Integer, default=0)  # Display scale: 6 = shown in millions
+
+    # Relationships
+    filing = relationship("Filing", back_populates="financial_facts")
+
+    __table_args__ = (
+        Index('idx_financial_facts_filing_concept', 'filing_id', 'concept'),
+        Index('idx_financial_facts_concept_period', 'concept', 'period_end'),
+    )
+
+    def __repr__(self):
+        return f"<FinancialFact {self.concept}={self.value if self.value is not None else self.value_text}>"
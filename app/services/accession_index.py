@@ -0,0 +1,155 @@
+# app/services/accession_index.py
+"""
+Incrementally maintained index of accession numbers already in the database
+
+Replaces the per-scan `SELECT accession_number FROM filings` full-table load.
+The index is a Redis set seeded once from the filings table and updated on
+every insert, so scan-time dedup costs one SMISMEMBER for the candidates of
+that scan instead of growing with the table forever.
+
+A Redis set is exact, so positive hits are trusted as-is. Candidates the set
+does not know are confirmed with a single `WHERE accession_number IN (...)`
+query, which also catches rows written by scripts that bypass the scanner
+(those are added back into the set). If Redis is unavailable the same
+targeted query is used on its own.
+"""
+import logging
+from typing import Iterable, List, Set
+
+from app.core.cache import cache
+from app.core.database import SessionLocal
+from app.models.filing import Filing
+
+logger = logging.getLogger(__name__)
+
+
+class AccessionIndex:
+    """Membership index for known accession numbers"""
+
+    def __init__(self):
+        self.key = "sec:known_accessions"
+        self.seeded_key = "sec:known_accessions:seeded"
+        self.seed_lock_key = "sec:known_accessions:seed_lock"
+        self.seed_batch_size = 5000
+
+    @property
+    def redis(self):
+        return cache.redis_client
+
+    def ensure_seeded(self) -> bool:
+        """
+        Seed the set from the filings table once (re-seeds if Redis was flushed)
+
+        Returns:
+            True if the Redis index is usable
+        """
+        try:
+            if self.redis.exists(self.seeded_key):
+                return True
+
+            # Only one scanner seeds; others use the DB fallback meanwhile
+            if not self.redis.set(self.seed_lock_key, "1", nx=True, ex=300):
+                return False
+
+            try:
+                db = SessionLocal()
+                try:
+                    total = 0
+                    batch = []
+                    for (accession,) in db.query(Filing.accession_number).yield_per(self.seed_batch_size):
+                        if not accession:
+                            continue
+                        batch.append(accession)
+                        if len(batch) >= self.seed_batch_size:
+                            self.redis.sadd(self.key, *batch)
+                            total += len(batch)
+                            batch = []
+                    if batch:
+                        self.redis.sadd(self.key, *batch)
+                        total += len(batch)
+                finally:
+                    db.close()
+
+                self.redis.set(self.seeded_key, "1")
+                logger.info(f"Seeded known-accession index with {total} accessions")
+                return True
+            finally:
+                self.redis.delete(self.seed_lock_key)
+
+        except Exception as e:
+            logger.warning(f"Known-accession index unavailable, using DB lookups: {e}")
+            return False
+
+    def add(self, accession_number: str):
+        """Record a newly inserted filing"""
+        self.add_many([accession_number])
+
+    def add_many(self, accession_numbers: Iterable[str]):
+        accessions = [a for a in accession_numbers if a]
+        if not accessions:
+            return
+        try:
+            self.redis.sadd(self.key, *accessions)
+        except Exception as e:
+            # Not fatal: the DB confirmation step will catch these later
+            logger.debug(f"Could not add accessions to index: {e}")
+
+    def _lookup_db(self, accessions: List[str]) -> Set[str]:
+        """Exact check of a small candidate list against the filings table"""
+        if not accessions:
+            return set()
+        db = SessionLocal()
+        try:
+            rows = db.query(Filing.accession_number).filter(
+                Filing.accession_number.in_(accessions)
+            ).all()
+            return {r[0] for r in rows}
+        finally:
+            db.close()
+
+    def filter_unknown(self, accession_numbers: Iterable[str]) -> Set[str]:
+        """
+        Return the subset of accession numbers not yet in the database
+
+        Cost is O(candidates): one SMISMEMBER plus one IN query for the misses.
+        """
+        candidates = list(dict.fromkeys(a for a in accession_numbers if a))
+        if not candidates:
+            return set()
+
+        unknown = candidates
+        if self.ensure_seeded():
+            try:
+                flags = self.redis.smismember(self.key, candidates)
+                unknown = [a for a, known in zip(candidates, flags) if not known]
+            except Exception as e:
+                logger.warning(f"Known-accession index lookup failed, using DB: {e}")
+
+        if not unknown:
+            return set()
+
+        try:
+            in_db = self._lookup_db(unknown)
+        except Exception as e:
+            logger.error(f"Error checking accessions against database: {e}")
+            # The batch insert is ON CONFLICT DO NOTHING, so false positives are harmless
+            return set(unknown)
+
+        if in_db:
+            # Rows inserted outside the scanner - heal the index
+            self.add_many(in_db)
+
+        return set(unknown) - in_db
+
+    def get_stats(self) -> dict:
+        try:
+            return {
+                "seeded": bool(self.redis.exists(self.seeded_key)),
+                "size": self.redis.scard(self.key),
+            }
+        except Exception as e:
+            return {"seeded": False, "error": str(e)}
+
+
+# Create singleton instance
+accession_index = AccessionIndex()
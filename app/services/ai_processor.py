@@ -29,7 +29,8 @@ from sqlalchemy.orm import Session
 
 from app.models.filing import Filing, ProcessingStatus, FilingType
 from app.core.config import settings
-from app.services.text_extractor import text_extractor
+from app.services.extraction_pool import extraction_pool
+from app.services.ixbrl_facts import EPS_LABELS, METRIC_UNITS, ixbrl_fact_extractor
 from app.services.fmp_service import fmp_service
 from app.core.cache import cache
 
@@ -426,8 +427,11 @@ class AIProcessor:
             # Get filing directory
             filing_dir = Path(f"data/filings/{filing.company.cik}/{filing.accession_number.replace('-', '')}")
             
-            # Extract text
-            sections = text_extractor.extract_from_filing(filing_dir)
+            # Exact revenue / net income / EPS from the inline XBRL tags
+            self._extract_and_store_xbrl_facts(db, filing, filing_dir)
+            
+            # Extract text in a capped child process (cached per document checksum + extractor version)
+            sections = await extraction_pool.extract_from_filing(filing_dir)
             
             if 'error' in sections:
                 raise Exception(f"Text extraction failed: {sections['error']}")
@@ -481,6 +485,16 @@ class AIProcessor:
             db.commit()
             return False
     
+    def _extract_and_store_xbrl_facts(self, db: Session, filing: Filing, filing_dir: Path):
+        """Store tagged XBRL facts and set revenue/net_income/eps (never fails the filing)"""
+        try:
+            summary = ixbrl_fact_extractor.apply_to_filing(db, filing, filing_dir)
+            if summary is None:
+                logger.info(f"[XBRL] No inline XBRL facts in {filing.accession_number}")
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"[XBRL] Fact extraction failed for {filing.accession_number}: {e}")
+    
     async def _fetch_and_store_fmp_data(self, db: Session, filing: Filing, ticker: str):
         """Fetch FMP company profile for enrichment"""
         if not ticker or ticker in ["UNKNOWN", "PRE-IPO"] or ticker.startswith("CIK"):
@@ -775,6 +789,16 @@ class AIProcessor:
         if hasattr(filing, 'estimate_revenue') and filing.estimate_revenue:
             context['estimate_revenue'] = filing.estimate_revenue
         
+        # Actuals read from the filing's inline XBRL tags (USD only)
+        xbrl_metrics = {}
+        if isinstance(filing.financial_data, dict) and filing.financial_data.get('source') == 'ixbrl':
+            xbrl_metrics = filing.financial_data.get('metrics', {})
+        if filing.eps is not None and xbrl_metrics.get('eps', {}).get('unit') == METRIC_UNITS['eps']:
+            context['reported_eps'] = filing.eps
+            context['reported_eps_label'] = EPS_LABELS.get(xbrl_metrics['eps'].get('concept'), 'EPS')
+        if filing.revenue is not None and xbrl_metrics.get('revenue', {}).get('unit') == METRIC_UNITS['revenue']:
+            context['reported_revenue'] = filing.revenue / 1000  # millions -> billions
+        
         if filing.filing_type == FilingType.FORM_8K:
             context['event_type'] = self._identify_8k_event_type(filing.primary_content if hasattr(filing, 'primary_content') else '')
             context['item_type'] = filing.item_type if hasattr(filing, 'item_type') else ''
@@ -1057,6 +1081,28 @@ Apply these lightweight visual markings to improve scannability:
         
         table = "\n".join(table_rows)
         
+        # Actuals tagged in the filing (XBRL) replace the search through the statements
+        reported_eps = context.get('reported_eps')
+        reported_revenue = context.get('reported_revenue')
+        if reported_eps is not None or reported_revenue is not None:
+            actual_lines = []
+            if reported_eps is not None:
+                eps_label = context.get('reported_eps_label', 'EPS')
+                actual_lines.append(f"- **{eps_label}**: ${reported_eps:.2f} [DOC: Income Statement]")
+            if reported_revenue is not None:
+                actual_lines.append(f"- **Revenue**: ${reported_revenue:.2f}B [DOC: Income Statement]")
+            actuals = "\n".join(actual_lines)
+            extract_step = f"""Reported actuals, read from this filing's XBRL tags (exact - use as-is, do not re-derive):
+
+Write in FACT CLARITY section:
+{actuals}"""
+        else:
+            extract_step = """Look for "Diluted earnings per share" and "Total revenue" in financial statements.
+
+Write in FACT CLARITY section:
+- **Diluted EPS**: $X.XX [DOC: Income Statement]
+- **Revenue**: $XX.XB [DOC: Income Statement]"""
+        
         return f"""
 ## CRITICAL: Beat/Miss Reference Data
 
@@ -1071,11 +1117,7 @@ Apply these lightweight visual markings to improve scannability:
 ### YOUR ANALYSIS WORKFLOW:
 
 **Step 1 - Extract Actuals from Filing**:
-Look for "Diluted earnings per share" and "Total revenue" in financial statements.
-
-Write in FACT CLARITY section:
-- **Diluted EPS**: $X.XX [DOC: Income Statement]
-- **Revenue**: $XX.XB [DOC: Income Statement]
+{extract_step}
 
 **Step 2 - Determine Beat/Miss**:
 FOR EPS:
@@ -0,0 +1,87 @@
+# app/services/atom_stream.py
+"""
+Incremental parser for EDGAR's browse-edgar atom feeds
+
+Bytes are fed as they arrive from the response stream; each <entry> is
+handed back as soon as its closing tag is parsed and then freed, so a
+caller can stop reading (and close the connection) at the first entry it
+has already seen instead of downloading and parsing the whole document.
+
+Entries are plain dicts with the keys SECClient._parse_rss_entry reads
+from feedparser entries: title, link, summary, updated, id.
+"""
+import re
+from typing import Dict, List, Optional
+
+from lxml import etree
+
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+
+ACCESSION_PATTERN = re.compile(r'(\d{10}-\d{2}-\d{6})')
+
+
+class AtomEntryStream:
+    """Feed raw bytes, get back the entries completed so far"""
+
+    def __init__(self):
+        self._parser = etree.XMLPullParser(
+            events=("end",),
+            tag=f"{ATOM_NS}entry",
+            resolve_entities=False,
+            no_network=True,
+        )
+        self.entries_parsed = 0
+
+    def feed(self, chunk: bytes) -> List[Dict]:
+        self._parser.feed(chunk)
+        return self._drain()
+
+    def close(self) -> List[Dict]:
+        """Flush the parser at end of stream"""
+        try:
+            self._parser.close()
+        except etree.XMLSyntaxError:
+            # Truncated feed: keep whatever entries completed
+            pass
+        return self._drain()
+
+    def _drain(self) -> List[Dict]:
+        entries = []
+        for _, elem in self._parser.read_events():
+            entries.append(self._to_entry(elem))
+            self.entries_parsed += 1
+            # Free the entry and any siblings already handled
+            elem.clear()
+            parent = elem.getparent()
+            if parent is not None:
+                while elem.getprevious() is not None:
+                    del parent[0]
+        return entries
+
+    @staticmethod
+    def _text(elem, tag: str) -> str:
+        child = elem.find(f"{ATOM_NS}{tag}")
+        return (child.text or "").strip() if child is not None else ""
+
+    def _to_entry(self, elem) -> Dict:
+        link = ""
+        for link_elem in elem.iterfind(f"{ATOM_NS}link"):
+            if link_elem.get("rel", "alternate") == "alternate":
+                link = link_elem.get("href", "")
+                break
+        return {
+            "title": self._text(elem, "title"),
+            "link": link,
+            "summary": self._text(elem, "summary"),
+            "updated": self._text(elem, "updated"),
+            "id": self._text(elem, "id"),
+        }
+
+
+def entry_accession(entry: Dict) -> Optional[str]:
+    """Accession number of a feed entry (from its id, else its link)"""
+    for field in ("id", "link"):
+        match = ACCESSION_PATTERN.search(entry.get(field, ""))
+        if match:
+            return match.group(1)
+    return None
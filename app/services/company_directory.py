@@ -0,0 +1,185 @@
+# app/services/company_directory.py
+"""
+In-memory CIK -> company directory for the scanner hot path
+
+The monitored universe is a few hundred companies that rarely change, so
+the scanner resolves CIKs from a warm dict instead of querying Postgres
+(and sometimes SEC) for every new filing. Only misses fall through to
+EDGARScanner._get_or_create_company.
+
+Freshness: any ORM insert/update of a Company publishes its CIK on a Redis
+channel after commit; every directory subscribed to the channel drops that
+entry so the next lookup reloads it. Writes that bypass the ORM are picked
+up by a periodic full reload.
+"""
+import logging
+import threading
+import time
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.company import Company
+
+logger = logging.getLogger(__name__)
+
+CHANGE_CHANNEL = "companies:changed"
+
+
+class CompanyEntry(NamedTuple):
+    """What the scanner needs to know about a company"""
+    id: int
+    cik: str
+    name: str
+    ticker: Optional[str]
+    indices: Optional[str]
+    is_active: bool
+
+    @classmethod
+    def from_company(cls, company: Company) -> "CompanyEntry":
+        return cls(
+            id=company.id,
+            cik=company.cik,
+            name=company.name,
+            ticker=company.ticker,
+            indices=company.indices,
+            is_active=company.is_active,
+        )
+
+
+class CompanyDirectory:
+    """Warm CIK directory, invalidated by change notifications"""
+
+    def __init__(self):
+        self.reload_seconds = settings.SCANNER_COMPANY_DIRECTORY_RELOAD_SECONDS
+        self._entries: Dict[str, CompanyEntry] = {}
+        self._lock = threading.Lock()
+        self._loaded_at = 0.0
+        self._subscriber = None
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def load(self):
+        """(Re)load every company in one query and subscribe to change notifications"""
+        db = SessionLocal()
+        try:
+            entries = {c.cik: CompanyEntry.from_company(c) for c in db.query(Company).all()}
+        finally:
+            db.close()
+
+        with self._lock:
+            self._entries = entries
+            self._loaded_at = time.monotonic()
+        logger.info(f"Company directory loaded: {len(entries)} companies")
+
+        self._subscribe()
+
+    def ensure_loaded(self):
+        if not self._loaded_at or time.monotonic() - self._loaded_at >= self.reload_seconds:
+            try:
+                self.load()
+            except Exception as e:
+                # Keep serving the previous entries; misses still hit the DB
+                logger.error(f"Error loading company directory: {e}")
+
+    def _subscribe(self):
+        if self._subscriber is not None:
+            return
+        try:
+            pubsub = cache.redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{CHANGE_CHANNEL: self._on_change})
+            self._subscriber = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+        except Exception as e:
+            logger.warning(f"Company directory change notifications unavailable: {e}")
+
+    def _on_change(self, message):
+        self.invalidate(message.get("data"))
+
+    def invalidate(self, cik: Optional[str]):
+        if not cik:
+            return
+        with self._lock:
+            if self._entries.pop(cik, None) is not None:
+                self.invalidations += 1
+
+    def get(self, cik: str) -> Optional[CompanyEntry]:
+        with self._lock:
+            entry = self._entries.get(cik)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def get_many(self, ciks: Iterable[str]) -> Dict[str, CompanyEntry]:
+        """Known entries for the given CIKs (misses are simply absent)"""
+        self.ensure_loaded()
+        found = {}
+        for cik in ciks:
+            entry = self.get(cik)
+            if entry is not None:
+                found[cik] = entry
+        return found
+
+    def add(self, company: Company):
+        """Record a company just created or loaded by the miss path"""
+        entry = CompanyEntry.from_company(company)
+        with self._lock:
+            self._entries[entry.cik] = entry
+
+    def add_entries(self, entries: Iterable[CompanyEntry]):
+        """Record entries built before their company rows were committed"""
+        with self._lock:
+            for entry in entries:
+                self._entries[entry.cik] = entry
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "subscribed": self._subscriber is not None,
+            }
+
+
+# ==================== Change notifications ====================
+# Collected per session and published only after commit, so subscribers
+# never reload a row that is still uncommitted.
+
+@event.listens_for(Company, "after_insert")
+@event.listens_for(Company, "after_update")
+def _track_company_change(mapper, connection, target):
+    session = object_session(target)
+    if session is not None and target.cik:
+        session.info.setdefault("changed_company_ciks", set()).add(target.cik)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_company_changes(session):
+    ciks = session.info.pop("changed_company_ciks", None)
+    if not ciks:
+        return
+    try:
+        for cik in ciks:
+            cache.redis_client.publish(CHANGE_CHANNEL, cik)
+    except Exception as e:
+        logger.debug(f"Could not publish company changes: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_company_changes(session):
+    session.info.pop("changed_company_ciks", None)
+
+
+# Create singleton instance
+company_directory = CompanyDirectory()
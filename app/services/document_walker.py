@@ -0,0 +1,214 @@
+# app/services/document_walker.py
+"""
+Single-pass visitor over a parsed filing document
+
+TextExtractor used to walk the soup once per question: find_all('table'),
+get_text() per table / row / cell, find_all(['p', 'div']) with get_text()
+per candidate (quadratic on nested divs), a backwards find_previous_sibling
+scan per section for its heading (quadratic on flat iXBRL bodies), a
+find_all('^ix:') unwrap pass, decomposition, soup.get_text() and a body
+.descendants walk. walk_document() visits every node exactly once and
+records:
+
+- pieces: the strings Tag.get_text() would return, in document order;
+  any element's text is ''.join(pieces[start:end]) of its span
+- tables: every <table> with its <tr> rows and their <td>/<th> cells
+  (same membership as find_all('tr') / find_all(['td', 'th']), nested
+  tables included)
+- sections: every <p>/<div> whose stripped text is over 200 chars, with its
+  nearest preceding heading sibling and first <b>/<strong> descendant
+- body_parts: the iXBRL body text parts (stripped strings plus a '\n'
+  before block elements)
+- skipped: script/style/link/meta (+ noscript for iXBRL) elements, which
+  are not descended into
+
+With ixbrl=True, ix:* elements are transparent: their children are treated
+as siblings of the ix element's siblings, exactly as after unwrap().
+"""
+from typing import List, Optional
+
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+
+SKIPPED_TAGS = frozenset(['script', 'style', 'link', 'meta'])
+IXBRL_SKIPPED_TAGS = SKIPPED_TAGS | {'noscript'}
+HEADING_TAGS = frozenset(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+BOLD_TAGS = frozenset(['b', 'strong'])
+SECTION_TAGS = frozenset(['p', 'div'])
+CELL_TAGS = frozenset(['td', 'th'])
+IXBRL_BREAK_TAGS = frozenset(['div', 'p', 'br', 'h1', 'h2', 'h3'])
+
+MIN_SECTION_CHARS = 200  # Same threshold as TextExtractor section detection
+MAX_TITLE_CHARS = 100
+
+
+class _Siblings:
+    """State shared by the children of one element"""
+    __slots__ = ("heading",)
+
+    def __init__(self):
+        self.heading: Optional[str] = None  # Nearest preceding short heading
+
+
+class _Frame:
+    __slots__ = ("name", "start", "end", "children", "heading", "first_bold", "text", "rows", "cells")
+
+    def __init__(self, name: str, start: int, children: _Siblings):
+        self.name = name
+        self.start = start
+        self.end = start
+        self.children = children
+        self.heading: Optional[str] = None
+        self.first_bold: Optional["_Frame"] = None
+        self.text: Optional[str] = None
+        self.rows: Optional[List["_Frame"]] = None
+        self.cells: Optional[List["_Frame"]] = None
+
+
+class DocumentWalk:
+    """What one traversal of a document collected"""
+
+    def __init__(self):
+        self.pieces: List[str] = []
+        self.offsets: List[int] = [0]  # offsets[i] = chars in pieces[:i]
+        self.tables: List[_Frame] = []
+        self.sections: List[_Frame] = []
+        self.body_parts: List[str] = []
+        self.skipped: List[Tag] = []
+
+    def text(self, frame: _Frame) -> str:
+        """Same as element.get_text()"""
+        return "".join(self.pieces[frame.start:frame.end])
+
+    @property
+    def full_text(self) -> str:
+        """Same as soup.get_text() once the skipped elements are decomposed"""
+        return "".join(self.pieces)
+
+    def table_rows(self, table: _Frame) -> List[List[str]]:
+        """Stripped cell texts per row"""
+        return [[self.text(cell).strip() for cell in row.cells] for row in table.rows]
+
+    def section_title(self, section: _Frame) -> Optional[str]:
+        """Nearest preceding h1-h6 sibling under 100 chars, else the first <b>/<strong> if short"""
+        if section.heading is not None:
+            return section.heading
+        if section.first_bold is not None:
+            title = self.text(section.first_bold).strip()
+            if len(title) < MAX_TITLE_CHARS:
+                return title
+        return None
+
+
+def walk_document(soup: BeautifulSoup, ixbrl: bool = False) -> DocumentWalk:
+    """
+    Visit every node of a parsed document once
+
+    Args:
+        soup: Parsed document (not modified)
+        ixbrl: Treat ix:* elements as unwrapped, skip <noscript> and collect
+            body_parts (the _extract_from_ixbrl text layout)
+    """
+    walk = DocumentWalk()
+    pieces, offsets = walk.pieces, walk.offsets
+    body_parts = walk.body_parts
+    skipped_tags = IXBRL_SKIPPED_TAGS if ixbrl else SKIPPED_TAGS
+
+    open_sections: List[_Frame] = []
+    open_tables: List[_Frame] = []
+    open_rows: List[_Frame] = []
+    body: Optional[_Frame] = None
+    in_body = False
+    total = 0
+
+    root = _Frame("[document]", 0, _Siblings())
+    stack = [(root, None, iter(soup.contents))]
+
+    while stack:
+        frame, parent_siblings, children = stack[-1]
+        node = next(children, None)
+
+        if node is None:
+            # ==================== Element closed ====================
+            stack.pop()
+            frame.end = len(pieces)
+            name = frame.name
+            if frame is body:
+                in_body = False
+            if name in SECTION_TAGS and open_sections and open_sections[-1] is frame:
+                open_sections.pop()
+                # Only join spans that can pass the threshold
+                if offsets[frame.end] - offsets[frame.start] > MIN_SECTION_CHARS:
+                    text = "".join(pieces[frame.start:frame.end]).strip()
+                    if len(text) > MIN_SECTION_CHARS:
+                        frame.text = text
+            elif name == "table":
+                open_tables.pop()
+            elif name == "tr":
+                open_rows.pop()
+            elif name in HEADING_TAGS:
+                title = "".join(pieces[frame.start:frame.end]).strip()
+                if len(title) < MAX_TITLE_CHARS:
+                    parent_siblings.heading = title
+            continue
+
+        if isinstance(node, NavigableString):
+            # get_text() only returns plain strings and CDATA (no comments, scripts, ...)
+            node_type = type(node)
+            if node_type is NavigableString or node_type is CData:
+                pieces.append(node)
+                total += len(node)
+                offsets.append(total)
+            if in_body:
+                stripped = node.strip()
+                if stripped:
+                    body_parts.append(stripped)
+            continue
+
+        # ==================== Element opened ====================
+        name = node.name
+        if name in skipped_tags:
+            walk.skipped.append(node)
+            continue
+
+        if ixbrl and name[:3].lower() == "ix:":
+            # Unwrapped: children continue the current sibling list
+            child = _Frame(name, len(pieces), frame.children)
+            stack.append((child, parent_siblings, iter(node.contents)))
+            continue
+
+        child = _Frame(name, len(pieces), _Siblings())
+        siblings = frame.children
+
+        if in_body and name in IXBRL_BREAK_TAGS:
+            body_parts.append("\n")
+
+        if name in SECTION_TAGS:
+            child.heading = siblings.heading
+            walk.sections.append(child)
+            open_sections.append(child)
+        elif name in BOLD_TAGS:
+            # First <b>/<strong> of every enclosing section that has none yet
+            for section in reversed(open_sections):
+                if section.first_bold is not None:
+                    break
+                section.first_bold = child
+        elif name == "table":
+            child.rows = []
+            walk.tables.append(child)
+            open_tables.append(child)
+        elif name == "tr":
+            child.cells = []
+            for table in open_tables:
+                table.rows.append(child)
+            open_rows.append(child)
+        elif name in CELL_TAGS:
+            for row in open_rows:
+                row.cells.append(child)
+        elif ixbrl and name == "body" and body is None:
+            body = child
+            in_body = True
+
+        stack.append((child, siblings, iter(node.contents)))
+
+    walk.sections = [section for section in walk.sections if section.text is not None]
+    return walk
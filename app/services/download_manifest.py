@@ -0,0 +1,146 @@
+# app/services/download_manifest.py
+"""
+Per-filing download manifest (data/filings/{cik}/{acc}/manifest.json)
+
+Records URL, byte size, sha256 and validation result for every file
+download_filing fetched. When process_filing_task retries, or a reprocess
+script re-queues a filing, files whose size and checksum still match a
+valid entry are reused instead of fetched again; only missing, changed or
+previously invalid files go back to SEC.
+
+Entries with "blob" set have their body in the content-addressed filing
+store (see filing_store) instead of in this directory.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def sha256_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DownloadManifest:
+    """Manifest of the files fetched into one filing directory"""
+
+    def __init__(self, filing_dir: Path, files: Optional[Dict[str, Dict]] = None):
+        self.filing_dir = filing_dir
+        self.path = filing_dir / MANIFEST_FILENAME
+        self.files: Dict[str, Dict] = files or {}
+        self.reused = 0
+        # filing_store.store_file runs in worker threads while downloads keep recording
+        self._lock = threading.RLock()
+
+    @classmethod
+    def load(cls, filing_dir: Path) -> "DownloadManifest":
+        path = filing_dir / MANIFEST_FILENAME
+        if not path.exists():
+            return cls(filing_dir)
+        return cls.parse(filing_dir, path.read_bytes())
+
+    @classmethod
+    def parse(cls, filing_dir: Path, raw: bytes) -> "DownloadManifest":
+        """Build a manifest from manifest.json contents (e.g. read from object storage)"""
+        try:
+            data = json.loads(raw)
+            if data.get("version") != MANIFEST_VERSION:
+                return cls(filing_dir)
+            return cls(filing_dir, data.get("files", {}))
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable manifest in {filing_dir}: {e}")
+            return cls(filing_dir)
+
+    def save(self):
+        """Atomic write so a crash never leaves a half-written manifest"""
+        with self._lock:
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            tmp_path.write_text(json.dumps({"version": MANIFEST_VERSION, "files": self.files}, indent=2))
+            os.replace(tmp_path, self.path)
+
+    def record(self, filename: str, url: str, size: int, sha256: Optional[str],
+               valid: bool, kind: str, reason: Optional[str] = None):
+        """
+        Record the outcome of one fetch
+
+        Args:
+            kind: "index", "main" or "exhibit"
+            reason: Why a file is invalid (e.g. "too_large", "validation_failed")
+        """
+        with self._lock:
+            self.files[filename] = {
+                "url": url,
+                "size": size,
+                "sha256": sha256,
+                "valid": valid,
+                "kind": kind,
+                "reason": reason,
+                "fetched_at": datetime.now(timezone.utc).isoformat(),
+            }
+            self.save()
+
+    def update(self, filename: str, **fields):
+        """Add fields to an existing entry and save"""
+        with self._lock:
+            self.files[filename].update(fields)
+            self.save()
+
+    def get(self, filename: str) -> Optional[Dict]:
+        return self.files.get(filename)
+
+    def is_verified(self, filename: str) -> bool:
+        """A valid entry whose file is still on disk with the same size and checksum"""
+        entry = self.files.get(filename)
+        if not entry or not entry.get("valid"):
+            return False
+        path = self.filing_dir / filename
+        if entry.get("blob") and not path.exists():
+            # Body lives in the content-addressed store (keyed by this checksum)
+            # Import here to avoid circular import
+            from app.services.filing_store import filing_store
+            if not filing_store.has_blob(entry.get("sha256")):
+                return False
+            self.reused += 1
+            return True
+        try:
+            if not path.exists() or path.stat().st_size != entry.get("size"):
+                return False
+            if sha256_file(path) != entry.get("sha256"):
+                return False
+        except OSError:
+            return False
+        self.reused += 1
+        return True
+
+    def is_settled(self, filename: str) -> bool:
+        """Verified, or rejected for a reason a re-fetch cannot fix (size cap)"""
+        entry = self.files.get(filename)
+        if entry and not entry.get("valid") and entry.get("reason") == "too_large":
+            return True
+        return self.is_verified(filename)
+
+    def find(self, kind: str) -> Optional[str]:
+        """Filename of the first valid entry of a kind (e.g. the main document)"""
+        for filename, entry in self.files.items():
+            if entry.get("kind") == kind and entry.get("valid"):
+                return filename
+        return None
+
+    def clear(self):
+        """Forget every entry (forces a full re-download)"""
+        self.files = {}
+        if self.path.exists():
+            self.path.unlink()
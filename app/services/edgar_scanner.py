@@ -10,7 +10,10 @@ ENHANCED: Record precise detection timestamps (detected_at field)
 ENHANCED: Consistent timezone handling and validation
 """
 from typing import List, Dict, Optional
+from collections import deque
 from datetime import datetime, timedelta, timezone
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 import logging
 import json
@@ -18,11 +21,15 @@ from pathlib import Path
 import re
 
 from app.services.sec_client import sec_client
+from app.services.accession_index import accession_index
+from app.services.poll_planner import poll_planner
+from app.services.shard_coordinator import shard_coordinator
+from app.services.company_directory import company_directory, CompanyEntry
 from app.models.company import Company
 from app.models.filing import Filing, FilingType, ProcessingStatus
 from app.core.database import SessionLocal
 from app.core.config import settings
-from app.tasks.filing_tasks import process_filing_task
+from app.services.ingestion_gate import ingestion_gate
 
 logger = logging.getLogger(__name__)
 
@@ -104,6 +111,14 @@ class EDGARScanner:
         # Combined monitored CIKs (for JSON scanning)
         self.monitored_ciks = self.sp500_ciks | self.nasdaq100_ciks
         
+        # Firehose (current feed) cursor: accessions returned by recent polls
+        self.feed_cursor: deque = deque(maxlen=500)
+        self.reconcile_requested = False
+        
+        # Priority polling: only CIKs due in their tier are polled each tick
+        self.priority_enabled = settings.SCANNER_PRIORITY_ENABLED
+        self.last_rss_scan: Optional[datetime] = None
+        
         # Hourly summary tracking
         self.hourly_filings = []  # Filings found in current hour
         self.last_hourly_summary = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
@@ -153,17 +168,13 @@ class EDGARScanner:
             logger.error(f"Error loading NASDAQ 100 companies: {e}")
             return []
     
-    def _get_known_accessions(self) -> set:
-        """Get all accession numbers already in database"""
-        db = SessionLocal()
-        try:
-            accessions = db.query(Filing.accession_number).all()
-            return {a[0] for a in accessions if a[0]}
-        except Exception as e:
-            logger.error(f"Error loading known accessions: {e}")
-            return set()
-        finally:
-            db.close()
+    def _filter_new_filings(self, filings: List[Dict]) -> List[Dict]:
+        """
+        Drop filings whose accession number is already known
+        Uses the incremental accession index - cost is O(candidates), not O(table)
+        """
+        unknown = accession_index.filter_unknown(f.get("accession_number") for f in filings)
+        return [f for f in filings if f.get("accession_number") in unknown]
     
     def _check_hourly_summary(self):
         """Output hourly summary if hour has changed"""
@@ -268,7 +279,7 @@ class EDGARScanner:
         
         return valid_items
         
-    async def scan_for_new_filings(self) -> List[Dict]:
+    async def scan_for_new_filings(self, full_sweep: bool = False) -> List[Dict]:
         """
         Main scanning method (v2)
         
@@ -276,63 +287,305 @@ class EDGARScanner:
         - JSON submissions API: For 8-K/10-Q/10-K (known CIKs, 100% reliable)
         - RSS feed: Only for S-1 (IPO filings from unknown CIKs)
         
+        With priority polling enabled, only CIKs due in their poll tier
+        (see poll_planner) are queried; full_sweep=True polls every CIK.
+        With sharding enabled, only CIKs of the shards this node holds are
+        considered, and the S-1 RSS poll runs on the shard-0 holder only.
+        
         Returns:
             List of new filings discovered
         """
         scan_start_time = datetime.now(timezone.utc)
         
+        # A full sweep also reconciles anything the current feed missed
+        if full_sweep:
+            self.reconcile_requested = False
+        
         # Check if we need to output hourly summary
         self._check_hourly_summary()
         
         all_new_filings = []
         
         # ==================== PART 1: JSON Scan (8-K/10-Q/10-K) ====================
-        # Get known accession numbers to filter out duplicates
-        known_accessions = self._get_known_accessions()
+        scan_ciks = self._scan_ciks()
+        if full_sweep or not self.priority_enabled:
+            ciks = list(scan_ciks)
+        else:
+            poll_planner.refresh_tiers(self.monitored_ciks)
+            ciks = poll_planner.due_ciks(scan_ciks)
+        
+        if ciks:
+            # Batch query the selected CIKs (dedup happens against the accession index)
+            json_result = await sec_client.get_batch_submissions(
+                ciks=ciks,
+                known_accessions=None
+            )
+            poll_planner.mark_polled(ciks)
+            
+            # Process new filings from JSON
+            all_new_filings.extend(await self._process_new_filings_batch(
+                self._filter_new_filings(json_result.get("new_filings", [])),
+                scan_start_time=scan_start_time,
+                discovery_method="JSON"
+            ))
         
-        # Batch query all monitored CIKs
-        json_result = await sec_client.get_batch_submissions(
-            ciks=list(self.monitored_ciks),
-            known_accessions=known_accessions
+        # ==================== PART 2: RSS Scan (S-1 only) ====================
+        # S-1s are not time-critical: keep the RSS poll on the base interval
+        rss_due = shard_coordinator.owns_global_work and (
+            full_sweep
+            or self.last_rss_scan is None
+            or (scan_start_time - self.last_rss_scan).total_seconds() >= self.scan_interval_seconds
         )
+        if rss_due:
+            self.last_rss_scan = scan_start_time
+            rss_poll = await sec_client.poll_rss_filings(
+                form_type="S-1",
+                lookback_minutes=60,
+                use_cursor=not full_sweep  # Reconciliation re-reads the whole page
+            )
+            
+            # Process S-1 filings (skip invalid and already known)
+            s1_filings = self._filter_new_filings(
+                [f for f in rss_poll["filings"] if self._validate_filing_data(f)]
+            )
+            try:
+                all_new_filings.extend(await self._process_new_filings_batch(
+                    s1_filings,
+                    scan_start_time=scan_start_time,
+                    discovery_method="RSS",
+                    raise_errors=True
+                ))
+            except Exception:
+                # Cursor stays put: the next poll reads these S-1s again
+                pass
+            else:
+                sec_client.save_rss_cursors(rss_poll["cursors"])
         
-        # Process new filings from JSON
-        for filing_data in json_result.get("new_filings", []):
-            new_filing = await self._process_new_filing(
-                filing_data=filing_data,
+        # Log scan summary
+        smart_logger.log_scan_result(len(all_new_filings), len(scan_ciks))
+        
+        return all_new_filings
+    
+    def _scan_ciks(self) -> set:
+        """Monitored CIKs this node polls (all of them unless sharded)"""
+        if shard_coordinator.enabled:
+            return shard_coordinator.filter_ciks(self.monitored_ciks)
+        return self.monitored_ciks
+    
+    async def scan_current_feed(self) -> List[Dict]:
+        """
+        Firehose scan: one poll of EDGAR's all-forms current feed
+        
+        Entries newer than the last-seen cursor are filtered locally:
+        8-K/10-Q/10-K only for monitored CIKs, S-1 from any filer. A full
+        scan normally costs one request instead of one per monitored CIK.
+        If the cursor falls off the feed, reconcile_requested is set so the
+        scheduler runs a JSON sweep (scan_for_new_filings) next.
+        
+        Returns:
+            List of new filings discovered
+        """
+        scan_start_time = datetime.now(timezone.utc)
+        self._check_hourly_summary()
+        
+        result = await sec_client.get_current_filings(seen_accessions=set(self.feed_cursor))
+        if result.get("gap"):
+            self.reconcile_requested = True
+        
+        feed_filings = result.get("filings", [])
+        
+        candidates = [
+            f for f in feed_filings
+            if (
+                (f.get("form") in self.json_forms and f.get("cik") in self.monitored_ciks)
+                or f.get("form") in self.rss_forms
+            )
+            and self._validate_filing_data(f)
+        ]
+        
+        try:
+            all_new_filings = await self._process_new_filings_batch(
+                self._filter_new_filings(candidates),
                 scan_start_time=scan_start_time,
-                discovery_method="JSON"
+                discovery_method="FEED",
+                raise_errors=True
             )
-            if new_filing:
-                all_new_filings.append(new_filing)
+        except Exception:
+            # Cursor stays put: the next poll reads these entries again
+            return []
         
-        # ==================== PART 2: RSS Scan (S-1 only) ====================
-        s1_filings = await sec_client.get_rss_filings(
-            form_type="S-1",
-            lookback_minutes=60
+        # Every entry read moves the cursor, not just tracked forms, so the
+        # next poll stops right here. Newest first in the feed; keep the
+        # cursor ordered oldest -> newest.
+        for accession in reversed(result.get("accessions", [])):
+            self.feed_cursor.append(accession)
+        
+        smart_logger.log_scan_result(len(all_new_filings), len(self.monitored_ciks))
+        
+        return all_new_filings
+    
+    async def _process_new_filings_batch(self, filings: List[Dict], scan_start_time: datetime, discovery_method: str,
+                                         raise_errors: bool = False) -> List[Dict]:
+        """
+        Create records for all new filings of one scan and queue them together
+        
+        Companies are resolved from the in-memory company directory; only
+        unknown CIKs touch the database (one IN query, then
+        _get_or_create_company for brand-new filers). Every row goes in with a single
+        INSERT ... ON CONFLICT (accession_number) DO NOTHING RETURNING id, and
+        the returned IDs are queued as one Celery group. Rows that lost the
+        race to another writer simply don't come back from RETURNING.
+        
+        Args:
+            filings: New filings (already filtered against the accession index)
+            scan_start_time: When this scan started (for detected_at)
+            discovery_method: "JSON", "RSS" or "FEED"
+            raise_errors: Re-raise a failed batch (after rollback) instead of
+                returning [], for callers that must not advance a feed cursor
+            
+        Returns:
+            Filing info dicts for the rows actually inserted
+        """
+        # Dedup within the batch (the same filing can appear under several CIKs)
+        filings = list({f.get("accession_number"): f for f in filings if f.get("accession_number")}.values())
+        if not filings:
+            return []
+        
+        db = SessionLocal()
+        try:
+            dialect = db.get_bind().dialect.name
+            if dialect not in ("postgresql", "sqlite"):
+                return await self._process_new_filings_one_by_one(filings, scan_start_time, discovery_method)
+            
+            # Resolve companies: warm directory first, database only for misses
+            ciks = {f.get("cik", "") for f in filings}
+            companies = company_directory.get_many(ciks)
+            missing = ciks - companies.keys()
+            # Companies created here only go into the directory once committed
+            created_companies = []
+            if missing:
+                for company in db.query(Company).filter(Company.cik.in_(missing)).all():
+                    company_directory.add(company)
+                    companies[company.cik] = CompanyEntry.from_company(company)
+                for filing_data in filings:
+                    cik = filing_data.get("cik", "")
+                    if cik not in companies:
+                        company = await self._get_or_create_company(db, cik, filing_data.get("company_name", ""))
+                        if company:
+                            companies[cik] = CompanyEntry.from_company(company)
+                            created_companies.append(companies[cik])
+            
+            rows = []
+            for filing_data in filings:
+                company = companies.get(filing_data.get("cik", ""))
+                if not company:
+                    logger.warning(f"Could not find/create company for CIK {filing_data.get('cik', '')}")
+                    continue
+                if not self._validate_before_creation(filing_data, company):
+                    continue
+                rows.append(self._build_filing_values(company, filing_data, scan_start_time))
+            
+            if not rows:
+                db.commit()  # keep any newly created companies
+                company_directory.add_entries(created_companies)
+                return []
+            
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            stmt = insert(Filing).values(rows).on_conflict_do_nothing(
+                index_elements=["accession_number"]
+            ).returning(Filing.id, Filing.accession_number)
+            inserted = {accession: filing_id for filing_id, accession in db.execute(stmt).all()}
+            
+            # Replaces the per-company update_filings_ticker() bookkeeping
+            if inserted:
+                company_ids = {r["company_id"] for r in rows if r["accession_number"] in inserted}
+                db.execute(
+                    update(Company).where(Company.id.in_(company_ids)).values(last_filing_date=scan_start_time)
+                )
+            db.commit()
+            company_directory.add_entries(created_companies)
+            
+        except Exception as e:
+            logger.error(f"Error creating {len(filings)} filing records in batch: {e}")
+            db.rollback()
+            if raise_errors:
+                raise
+            return []
+        finally:
+            db.close()
+        
+        # Keep the known-accession index in sync: every row we sent is in the
+        # table now, inserted by us or by whoever won the race. Filings skipped
+        # above (no company, failed validation) stay unknown and are retried.
+        accession_index.add_many(r["accession_number"] for r in rows)
+        
+        if not inserted:
+            return []
+        
+        # Queue new filings for AI processing, newest first, as far as the
+        # queue has room; the rest stay PENDING until ingestion_gate drains them
+        newest_first = sorted(
+            (f for f in filings if f["accession_number"] in inserted),
+            key=lambda f: f.get("filing_date", ""),
+            reverse=True
         )
+        filing_ids = [inserted[f["accession_number"]] for f in newest_first]
+        try:
+            admission = ingestion_gate.admit(filing_ids)
+            if admission["admitted"]:
+                logger.info(f"✅ Queued {len(admission['admitted'])} filings for processing: {admission['admitted']}")
+        except Exception as e:
+            logger.error(f"❌ Failed to queue filings {filing_ids}: {e}")
         
-        # Process S-1 filings
-        for rss_filing in s1_filings:
-            if not self._validate_filing_data(rss_filing):
+        results = []
+        for filing_data in filings:
+            filing_id = inserted.get(filing_data["accession_number"])
+            if filing_id is None:
                 continue
+            company = companies[filing_data.get("cik", "")]
+            ticker = company.ticker
+            form_type = filing_data.get("form", "")
             
-            # Check if already exists
-            if rss_filing.get("accession_number") in known_accessions:
-                continue
+            # Fresh 8-K activity raises this company's poll priority
+            if form_type == "8-K":
+                poll_planner.promote(company.cik)
+            
+            self._add_to_hourly_summary(
+                ticker=ticker,
+                form=form_type,
+                time_str=scan_start_time.strftime("%H:%M")
+            )
+            logger.info(
+                f"🎯 New {discovery_method}: {ticker} {form_type} "
+                f"({filing_data.get('filing_date', 'N/A')}) - ID: {filing_id}"
+            )
             
+            results.append({
+                "id": filing_id,
+                "company": company.name,
+                "ticker": ticker,
+                "form_type": form_type,
+                "filing_date": filing_data.get("filing_date", ""),
+                "detected_at": scan_start_time.isoformat(),
+                "accession_number": filing_data["accession_number"],
+                "discovery_method": discovery_method,
+                "indices": company.indices
+            })
+        
+        return results
+    
+    async def _process_new_filings_one_by_one(self, filings: List[Dict], scan_start_time: datetime, discovery_method: str) -> List[Dict]:
+        """Per-filing path for databases without ON CONFLICT ... RETURNING"""
+        results = []
+        for filing_data in filings:
             new_filing = await self._process_new_filing(
-                filing_data=rss_filing,
+                filing_data=filing_data,
                 scan_start_time=scan_start_time,
-                discovery_method="RSS"
+                discovery_method=discovery_method
             )
             if new_filing:
-                all_new_filings.append(new_filing)
-        
-        # Log scan summary
-        smart_logger.log_scan_result(len(all_new_filings), len(self.monitored_ciks))
-        
-        return all_new_filings
+                results.append(new_filing)
+        return results
     
     async def _process_new_filing(self, filing_data: Dict, scan_start_time: datetime, discovery_method: str) -> Optional[Dict]:
         """
@@ -341,7 +594,7 @@ class EDGARScanner:
         Args:
             filing_data: Filing data from JSON or RSS
             scan_start_time: When this scan started (for detected_at)
-            discovery_method: "JSON" or "RSS"
+            discovery_method: "JSON", "RSS" or "FEED"
             
         Returns:
             Filing info dict or None if failed
@@ -354,6 +607,7 @@ class EDGARScanner:
             ).first()
             
             if existing:
+                accession_index.add(existing.accession_number)
                 return None
             
             # Get or create company
@@ -374,10 +628,17 @@ class EDGARScanner:
             db.add(filing)
             db.commit()
             
+            # Keep the known-accession index in sync
+            accession_index.add(filing.accession_number)
+            
             filing_id = filing.id
             ticker = filing.ticker or company.ticker
             form_type = filing_data.get("form", "")
             
+            # Fresh 8-K activity raises this company's poll priority
+            if form_type == "8-K":
+                poll_planner.promote(cik)
+            
             # Add to hourly summary
             self._add_to_hourly_summary(
                 ticker=ticker,
@@ -391,10 +652,10 @@ class EDGARScanner:
                 f"({filing_data.get('filing_date', 'N/A')}) - ID: {filing_id}"
             )
             
-            # Queue for AI processing
+            # Queue for AI processing (or leave PENDING under backpressure)
             try:
-                task = process_filing_task.delay(filing_id)
-                logger.info(f"✅ Queued {filing_id} for processing (task: {task.id[:8]}...)")
+                if ingestion_gate.admit([filing_id])["admitted"]:
+                    logger.info(f"✅ Queued {filing_id} for processing")
             except Exception as e:
                 logger.error(f"❌ Failed to queue filing {filing_id}: {e}")
             
@@ -523,6 +784,15 @@ class EDGARScanner:
             filing_data: Filing data (from JSON submissions or RSS)
             detection_time: Precise UTC timestamp when filing was detected
         """
+        return Filing(**self._build_filing_values(company, filing_data, detection_time))
+    
+    def _build_filing_values(self, company: Company, filing_data: Dict, detection_time: datetime) -> Dict:
+        """
+        Column values for a new filing row (shared by the ORM and batch INSERT paths)
+        
+        Every row has the same keys so a list of them can go into one
+        multi-row INSERT.
+        """
         # Map form type
         form_mapping = {
             "10-K": FilingType.FORM_10K,
@@ -550,44 +820,43 @@ class EDGARScanner:
             if official_items:
                 logger.debug(f"8-K filing has official Items: {official_items}")
         
-        # Create Filing with ticker from company and precise detection time
-        filing = Filing(
-            company_id=company.id,
-            ticker=company.ticker,
-            accession_number=filing_data["accession_number"],
-            filing_type=form_mapping.get(filing_data.get("form", ""), FilingType.FORM_10K),
-            form_type=filing_data.get("form", ""),
-            filing_date=filing_date_utc,
-            detected_at=detection_time,
-            status=ProcessingStatus.PENDING,
-            event_items=official_items if official_items else None
-        )
+        # Filing values with ticker from company and precise detection time
+        values = {
+            "company_id": company.id,
+            "ticker": company.ticker,
+            "accession_number": filing_data["accession_number"],
+            "filing_type": form_mapping.get(filing_data.get("form", ""), FilingType.FORM_10K),
+            "form_type": filing_data.get("form", ""),
+            "filing_date": filing_date_utc,
+            "detected_at": detection_time,
+            "status": ProcessingStatus.PENDING,
+            "event_items": official_items if official_items else None,
+            "filing_url": None,
+            "full_text_url": None,
+            "primary_document_url": None,
+        }
         
         # Set URL fields - support both RSS (rss_link) and JSON (construct from accession)
         if filing_data.get('rss_link'):
-            filing.filing_url = filing_data['rss_link']
-            filing.full_text_url = filing_data['rss_link']
-            filing.primary_document_url = filing_data['rss_link']
+            values["filing_url"] = filing_data['rss_link']
+            values["full_text_url"] = filing_data['rss_link']
+            values["primary_document_url"] = filing_data['rss_link']
         elif filing_data.get('accession_number') and filing_data.get('cik'):
             # Construct URL for JSON-sourced filings
             cik = filing_data['cik'].lstrip('0')
             acc_no = filing_data['accession_number'].replace('-', '')
             base_url = f"https://www.sec.gov/Archives/edgar/data/{cik}/{acc_no}"
-            filing.filing_url = base_url
+            values["filing_url"] = base_url
             if filing_data.get('primary_document'):
-                filing.primary_document_url = f"{base_url}/{filing_data['primary_document']}"
-        
-        # Ensure ticker is populated
-        if not filing.ticker and company.ticker:
-            filing.ticker = company.ticker
+                values["primary_document_url"] = f"{base_url}/{filing_data['primary_document']}"
         
         # Log the creation with timing info
-        log_msg = f"Created filing record: {filing.ticker} {filing.filing_type.value} filed={filing_date_utc.isoformat()} detected={detection_time.isoformat()}"
+        log_msg = f"Created filing record: {values['ticker']} {values['filing_type'].value} filed={filing_date_utc.isoformat()} detected={detection_time.isoformat()}"
         if official_items:
             log_msg += f" items={official_items}"
         logger.debug(log_msg)
         
-        return filing
+        return values
     
     def _update_missing_data(self):
         """
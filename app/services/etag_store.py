@@ -0,0 +1,174 @@
+# app/services/etag_store.py
+"""
+Durable ETag/Last-Modified store for SEC submissions polling
+
+The in-memory etag dict was lost on every deploy and never shared between
+replicas, so a cold scanner re-downloaded every submissions JSON. Entries are
+kept in Redis (shared by all replicas) with a TTL; when Redis is unreachable
+we fall back to a local SQLite file so a restart is still cheap.
+
+Each entry also remembers the newest filings parsed from that response.
+A 304 therefore still yields those accessions, and a filing seen just before
+a crash is re-checked against the database instead of being lost behind a
+cached ETag.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.core.cache import cache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ETagStore:
+    """ETag cache for submissions JSON, keyed by padded CIK"""
+
+    def __init__(self):
+        self.backend = settings.SEC_ETAG_STORE_BACKEND  # "redis" or "disk"
+        self.ttl = settings.SEC_ETAG_TTL_SECONDS
+        self.key_prefix = "sec:etag"
+        self.disk_path = Path(settings.SEC_ETAG_DISK_PATH)
+
+        self._disk_conn: Optional[sqlite3.Connection] = None
+        self._disk_lock = threading.Lock()
+        self._redis_down_until = 0.0
+        self.redis_retry_seconds = 60
+
+        # Hit/miss counters (this process)
+        self._stats_lock = threading.Lock()
+        self.hits = 0           # entry found, conditional request sent
+        self.misses = 0         # no entry, full download
+        self.not_modified = 0   # server answered 304
+        self.stores = 0
+
+    # ==================== Backends ====================
+
+    def _use_redis(self) -> bool:
+        return self.backend == "redis" and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, e: Exception):
+        logger.warning(f"ETag store: Redis unavailable ({e}), using disk store for {self.redis_retry_seconds}s")
+        self._redis_down_until = time.monotonic() + self.redis_retry_seconds
+
+    def _get_disk(self) -> sqlite3.Connection:
+        if self._disk_conn is None:
+            self.disk_path.parent.mkdir(parents=True, exist_ok=True)
+            self._disk_conn = sqlite3.connect(str(self.disk_path), check_same_thread=False, timeout=5.0)
+            self._disk_conn.execute(
+                "CREATE TABLE IF NOT EXISTS etags (cik TEXT PRIMARY KEY, payload TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._disk_conn.commit()
+        return self._disk_conn
+
+    def _disk_get(self, cik: str) -> Optional[Dict]:
+        with self._disk_lock:
+            row = self._get_disk().execute(
+                "SELECT payload, expires_at FROM etags WHERE cik = ?", (cik,)
+            ).fetchone()
+        if not row or row[1] < time.time():
+            return None
+        return json.loads(row[0])
+
+    def _disk_set(self, cik: str, entry: Dict):
+        with self._disk_lock:
+            conn = self._get_disk()
+            conn.execute(
+                "INSERT OR REPLACE INTO etags (cik, payload, expires_at) VALUES (?, ?, ?)",
+                (cik, json.dumps(entry), time.time() + self.ttl)
+            )
+            conn.commit()
+
+    def _disk_touch(self, cik: str):
+        with self._disk_lock:
+            conn = self._get_disk()
+            conn.execute("UPDATE etags SET expires_at = ? WHERE cik = ?", (time.time() + self.ttl, cik))
+            conn.commit()
+
+    # ==================== Public API ====================
+
+    def get(self, cik: str) -> Optional[Dict]:
+        """
+        Get cached validators for a CIK
+
+        Returns:
+            {"etag", "last_modified", "filings"} or None
+        """
+        entry = None
+        try:
+            if self._use_redis():
+                try:
+                    raw = cache.redis_client.get(f"{self.key_prefix}:{cik}")
+                    entry = json.loads(raw) if raw else None
+                except Exception as e:
+                    self._redis_failed(e)
+                    entry = self._disk_get(cik)
+            else:
+                entry = self._disk_get(cik)
+        except Exception as e:
+            logger.error(f"ETag store get error for CIK {cik}: {e}")
+            entry = None
+
+        with self._stats_lock:
+            if entry:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entry
+
+    def set(self, cik: str, etag: Optional[str], last_modified: Optional[str], filings: List[Dict]):
+        """Store validators and the newest filings parsed from a 200 response"""
+        if not etag and not last_modified:
+            return
+
+        entry = {"etag": etag, "last_modified": last_modified, "filings": filings}
+        try:
+            if self._use_redis():
+                try:
+                    cache.redis_client.setex(f"{self.key_prefix}:{cik}", self.ttl, json.dumps(entry))
+                except Exception as e:
+                    self._redis_failed(e)
+                    self._disk_set(cik, entry)
+            else:
+                self._disk_set(cik, entry)
+            with self._stats_lock:
+                self.stores += 1
+        except Exception as e:
+            logger.error(f"ETag store set error for CIK {cik}: {e}")
+
+    def mark_not_modified(self, cik: str):
+        """Record a 304 and extend the entry's TTL"""
+        with self._stats_lock:
+            self.not_modified += 1
+        try:
+            if self._use_redis():
+                try:
+                    cache.redis_client.expire(f"{self.key_prefix}:{cik}", self.ttl)
+                except Exception as e:
+                    self._redis_failed(e)
+                    self._disk_touch(cik)
+            else:
+                self._disk_touch(cik)
+        except Exception as e:
+            logger.debug(f"ETag store touch error for CIK {cik}: {e}")
+
+    def get_stats(self) -> Dict:
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "redis" if self._use_redis() else "disk",
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "not_modified": self.not_modified,
+                "stores": self.stores,
+            }
+
+
+# Create singleton instance
+etag_store = ETagStore()
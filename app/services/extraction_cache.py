@@ -0,0 +1,182 @@
+# app/services/extraction_cache.py
+"""
+Persisted cache of TextExtractor results
+
+SEC documents never change once filed, yet retries, the reprocess scripts
+and analysis-version bumps ran text_extractor.extract_from_filing() from
+scratch every time. Results (sections, enhanced Markdown, exhibit content
+and stats) are now stored compressed in the storage backend under
+
+    extractions/v{EXTRACTOR_VERSION}/{key[:2]}/{key}.json.{zst|gz}
+
+where key is the sha256 of every document in the filing directory (name +
+content checksum, taken from the download manifest when it has one) plus
+the HTML parser backend. Same inputs, same extractor -> the stored result
+is returned without reading or parsing any document. Bumping
+EXTRACTOR_VERSION invalidates everything; purge() removes old versions
+and entries past EXTRACTION_CACHE_RETENTION_DAYS.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from app.core.config import settings
+from app.core.storage import storage
+from app.services.filing_store import CODEC_EXTENSIONS, filing_store
+from app.services.text_extractor import EXTRACTOR_VERSION, text_extractor
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "extractions"
+
+
+class ExtractionCache:
+    """extract_from_filing() with results remembered per input checksum"""
+
+    def __init__(self):
+        self.enabled = settings.EXTRACTION_CACHE_ENABLED
+        self.retention_days = settings.EXTRACTION_CACHE_RETENTION_DAYS
+        self.version_prefix = f"{CACHE_PREFIX}/v{EXTRACTOR_VERSION}/"
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "errors": 0, "parse_seconds_saved": 0.0}
+
+    # ==================== Keys ====================
+
+    def input_key(self, filing_dir: Path) -> Optional[str]:
+        """Checksum of every document extraction may read (None = no documents)"""
+        manifest = filing_store.load_manifest(filing_dir)
+        digest = hashlib.sha256(f"{EXTRACTOR_VERSION}:{text_extractor.parser_backend}".encode())
+        paths = filing_store.glob(filing_dir, "*")
+        if not paths:
+            return None
+        for path in paths:
+            digest.update(f"\n{path.name}:{self._file_checksum(path, manifest.get(path.name))}".encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _file_checksum(path: Path, entry: Optional[Dict]) -> str:
+        # The manifest checksum holds while the body is a blob or the local copy is intact
+        if entry and entry.get("valid") and entry.get("sha256"):
+            if entry.get("blob") and not path.exists():
+                return entry["sha256"]
+            try:
+                if path.stat().st_size == entry.get("size"):
+                    return entry["sha256"]
+            except FileNotFoundError:
+                pass
+        sha256 = hashlib.sha256()
+        with filing_store.open(path) as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    def _entry_key(self, key: str, codec: Optional[str] = None) -> str:
+        ext = CODEC_EXTENSIONS[codec or filing_store.codec]
+        return f"{self.version_prefix}{key[:2]}/{key}.json{ext}"
+
+    # ==================== Read / write ====================
+
+    def get(self, key: str) -> Optional[Dict]:
+        for codec in CODEC_EXTENSIONS:
+            entry_key = self._entry_key(key, codec)
+            try:
+                data = storage.get_bytes(entry_key)
+            except FileNotFoundError:
+                continue
+            if codec == "zstd":
+                import zstandard
+                data = zstandard.ZstdDecompressor().decompress(data)
+            else:
+                data = gzip.decompress(data)
+            return json.loads(data)
+        return None
+
+    def put(self, key: str, sections: Dict, parse_seconds: float):
+        payload = json.dumps({
+            "extractor_version": EXTRACTOR_VERSION,
+            "parser": text_extractor.parser_backend,
+            "parse_seconds": round(parse_seconds, 3),
+            "created_at": time.time(),
+            "sections": sections,
+        }).encode()
+        if filing_store.codec == "zstd":
+            import zstandard
+            data = zstandard.ZstdCompressor(level=filing_store.level).compress(payload)
+        else:
+            data = gzip.compress(payload, compresslevel=6)
+        storage.put_bytes(self._entry_key(key), data)
+
+    # ==================== Extraction ====================
+
+    def extract_from_filing(self, filing_dir: Path,
+                            extractor: Optional[Callable[[Path], Dict]] = None) -> Dict:
+        """
+        Same result as text_extractor.extract_from_filing(), parsed at most once per input
+
+        Args:
+            extractor: Runs the extraction on a miss (default: in this process;
+                the extraction pool passes its process-isolated runner)
+        """
+        extractor = extractor or text_extractor.extract_from_filing
+        if not self.enabled:
+            return extractor(filing_dir)
+
+        key = None
+        try:
+            if filing_store.has_filing(filing_dir):
+                key = self.input_key(filing_dir)
+            if key:
+                cached = self.get(key)
+                if cached is not None:
+                    self.stats["hits"] += 1
+                    self.stats["parse_seconds_saved"] += cached.get("parse_seconds", 0.0)
+                    logger.info(f"Extraction cache hit for {filing_dir} (v{EXTRACTOR_VERSION})")
+                    return cached["sections"]
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Extraction cache lookup failed for {filing_dir}: {e}")
+
+        self.stats["misses"] += 1
+        start = time.perf_counter()
+        sections = extractor(filing_dir)
+        parse_seconds = time.perf_counter() - start
+
+        # Errors are not cached: a missing document may still be downloaded
+        if key and 'error' not in sections:
+            try:
+                self.put(key, sections, parse_seconds)
+                self.stats["stored"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"Could not cache extraction for {filing_dir}: {e}")
+        return sections
+
+    # ==================== Maintenance ====================
+
+    def purge(self, dry_run: bool = False) -> Dict:
+        """Delete entries of other extractor versions and entries past the retention age"""
+        stats = {"removed": 0, "bytes_freed": 0}
+        cutoff = time.time() - self.retention_days * 86400 if self.retention_days else None
+        for info in list(storage.list(f"{CACHE_PREFIX}/")):
+            current = info.key.startswith(self.version_prefix)
+            if current and (cutoff is None or info.mtime >= cutoff):
+                continue
+            stats["removed"] += 1
+            stats["bytes_freed"] += info.size
+            if not dry_run:
+                storage.delete(info.key)
+        return stats
+
+    def get_stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "extractor_version": EXTRACTOR_VERSION,
+            **self.stats,
+        }
+
+
+# Create singleton instance
+extraction_cache = ExtractionCache()
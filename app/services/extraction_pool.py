@@ -0,0 +1,293 @@
+# app/services/extraction_pool.py
+"""
+Process-isolated text extraction
+
+Celery runs process_filing_task on a thread pool, and every task thread
+drives its own asyncio loop for downloads and FMP/OpenAI calls. Parsing a
+giant S-1 inline held the GIL (and that thread's loop) for seconds and a
+pathological document could exhaust the worker's memory. Extraction now
+runs in child processes:
+
+- at most EXTRACTION_POOL_WORKERS jobs run at once per worker process;
+  further jobs wait for a slot (queue depth)
+- each job is a fresh process forked from a forkserver that has the
+  extractor preloaded, with its address space capped at
+  EXTRACTION_JOB_MEMORY_MB and killed after EXTRACTION_JOB_TIMEOUT_SECONDS
+- a job that crashes or times out is retried in a new process, up to
+  EXTRACTION_JOB_MAX_ATTEMPTS; after that the filing gets an extraction
+  error instead of the worker going down
+- per-job CPU time and peak RSS are measured in the child
+
+The extraction cache is consulted first, so cached filings never start a
+process. Stats are published to Redis per worker process; cluster_stats()
+merges them for the scheduler status.
+"""
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.services.extraction_cache import extraction_cache
+from app.services.text_extractor import text_extractor
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY_PREFIX = "extraction_pool:"
+STATS_TTL_SECONDS = 300
+KILL_GRACE_SECONDS = 5
+
+
+def _extraction_job(filing_dir: str, conn, memory_limit_mb: int):
+    """Child process: extract one filing and send (status, payload, cpu_seconds, max_rss_mb)"""
+    capped = bool(memory_limit_mb and resource is not None)
+    if capped:
+        # Soft limit only, so the cap can be lifted again to report a MemoryError
+        _, hard_limit = resource.getrlimit(resource.RLIMIT_AS)
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard_limit))
+
+    try:
+        status, payload = "ok", text_extractor.extract_from_filing(Path(filing_dir))
+        if 'error' in payload:
+            # The extractor reports document problems as an error dict
+            status, payload = "error", payload['error'] or "Extraction failed"
+    except MemoryError:
+        # Still at the cap here: freeing the parse and sending the result need headroom
+        if capped:
+            resource.setrlimit(resource.RLIMIT_AS, (hard_limit, hard_limit))
+        status, payload = "memory", f"Extraction exceeded {memory_limit_mb}MB"
+    except Exception as e:
+        status, payload = "error", f"{type(e).__name__}: {e}"
+
+    cpu_seconds, max_rss_mb = 0.0, 0.0
+    if resource is not None:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        cpu_seconds = usage.ru_utime + usage.ru_stime
+        max_rss_mb = usage.ru_maxrss / 1024  # KB on Linux
+    try:
+        conn.send((status, payload, cpu_seconds, max_rss_mb))
+    except MemoryError:
+        if capped:
+            resource.setrlimit(resource.RLIMIT_AS, (hard_limit, hard_limit))
+        conn.send(("memory", f"Extraction result exceeded {memory_limit_mb}MB", cpu_seconds, max_rss_mb))
+    finally:
+        conn.close()
+
+
+class ExtractionPool:
+    """Runs TextExtractor jobs in capped, crash-isolated child processes"""
+
+    def __init__(self):
+        self.enabled = settings.EXTRACTION_POOL_ENABLED
+        self.max_workers = max(1, settings.EXTRACTION_POOL_WORKERS)
+        self.timeout = settings.EXTRACTION_JOB_TIMEOUT_SECONDS
+        self.memory_limit_mb = settings.EXTRACTION_JOB_MEMORY_MB
+        self.max_attempts = max(1, settings.EXTRACTION_JOB_MAX_ATTEMPTS)
+
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+        self._lock = threading.Lock()
+        self._context = None
+        self.waiting = 0
+        self.running = 0
+        self.stats = {
+            "jobs": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "retries": 0,
+            "timeouts": 0,
+            "crashes": 0,
+            "memory_errors": 0,
+            "cpu_seconds_total": 0.0,
+            "cpu_seconds_max": 0.0,
+        }
+        self.recent_jobs = deque(maxlen=20)
+        self.stats_key = f"{STATS_KEY_PREFIX}{socket.gethostname()}:{os.getpid()}"
+
+    def _get_context(self):
+        if self._context is None:
+            methods = multiprocessing.get_all_start_methods()
+            self._context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            if self._context.get_start_method() == "forkserver":
+                # Children fork with this module (extractor, bs4, lxml, settings) already imported
+                self._context.set_forkserver_preload([__name__])
+        return self._context
+
+    # ==================== Running jobs ====================
+
+    def _run_once(self, filing_dir: Path) -> Tuple[str, object, float, float]:
+        """One attempt in a fresh process: (status, payload, cpu_seconds, max_rss_mb)"""
+        ctx = self._get_context()
+        recv_conn, send_conn = ctx.Pipe(duplex=False)
+        process = ctx.Process(
+            target=_extraction_job,
+            args=(str(filing_dir), send_conn, self.memory_limit_mb),
+            name=f"extract-{filing_dir.name}",
+            daemon=True,
+        )
+        start = time.monotonic()
+        process.start()
+        send_conn.close()
+        try:
+            if recv_conn.poll(self.timeout):
+                try:
+                    return recv_conn.recv()
+                except EOFError:
+                    pass  # Died before sending a result
+            else:
+                process.kill()
+                # No report from the child: wall time stands in for CPU time
+                return "timeout", f"Extraction timed out after {self.timeout}s", time.monotonic() - start, 0.0
+        finally:
+            recv_conn.close()
+            process.join(KILL_GRACE_SECONDS)
+            if process.is_alive():
+                process.kill()
+                process.join()
+        return "crash", f"Extraction process died (exit code {process.exitcode})", time.monotonic() - start, 0.0
+
+    def run(self, filing_dir: Path) -> Dict:
+        """
+        Extract a filing in a child process (blocking; call from a thread)
+
+        Returns TextExtractor's sections, or an error dict shaped like
+        extract_from_filing()'s own when every attempt failed.
+        """
+        with self._lock:
+            self.waiting += 1
+        self._publish_stats()
+        self._slots.acquire()
+        with self._lock:
+            self.waiting -= 1
+            self.running += 1
+        try:
+            return self._run_attempts(filing_dir)
+        finally:
+            self._slots.release()
+            with self._lock:
+                self.running -= 1
+            self._publish_stats()
+
+    def _run_attempts(self, filing_dir: Path) -> Dict:
+        attempts: List[Dict] = []
+        started = time.monotonic()
+        status, payload = "error", None
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                status, payload, cpu_seconds, max_rss_mb = self._run_once(filing_dir)
+            except OSError as e:
+                # Could not start a process at all - extraction still has to happen
+                logger.error(f"Cannot start extraction process ({e}), extracting in-process")
+                return text_extractor.extract_from_filing(filing_dir)
+
+            attempts.append({"status": status, "cpu_seconds": round(cpu_seconds, 3),
+                             "max_rss_mb": round(max_rss_mb, 1)})
+            with self._lock:
+                self.stats["cpu_seconds_total"] += cpu_seconds
+                self.stats["cpu_seconds_max"] = max(self.stats["cpu_seconds_max"], cpu_seconds)
+                if status == "timeout":
+                    self.stats["timeouts"] += 1
+                elif status == "crash":
+                    self.stats["crashes"] += 1
+                elif status == "memory":
+                    self.stats["memory_errors"] += 1
+
+            # Only failures of the process itself are worth another process
+            if status not in ("timeout", "crash") or attempt == self.max_attempts:
+                break
+            with self._lock:
+                self.stats["retries"] += 1
+            logger.warning(f"Extraction of {filing_dir} {status} (attempt {attempt}/{self.max_attempts}): "
+                           f"{payload} - retrying in a new process")
+
+        succeeded = status == "ok"
+        with self._lock:
+            self.stats["jobs"] += 1
+            self.stats["succeeded" if succeeded else "failed"] += 1
+            self.recent_jobs.append({
+                "filing": filing_dir.name,
+                "status": status,
+                "attempts": attempts,
+                "wall_seconds": round(time.monotonic() - started, 3),
+                "finished_at": time.time(),
+            })
+        logger.info(f"Extraction of {filing_dir.name}: {status}, "
+                    f"cpu {sum(a['cpu_seconds'] for a in attempts):.2f}s, {len(attempts)} attempt(s)")
+
+        if succeeded:
+            return payload
+        logger.error(f"Extraction of {filing_dir} failed: {payload}")
+        return {
+            'error': payload,
+            'full_text': '',
+            'primary_content': '',
+            'enhanced_text': '',
+            'filing_type': 'UNKNOWN'
+        }
+
+    async def extract_from_filing(self, filing_dir: Path) -> Dict:
+        """Cached extraction without blocking the calling event loop"""
+        extractor = self.run if self.enabled else None
+        return await asyncio.to_thread(extraction_cache.extract_from_filing, filing_dir, extractor)
+
+    # ==================== Stats ====================
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "max_workers": self.max_workers,
+                "queue_depth": self.waiting,
+                "running": self.running,
+                "timeout_seconds": self.timeout,
+                "memory_limit_mb": self.memory_limit_mb,
+                **self.stats,
+                "recent_jobs": list(self.recent_jobs)[-5:],
+            }
+
+    def _publish_stats(self):
+        try:
+            cache.redis_client.setex(self.stats_key, STATS_TTL_SECONDS, json.dumps(self.get_stats()))
+        except Exception as e:
+            logger.debug(f"Could not publish extraction pool stats: {e}")
+
+    @staticmethod
+    def cluster_stats() -> Dict:
+        """Queue depth and job totals across every worker process that ran jobs recently"""
+        totals = {"workers": 0, "queue_depth": 0, "running": 0, "jobs": 0, "failed": 0,
+                  "timeouts": 0, "crashes": 0, "memory_errors": 0, "cpu_seconds_total": 0.0,
+                  "cpu_seconds_max": 0.0}
+        try:
+            for key in cache.redis_client.scan_iter(f"{STATS_KEY_PREFIX}*"):
+                raw = cache.redis_client.get(key)
+                if not raw:
+                    continue
+                stats = json.loads(raw)
+                totals["workers"] += 1
+                for field in totals:
+                    if field == "cpu_seconds_max":
+                        totals[field] = max(totals[field], stats.get(field, 0.0))
+                    elif field != "workers":
+                        totals[field] += stats.get(field, 0)
+        except Exception as e:
+            logger.debug(f"Could not read extraction pool stats: {e}")
+            return {"error": str(e)}
+        totals["cpu_seconds_total"] = round(totals["cpu_seconds_total"], 3)
+        return totals
+
+
+# Create singleton instance
+extraction_pool = ExtractionPool()
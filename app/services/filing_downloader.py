@@ -1,15 +1,24 @@
 import httpx
 import asyncio
+import hashlib
+import os
 import re
+import resource
+import sys
 from pathlib import Path
 from datetime import datetime
 from bs4 import BeautifulSoup
 import logging
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 from urllib.parse import urlparse, parse_qs, unquote
 from sqlalchemy.orm import Session
 
 from app.models.filing import Filing, ProcessingStatus, FilingType
+from app.core.config import settings
+from app.core.rate_limiter import sec_rate_limiter
+from app.services.sec_http import sec_http_client
+from app.services.download_manifest import DownloadManifest
+from app.services.filing_store import filing_store
 
 logger = logging.getLogger(__name__)
 
@@ -31,32 +40,39 @@ class FilingDownloader:
     """
     
     def __init__(self):
-        self.base_url = "https://www.sec.gov/Archives/edgar/data"
+        self.base_url = settings.SEC_ARCHIVE_URL
         self.headers = {
             'User-Agent': 'AllSight/1.0 (chengsh@bu.edu)',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
             'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
         }
-        self.rate_limit_delay = 0.1  # SEC rate limit
-        self.last_request_time = datetime.now()
+        # SEC rate limit - shared with SECClient and all other workers
+        self.rate_limiter = sec_rate_limiter
         self.data_dir = Path("data/filings")
         self.data_dir.mkdir(parents=True, exist_ok=True)
         
         # 附件处理配置
         self.max_exhibit_file_size = 50 * 1024 * 1024  # 50MB limit per exhibit
+        # 主文档大小上限（按表单类型，流式下载超出即中止）
+        self.max_document_size_mb = {
+            FilingType.FORM_S1.value: 150,
+            FilingType.FORM_10K.value: 100,
+            FilingType.FORM_10Q.value: 60,
+            FilingType.FORM_8K.value: 30,
+        }
+        self.stream_chunk_size = 64 * 1024
         self.max_exhibits_per_filing = 20  # Maximum exhibits to download per filing
+        self.exhibit_concurrency = settings.SEC_EXHIBIT_CONCURRENCY
+        self.exhibit_early_start = settings.SEC_EXHIBIT_EARLY_START
+        self._pending_exhibits: Dict[str, List[asyncio.Task]] = {}
+        
+        # 流量统计（与峰值 RSS 一起按 filing 记录日志）
+        self._bytes_streamed = 0
     
     async def _rate_limit(self):
-        """Respect SEC rate limits"""
-        now = datetime.now()
-        time_since_last = (now - self.last_request_time).total_seconds()
-        
-        if time_since_last < self.rate_limit_delay:
-            await asyncio.sleep(self.rate_limit_delay - time_since_last)
-        
-        self.last_request_time = datetime.now()
+        """Respect SEC rate limits (process-wide shared budget)"""
+        await self.rate_limiter.acquire()
     
     def _get_filing_directory(self, filing: Filing) -> Path:
         """Get the local directory path for storing filing files"""
@@ -525,12 +541,16 @@ class FilingDownloader:
         logger.info(f"Found {len(exhibit_99_files)} Exhibit 99 file(s) (backward compatibility)")
         return exhibit_99_files
     
-    def _validate_document_content(self, content: bytes, filing_type: str) -> bool:
+    def _validate_document_content(self, content: bytes, filing_type: str, size: Optional[int] = None) -> bool:
         """
         Validate that downloaded content is a real document
+        
+        Args:
+            content: Document bytes (streamed downloads pass only the head)
+            size: Full size in bytes when content is only the head
         """
         # Size check
-        size_kb = len(content) / 1024
+        size_kb = (size if size is not None else len(content)) / 1024
         if size_kb < 10:
             logger.warning(f"Document suspiciously small: {size_kb:.1f}KB")
         
@@ -585,18 +605,18 @@ class FilingDownloader:
             logger.error(f"Error validating content: {e}")
             return size_kb > 20
     
-    def _validate_exhibit_size(self, exhibit: Dict, content: bytes) -> bool:
+    def _validate_exhibit_size(self, exhibit: Dict, size: int) -> bool:
         """
         验证附件文件大小是否在合理范围内
         
         Args:
             exhibit: 附件信息字典
-            content: 文件内容
+            size: 文件大小（字节）
             
         Returns:
             bool: 是否通过大小验证
         """
-        size_mb = len(content) / (1024 * 1024)
+        size_mb = size / (1024 * 1024)
         max_size_mb = exhibit.get('max_size_mb', 50)
         
         if size_mb > max_size_mb:
@@ -609,6 +629,66 @@ class FilingDownloader:
         
         return True
     
+    async def _stream_to_file(self, client: httpx.AsyncClient, url: str, dest: Path,
+                              max_bytes: int, timeout: float = 60.0) -> Tuple[int, int, bytes, Optional[str]]:
+        """
+        流式下载到临时文件，超过大小上限立即中止
+        
+        The body is never held in memory: chunks go straight to `<dest>.part`,
+        which is renamed to dest only when the download completes under the
+        cap. A Content-Length above the cap skips the body entirely. (With
+        gzip the header is the compressed size, so it can only prove a file
+        too large, never small enough.)
+        
+        Returns:
+            (status_code, size_in_bytes, head, sha256) - size is -1 if the cap
+            was exceeded; head is the first bytes of the body, for validation
+        """
+        tmp_path = dest.with_name(dest.name + ".part")
+        size = 0
+        head = b""
+        digest = hashlib.sha256()
+        
+        async with client.stream("GET", url, headers=self.headers, timeout=timeout) as response:
+            if response.status_code != 200:
+                return response.status_code, 0, b"", None
+            
+            content_length = response.headers.get("Content-Length")
+            if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+                logger.warning(f"Skipping {dest.name}: Content-Length {int(content_length)/(1024*1024):.1f}MB "
+                               f"exceeds {max_bytes/(1024*1024):.0f}MB cap")
+                return response.status_code, -1, b"", None
+            
+            try:
+                with open(tmp_path, 'wb') as f:
+                    async for chunk in response.aiter_bytes(self.stream_chunk_size):
+                        size += len(chunk)
+                        if size > max_bytes:
+                            logger.warning(f"Aborted {dest.name}: exceeded {max_bytes/(1024*1024):.0f}MB cap")
+                            break
+                        if len(head) < 5000:
+                            head += chunk[:5000 - len(head)]
+                        digest.update(chunk)
+                        f.write(chunk)
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
+        
+        if size > max_bytes:
+            tmp_path.unlink(missing_ok=True)
+            return 200, -1, b"", None
+        
+        os.replace(tmp_path, dest)
+        self._bytes_streamed += size
+        return 200, size, head, digest.hexdigest()
+    
+    @staticmethod
+    def _peak_rss_mb() -> float:
+        """Peak resident set size of this process so far"""
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is KB on Linux, bytes on macOS
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    
     async def _try_alternative_patterns(self, client: httpx.AsyncClient, filing: Filing) -> Optional[Dict]:
         """
         Try common filename patterns when index parsing fails
@@ -675,7 +755,86 @@ class FilingDownloader:
         
         return None
     
-    async def download_filing(self, db: Session, filing: Filing) -> bool:
+    async def _download_exhibit(self, client: httpx.AsyncClient, exhibit: Dict, successful_url: str,
+                                filing_dir: Path, semaphore: asyncio.Semaphore,
+                                manifest: DownloadManifest) -> bool:
+        """
+        下载单个附件（并发执行，受共享 SEC 限流器约束）
+        已在 manifest 中校验通过的附件直接复用
+        
+        Returns:
+            bool: 是否下载并保存成功
+        """
+        # Blob checks and uploads hit object storage: keep them off the event loop
+        if await asyncio.to_thread(manifest.is_settled, exhibit['filename']):
+            logger.info(f"♻️  Reusing {exhibit['filename']} from previous download")
+            return bool(manifest.get(exhibit['filename']).get('valid'))
+        
+        async with semaphore:
+            try:
+                exhibit_url = exhibit['url']
+                if not exhibit_url.startswith('http'):
+                    if exhibit_url.startswith('/'):
+                        exhibit_url = f"{settings.SEC_BASE_URL}{exhibit_url}"
+                    else:
+                        base_url_parts = successful_url.rsplit('/', 1)[0]
+                        exhibit_url = f"{base_url_parts}/{exhibit_url}"
+                
+                logger.info(f"Downloading {exhibit['type']} ({exhibit['category']}): {exhibit['filename']}")
+                
+                await self._rate_limit()
+                exhibit_path = filing_dir / exhibit['filename']
+                max_bytes = exhibit.get('max_size_mb', 50) * 1024 * 1024
+                status_code, size, _, sha256 = await self._stream_to_file(client, exhibit_url, exhibit_path, max_bytes)
+                
+                if status_code != 200:
+                    logger.warning(f"❌ Failed to download {exhibit['filename']}: HTTP {status_code}")
+                    return False
+                
+                # 验证文件大小（超限的已在流式下载中中止）
+                if size < 0 or not self._validate_exhibit_size(exhibit, size):
+                    logger.warning(f"❌ Skipped {exhibit['filename']} - size validation failed")
+                    exhibit_path.unlink(missing_ok=True)
+                    manifest.record(exhibit['filename'], exhibit_url, max(size, 0), None, valid=False,
+                                    kind="exhibit", reason="too_large" if size < 0 else "validation_failed")
+                    return False
+                
+                manifest.record(exhibit['filename'], exhibit_url, size, sha256, valid=True, kind="exhibit")
+                await asyncio.to_thread(filing_store.store_file, filing_dir, exhibit['filename'], manifest)
+                
+                size_mb = size / (1024 * 1024)
+                logger.info(f"✅ Successfully downloaded {exhibit['filename']} ({size_mb:.1f}MB)")
+                return True
+                
+            except Exception as e:
+                # 单个附件失败不影响整体处理
+                logger.error(f"❌ Error downloading exhibit {exhibit['filename']}: {e}")
+                return False
+    
+    async def _log_exhibit_summary(self, exhibit_tasks: List[asyncio.Task]):
+        """等待附件任务完成并记录汇总"""
+        results = await asyncio.gather(*exhibit_tasks, return_exceptions=True)
+        successful_downloads = sum(1 for r in results if r is True)
+        failed_downloads = len(results) - successful_downloads
+        
+        logger.info(f"📊 Exhibit download summary: "
+                   f"{successful_downloads} successful, {failed_downloads} failed")
+        
+        # 如果有附件成功下载，记录到日志
+        if successful_downloads > 0:
+            logger.info(f"🎉 Enhanced 8-K processing completed with {successful_downloads} exhibits")
+    
+    async def wait_for_exhibits(self, filing: Filing):
+        """
+        等待 early_start 模式下仍在后台下载的附件
+        Must run on the same event loop that called download_filing
+        """
+        pending = self._pending_exhibits.pop(filing.accession_number, None)
+        if pending:
+            await self._log_exhibit_summary(pending)
+            await asyncio.to_thread(filing_store.publish_manifest, self._get_filing_directory(filing))
+    
+    async def download_filing(self, db: Session, filing: Filing, early_start: Optional[bool] = None) -> bool:
         """
         ENHANCED: 主下载方法，支持完整附件处理
         
@@ -684,7 +843,16 @@ class FilingDownloader:
         2. 为8-K添加完整附件处理（99 + 10.x系列）
         3. 智能优先级和容错机制
         4. 性能优化和大小限制
+        5. 附件并发下载（优先级顺序，共享限流器）
+        
+        Args:
+            early_start: Return as soon as the main document and the highest-priority
+                exhibit are on disk; remaining exhibits keep downloading and are
+                awaited with wait_for_exhibits(). Defaults to SEC_EXHIBIT_EARLY_START.
         """
+        rss_before = self._peak_rss_mb()
+        bytes_before = self._bytes_streamed
+        
         try:
             # Update status
             filing.status = ProcessingStatus.DOWNLOADING
@@ -698,188 +866,191 @@ class FilingDownloader:
             filing_dir = self._get_filing_directory(filing)
             filing_dir.mkdir(parents=True, exist_ok=True)
             
-            async with httpx.AsyncClient(headers=self.headers, timeout=30.0) as client:
-                # ========================= Phase 1: 下载索引页面 =========================
+            client = sec_http_client.get_client()
+            
+            # Files verified by an earlier attempt are reused, not re-fetched
+            manifest = await asyncio.to_thread(filing_store.load_manifest, filing_dir, True)
+            
+            # ========================= Phase 1: 下载索引页面 =========================
+            urls_to_try = []
+            
+            # Most common format
+            cik_no_zeros = filing.company.cik.lstrip('0')
+            urls_to_try.append(f"{self.base_url}/{cik_no_zeros}/{filing.accession_number}/-index.htm")
+            
+            # With padded CIK
+            cik_padded = filing.company.cik.zfill(10)
+            urls_to_try.append(f"{self.base_url}/{cik_padded}/{filing.accession_number}/-index.htm")
+            
+            # Without dashes in accession
+            acc_no_clean = filing.accession_number.replace("-", "")
+            urls_to_try.append(f"{self.base_url}/{cik_no_zeros}/{acc_no_clean}/-index.htm")
+            
+            index_content = None
+            successful_url = None
+            index_path = filing_dir / "index.htm"
+            
+            if manifest.is_verified("index.htm"):
+                index_content = await asyncio.to_thread(filing_store.read_bytes, index_path)
+                successful_url = manifest.get("index.htm")["url"]
                 urls_to_try = []
+                logger.info(f"♻️  Reusing index page from previous download ({successful_url})")
+            
+            for url in urls_to_try:
+                try:
+                    logger.debug(f"Trying index URL: {url}")
+                    await self._rate_limit()
+                    response = await client.get(url, headers=self.headers)
+                    
+                    if response.status_code == 200:
+                        index_content = response.content
+                        successful_url = url
+                        logger.info(f"Successfully fetched index from: {url}")
+                        break
+                except Exception as e:
+                    logger.debug(f"Failed to fetch from {url}: {e}")
+                    continue
+            
+            if not index_content:
+                raise Exception(f"Failed to fetch index page - tried {len(urls_to_try)} URL formats")
+            
+            # Save index.htm
+            if urls_to_try:
+                with open(index_path, 'wb') as f:
+                    f.write(index_content)
+                manifest.record("index.htm", successful_url, len(index_content),
+                                hashlib.sha256(index_content).hexdigest(), valid=True, kind="index")
+                await asyncio.to_thread(filing_store.store_file, filing_dir, "index.htm", manifest)
+            
+            # ========================= Phase 2: 下载主文档 =========================
+            index_text = index_content.decode('utf-8', errors='ignore')
+            main_doc = self._parse_index_enhanced(index_text, filing.filing_type.value)
+            
+            if not main_doc:
+                logger.warning("Could not find main document in index, trying alternative patterns")
+                main_doc = await self._try_alternative_patterns(client, filing)
+            
+            if main_doc:
+                # Download the main document
+                doc_url = main_doc['url']
                 
-                # Most common format
-                cik_no_zeros = filing.company.cik.lstrip('0')
-                urls_to_try.append(f"{self.base_url}/{cik_no_zeros}/{filing.accession_number}/-index.htm")
-                
-                # With padded CIK
-                cik_padded = filing.company.cik.zfill(10)
-                urls_to_try.append(f"{self.base_url}/{cik_padded}/{filing.accession_number}/-index.htm")
-                
-                # Without dashes in accession
-                acc_no_clean = filing.accession_number.replace("-", "")
-                urls_to_try.append(f"{self.base_url}/{cik_no_zeros}/{acc_no_clean}/-index.htm")
-                
-                index_content = None
-                successful_url = None
-                
-                for url in urls_to_try:
-                    try:
-                        logger.debug(f"Trying index URL: {url}")
-                        await self._rate_limit()
-                        response = await client.get(url)
-                        
-                        if response.status_code == 200:
-                            index_content = response.content
-                            successful_url = url
-                            logger.info(f"Successfully fetched index from: {url}")
-                            break
-                    except Exception as e:
-                        logger.debug(f"Failed to fetch from {url}: {e}")
-                        continue
+                # Handle relative URLs
+                if not doc_url.startswith('http'):
+                    base_url_parts = successful_url.rsplit('/', 1)[0]
+                    
+                    if doc_url.startswith('/'):
+                        doc_url = f"{settings.SEC_BASE_URL}{doc_url}"
+                    else:
+                        doc_url = f"{base_url_parts}/{doc_url}"
                 
-                if not index_content:
-                    raise Exception(f"Failed to fetch index page - tried {len(urls_to_try)} URL formats")
+                logger.info(f"Downloading main document from: {doc_url}")
                 
-                # Save index.htm
-                index_path = filing_dir / "index.htm"
-                with open(index_path, 'wb') as f:
-                    f.write(index_content)
+                filename = main_doc['filename']
+                if not filename.endswith(('.htm', '.html', '.txt')):
+                    filename = f"{filing.filing_type.value.lower()}.htm"
+                doc_path = filing_dir / filename
+                max_doc_bytes = self.max_document_size_mb.get(filing.filing_type.value, 100) * 1024 * 1024
                 
-                # ========================= Phase 2: 下载主文档 =========================
-                index_text = index_content.decode('utf-8', errors='ignore')
-                main_doc = self._parse_index_enhanced(index_text, filing.filing_type.value)
+                if manifest.is_verified(filename):
+                    logger.info(f"♻️  Reusing {filename} from previous download")
+                    status_code, doc_size, doc_head, doc_sha256 = 200, manifest.get(filename)["size"], None, None
+                else:
+                    await self._rate_limit()
+                    status_code, doc_size, doc_head, doc_sha256 = await self._stream_to_file(
+                        client, doc_url, doc_path, max_doc_bytes
+                    )
                 
-                if not main_doc:
-                    logger.warning("Could not find main document in index, trying alternative patterns")
-                    main_doc = await self._try_alternative_patterns(client, filing)
+                if status_code == 200 and doc_size < 0:
+                    manifest.record(filename, doc_url, 0, None, valid=False, kind="main", reason="too_large")
+                    raise Exception(f"Main document exceeds {max_doc_bytes // (1024 * 1024)}MB cap")
                 
-                if main_doc:
-                    # Download the main document
-                    doc_url = main_doc['url']
-                    
-                    # Handle relative URLs
-                    if not doc_url.startswith('http'):
-                        base_url_parts = successful_url.rsplit('/', 1)[0]
+                if status_code == 200:
+                    # Validate content (a reused file was validated when it was fetched)
+                    if doc_head is None or self._validate_document_content(doc_head, filing.filing_type.value, size=doc_size):
+                        if doc_head is not None:
+                            manifest.record(filename, doc_url, doc_size, doc_sha256, valid=True, kind="main")
+                            await asyncio.to_thread(filing_store.store_file, filing_dir, filename, manifest)
+                            logger.info(f"✅ Successfully downloaded {filename} "
+                                       f"({doc_size/1024:.1f}KB)")
                         
-                        if doc_url.startswith('/'):
-                            doc_url = f"https://www.sec.gov{doc_url}"
-                        else:
-                            doc_url = f"{base_url_parts}/{doc_url}"
-                    
-                    logger.info(f"Downloading main document from: {doc_url}")
-                    
-                    await self._rate_limit()
-                    doc_response = await client.get(doc_url, timeout=60.0)
-                    
-                    if doc_response.status_code == 200:
-                        doc_content = doc_response.content
+                        # Set both URL fields for compatibility
+                        filing.primary_doc_url = doc_url
+                        filing.primary_document_url = doc_url
                         
-                        # Validate content
-                        if self._validate_document_content(doc_content, filing.filing_type.value):
-                            # Save the document
-                            filename = main_doc['filename']
-                            if not filename.endswith(('.htm', '.html', '.txt')):
-                                filename = f"{filing.filing_type.value.lower()}.htm"
-                            
-                            doc_path = filing_dir / filename
-                            with open(doc_path, 'wb') as f:
-                                f.write(doc_content)
-                            
-                            logger.info(f"✅ Successfully downloaded {filename} "
-                                       f"({len(doc_content)/1024:.1f}KB)")
-                            
-                            # Set both URL fields for compatibility
-                            filing.primary_doc_url = doc_url
-                            filing.primary_document_url = doc_url
-                            
-                            # Commit the URL updates
-                            db.commit()
-                        else:
-                            logger.error("Downloaded content failed validation")
-                            # For S-1, try harder to find the right document
-                            if filing.filing_type == FilingType.FORM_S1:
-                                logger.info("Attempting alternative S-1 document search")
-                                main_doc = await self._try_alternative_patterns(client, filing)
-                                if main_doc:
-                                    # Retry download with new document
-                                    # (recursive call limited to once)
-                                    pass
-                            raise Exception("Invalid document content")
+                        # Commit the URL updates
+                        db.commit()
                     else:
-                        raise Exception(f"Failed to download document: HTTP {doc_response.status_code}")
+                        logger.error("Downloaded content failed validation")
+                        doc_path.unlink(missing_ok=True)
+                        manifest.record(filename, doc_url, doc_size, doc_sha256, valid=False,
+                                        kind="main", reason="validation_failed")
+                        # For S-1, try harder to find the right document
+                        if filing.filing_type == FilingType.FORM_S1:
+                            logger.info("Attempting alternative S-1 document search")
+                            main_doc = await self._try_alternative_patterns(client, filing)
+                            if main_doc:
+                                # Retry download with new document
+                                # (recursive call limited to once)
+                                pass
+                        raise Exception("Invalid document content")
                 else:
-                    logger.warning("Could not find main document in any format")
-                    # Don't fail completely - we still have the index
+                    raise Exception(f"Failed to download document: HTTP {status_code}")
+            else:
+                logger.warning("Could not find main document in any format")
+                # Don't fail completely - we still have the index
+            
+            # ========================= Phase 3: 下载重要附件 =========================
+            if filing.filing_type == FilingType.FORM_8K:
+                logger.info("This is an 8-K filing, checking for important exhibits...")
+                
+                # 使用增强的附件解析方法
+                important_exhibits = self._parse_important_exhibits(index_text)
                 
-                # ========================= Phase 3: 下载重要附件 =========================
-                if filing.filing_type == FilingType.FORM_8K:
-                    logger.info("This is an 8-K filing, checking for important exhibits...")
+                if important_exhibits:
+                    logger.info(f"Found {len(important_exhibits)} important exhibit(s) to download:")
                     
-                    # 使用增强的附件解析方法
-                    important_exhibits = self._parse_important_exhibits(index_text)
+                    # 显示发现的附件信息
+                    for exhibit in important_exhibits:
+                        logger.info(f"  - {exhibit['type']}: {exhibit['filename']} "
+                                   f"(Priority: {exhibit['priority']}, Max: {exhibit['max_size_mb']}MB)")
                     
-                    if important_exhibits:
-                        logger.info(f"Found {len(important_exhibits)} important exhibit(s) to download:")
-                        
-                        # 显示发现的附件信息
-                        for exhibit in important_exhibits:
-                            logger.info(f"  - {exhibit['type']}: {exhibit['filename']} "
-                                       f"(Priority: {exhibit['priority']}, Max: {exhibit['max_size_mb']}MB)")
-                        
-                        successful_downloads = 0
-                        failed_downloads = 0
-                        
-                        for exhibit in important_exhibits:
-                            try:
-                                exhibit_url = exhibit['url']
-                                if not exhibit_url.startswith('http'):
-                                    if exhibit_url.startswith('/'):
-                                        exhibit_url = f"https://www.sec.gov{exhibit_url}"
-                                    else:
-                                        base_url_parts = successful_url.rsplit('/', 1)[0]
-                                        exhibit_url = f"{base_url_parts}/{exhibit_url}"
-                                
-                                logger.info(f"Downloading {exhibit['type']} ({exhibit['category']}): {exhibit['filename']}")
-                                
-                                await self._rate_limit()
-                                exhibit_response = await client.get(exhibit_url, timeout=60.0)
-                                
-                                if exhibit_response.status_code == 200:
-                                    exhibit_content = exhibit_response.content
-                                    
-                                    # 验证文件大小
-                                    if self._validate_exhibit_size(exhibit, exhibit_content):
-                                        exhibit_path = filing_dir / exhibit['filename']
-                                        with open(exhibit_path, 'wb') as f:
-                                            f.write(exhibit_content)
-                                        
-                                        size_mb = len(exhibit_content) / (1024 * 1024)
-                                        logger.info(f"✅ Successfully downloaded {exhibit['filename']} "
-                                                   f"({size_mb:.1f}MB)")
-                                        successful_downloads += 1
-                                    else:
-                                        logger.warning(f"❌ Skipped {exhibit['filename']} - size validation failed")
-                                        failed_downloads += 1
-                                else:
-                                    logger.warning(f"❌ Failed to download {exhibit['filename']}: "
-                                                  f"HTTP {exhibit_response.status_code}")
-                                    failed_downloads += 1
-                                    
-                            except Exception as e:
-                                logger.error(f"❌ Error downloading exhibit {exhibit['filename']}: {e}")
-                                failed_downloads += 1
-                                # 单个附件失败不影响整体处理，继续下载其他附件
-                                continue
-                        
-                        logger.info(f"📊 Exhibit download summary: "
-                                   f"{successful_downloads} successful, {failed_downloads} failed")
-                        
-                        # 如果有附件成功下载，记录到日志
-                        if successful_downloads > 0:
-                            logger.info(f"🎉 Enhanced 8-K processing completed with {successful_downloads} exhibits")
-                
-                # Update status to PARSING
-                filing.status = ProcessingStatus.PARSING
-                db.commit()
-                
-                logger.info(f"🎯 Successfully completed enhanced download for {filing.accession_number}")
-                return True
+                    # 并发下载：按优先级顺序创建任务，限流器按请求顺序分配配额
+                    semaphore = asyncio.Semaphore(self.exhibit_concurrency)
+                    exhibit_tasks = [
+                        asyncio.create_task(
+                            self._download_exhibit(client, exhibit, successful_url, filing_dir, semaphore, manifest)
+                        )
+                        for exhibit in important_exhibits
+                    ]
+                    
+                    if early_start is None:
+                        early_start = self.exhibit_early_start
                     
+                    if early_start:
+                        # Extraction only needs the highest-priority exhibit (EX-99 press release) to start
+                        await asyncio.wait([exhibit_tasks[0]])
+                        pending = [t for t in exhibit_tasks if not t.done()]
+                        if pending:
+                            self._pending_exhibits[filing.accession_number] = pending
+                            logger.info(f"Critical exhibit ready - {len(pending)} exhibit(s) still downloading")
+                    else:
+                        await self._log_exhibit_summary(exhibit_tasks)
+            
+            # Other workers find this filing through the published manifest
+            await asyncio.to_thread(filing_store.publish_manifest, filing_dir)
+            
+            # Update status to PARSING
+            filing.status = ProcessingStatus.PARSING
+            db.commit()
+            
+            # Peak RSS is the process high-water mark; growth is what this filing added to it
+            peak_rss_mb = self._peak_rss_mb()
+            logger.info(f"🎯 Successfully completed enhanced download for {filing.accession_number} "
+                       f"({(self._bytes_streamed - bytes_before)/(1024*1024):.1f}MB streamed, "
+                       f"{manifest.reused} file(s) reused, "
+                       f"peak RSS {peak_rss_mb:.0f}MB, +{peak_rss_mb - rss_before:.1f}MB)")
+            return True
+                
         except Exception as e:
             logger.error(f"Error downloading filing {filing.accession_number}: {e}")
             
@@ -894,7 +1065,7 @@ class FilingDownloader:
         """Get the path to the downloaded filing document"""
         filing_dir = self._get_filing_directory(filing)
         
-        if not filing_dir.exists():
+        if not filing_store.has_filing(filing_dir):
             return None
         
         # For S-1, prioritize certain filenames
@@ -908,7 +1079,7 @@ class FilingDownloader:
             ]
             
             for pattern in priority_patterns:
-                files = list(filing_dir.glob(pattern))
+                files = filing_store.glob(filing_dir, pattern)
                 # Exclude fee tables
                 files = [f for f in files if not self._is_fee_calculation_table(f.name)]
                 if files:
@@ -916,16 +1087,16 @@ class FilingDownloader:
         
         # Generic search for main document
         for pattern in ['*.htm', '*.html', '*.txt']:
-            files = list(filing_dir.glob(pattern))
+            files = filing_store.glob(filing_dir, pattern)
             # Exclude index and exhibits
             files = [f for f in files if f.name != 'index.htm' and not re.search(r'ex-?\d+|kex\d+', f.name, re.I)]
             if files:
                 # Return the largest file
-                return max(files, key=lambda f: f.stat().st_size)
+                return max(files, key=filing_store.size)
         
         # Fallback to index.htm
         index_path = filing_dir / 'index.htm'
-        if index_path.exists():
+        if filing_store.exists(index_path):
             return index_path
         
         return None
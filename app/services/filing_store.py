@@ -0,0 +1,469 @@
+# app/services/filing_store.py
+"""
+Content-addressed, compressed storage for downloaded filing documents
+
+Each filing keeps its directory under data/filings/{cik}/{acc}/, but in
+"blob" mode that directory only holds manifest.json: every document body
+is stored once under blobs/{sha[:2]}/{sha}.zst, keyed by the sha256 of the
+raw content. The same exhibit downloaded under different names, or by
+different filings, is stored once.
+
+Objects (manifests, blobs, and raw files in "raw" mode) go through the
+configured storage backend (app.core.storage). With the default local
+backend they sit where they always have (data/filings, data/blobs); with
+S3 the local data/filings directory is only a working copy and any worker
+can read a filing another worker downloaded.
+
+Readers (TextExtractor, the pipeline checks, get_filing_path) go through
+glob()/read_text()/read_bytes()/size(), which look at local files first
+and then at manifest entries, so raw legacy directories and blob-backed
+ones read the same way.
+
+zstd requires the 'zstandard' package; without it blobs are gzip
+compressed (stdlib) and still readable once zstandard is installed.
+
+Retention: blobs of filings older than FILING_STORE_ARCHIVE_AFTER_DAYS are
+recompressed at a high zstd level, filings older than
+FILING_STORE_RETENTION_DAYS (0 = keep forever) are deleted, and gc()
+removes blobs no manifest references any more.
+"""
+import fnmatch
+import gzip
+import importlib.util
+import io
+import logging
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.storage import ObjectInfo, storage
+from app.services.download_manifest import DownloadManifest, MANIFEST_FILENAME, sha256_file
+
+logger = logging.getLogger(__name__)
+
+CODEC_EXTENSIONS = {"zstd": ".zst", "gzip": ".gz"}
+BLOB_PREFIX = "blobs"
+FILINGS_PREFIX = "filings"
+
+
+class FilingStore:
+    """Blob store plus manifest-aware readers for filing directories"""
+
+    def __init__(self):
+        self.mode = settings.FILING_STORE_MODE  # "blob" or "raw"
+        self.storage = storage
+        self.filings_dir = Path("data/filings")  # Local working copy (what the downloader writes)
+        self.tmp_dir = Path("data/tmp")
+        self.level = settings.FILING_STORE_ZSTD_LEVEL
+        self.archive_level = settings.FILING_STORE_ARCHIVE_ZSTD_LEVEL
+        self.archive_after_days = settings.FILING_STORE_ARCHIVE_AFTER_DAYS
+        self.retention_days = settings.FILING_STORE_RETENTION_DAYS
+        self.gc_grace_seconds = 3600  # never collect blobs a download may be about to reference
+
+        self.zstd = importlib.util.find_spec("zstandard") is not None
+        self.codec = "zstd" if self.zstd else "gzip"
+        if self.mode == "blob" and not self.zstd:
+            logger.warning("'zstandard' is not installed - filing blobs use gzip")
+
+    # ==================== Keys ====================
+
+    def blob_key(self, sha256: str, codec: Optional[str] = None) -> str:
+        ext = CODEC_EXTENSIONS[codec or self.codec]
+        return f"{BLOB_PREFIX}/{sha256[:2]}/{sha256}{ext}"
+
+    def filing_key(self, path: Path) -> Optional[str]:
+        """Storage key of a path under the local filings directory"""
+        try:
+            return f"{FILINGS_PREFIX}/{path.relative_to(self.filings_dir).as_posix()}"
+        except ValueError:
+            return None
+
+    def _is_remote(self, key: Optional[str], path: Path) -> bool:
+        """The object for `path` lives somewhere other than `path` itself"""
+        return key is not None and not self.storage.is_same_file(key, path)
+
+    # ==================== Blobs ====================
+
+    def _compress_file(self, src_path: Path, level: Optional[int] = None) -> Path:
+        """Stream-compress a file into a temp file"""
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.tmp_dir, suffix=".tmp")
+        with open(src_path, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+            if self.codec == "zstd":
+                import zstandard
+                zstandard.ZstdCompressor(level=level or self.level).copy_stream(src, dst)
+            else:
+                with gzip.GzipFile(fileobj=dst, mode='wb', compresslevel=6) as gz:
+                    shutil.copyfileobj(src, gz, 1024 * 1024)
+        return Path(tmp_name)
+
+    def _find_blob(self, sha256: str) -> Optional[str]:
+        for codec in CODEC_EXTENSIONS:
+            key = self.blob_key(sha256, codec)
+            if self.storage.exists(key):
+                return key
+        return None
+
+    def has_blob(self, sha256: Optional[str]) -> bool:
+        return bool(sha256) and self._find_blob(sha256) is not None
+
+    def put_blob_file(self, path: Path, sha256: str) -> int:
+        """Store a file's content once; returns the compressed size"""
+        existing = self._find_blob(sha256)
+        if existing is not None:
+            # Dedup hit - refresh mtime so gc() grace period covers it
+            self.storage.touch(existing)
+            return self.storage.size(existing)
+
+        tmp_path = self._compress_file(path)
+        stored_size = tmp_path.stat().st_size
+        self.storage.put_file(self.blob_key(sha256), tmp_path, move=True)
+        return stored_size
+
+    def open_blob(self, sha256: str) -> BinaryIO:
+        """Streaming reader over the decompressed content"""
+        key = self._find_blob(sha256)
+        if key is None:
+            raise FileNotFoundError(f"Blob {sha256} not found")
+        body = self.storage.open_read(key)
+        if key.endswith(CODEC_EXTENSIONS["zstd"]):
+            import zstandard
+            return zstandard.ZstdDecompressor().stream_reader(body)
+        gz = gzip.GzipFile(fileobj=body, mode='rb')
+        gz.myfileobj = body  # GzipFile closes myfileobj on close()
+        return gz
+
+    def get_blob(self, sha256: str) -> bytes:
+        with self.open_blob(sha256) as f:
+            return f.read()
+
+    # ==================== Manifests ====================
+
+    def load_manifest(self, filing_dir: Path, refresh: bool = False) -> DownloadManifest:
+        """
+        Load a filing's manifest, pulling it from storage when there is no
+        local copy (or always, with refresh=True)
+        """
+        local = filing_dir / MANIFEST_FILENAME
+        key = self.filing_key(local)
+        if self._is_remote(key, local) and (refresh or not local.exists()):
+            try:
+                self.storage.download_file(key, local)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Could not fetch manifest {key}: {e}")
+        return DownloadManifest.load(filing_dir)
+
+    def publish_manifest(self, filing_dir: Path):
+        """Upload the local manifest so other workers see this filing"""
+        local = filing_dir / MANIFEST_FILENAME
+        key = self.filing_key(local)
+        if self._is_remote(key, local) and local.exists():
+            try:
+                self.storage.put_file(key, local)
+            except Exception as e:
+                logger.error(f"Error publishing manifest {key}: {e}")
+
+    def delete_manifest(self, filing_dir: Path):
+        """Forget every entry, locally and in storage (forces a full re-download)"""
+        local = filing_dir / MANIFEST_FILENAME
+        DownloadManifest.load(filing_dir).clear()
+        key = self.filing_key(local)
+        if self._is_remote(key, local):
+            self.storage.delete(key)
+
+    def has_filing(self, filing_dir: Path) -> bool:
+        """Filing directory exists locally or has a manifest in storage"""
+        if filing_dir.exists():
+            return True
+        key = self.filing_key(filing_dir / MANIFEST_FILENAME)
+        try:
+            return key is not None and self.storage.exists(key)
+        except Exception as e:
+            logger.warning(f"Could not check storage for {filing_dir}: {e}")
+            return False
+
+    # ==================== Writing ====================
+
+    def store_file(self, filing_dir: Path, filename: str, manifest: DownloadManifest):
+        """
+        Move a freshly downloaded (and recorded) file into storage
+
+        "blob" mode: compressed into the blob store, raw file removed once the
+        blob and the manifest entry are both saved. "raw" mode: uploaded as-is
+        (a no-op with the local backend, where the file already is the object).
+        """
+        entry = manifest.get(filename)
+        raw_path = filing_dir / filename
+        if not entry or not entry.get("valid") or not raw_path.exists():
+            return
+
+        try:
+            if self.mode == "blob":
+                sha256 = entry.get("sha256") or sha256_file(raw_path)
+                stored_size = self.put_blob_file(raw_path, sha256)
+                manifest.update(filename, sha256=sha256, stored_size=stored_size, blob=True)
+                self.publish_manifest(filing_dir)
+                raw_path.unlink()
+            else:
+                key = self.filing_key(raw_path)
+                if self._is_remote(key, raw_path):
+                    self.storage.put_file(key, raw_path)
+                    self.publish_manifest(filing_dir)
+        except Exception as e:
+            # Keep the raw file; readers handle both
+            logger.error(f"Error moving {filename} into filing storage: {e}")
+
+    # ==================== Reading ====================
+
+    def glob(self, filing_dir: Path, pattern: str) -> List[Path]:
+        """Like Path.glob, over local files and manifest entries held in storage"""
+        found = {}
+        if filing_dir.exists():
+            for path in filing_dir.glob(pattern):
+                if path.name != MANIFEST_FILENAME and not path.name.endswith((".part", ".tmp")):
+                    found[path.name] = path
+
+        manifest = self.load_manifest(filing_dir)
+        for filename, entry in manifest.files.items():
+            if filename in found or not entry.get("valid") or not fnmatch.fnmatch(filename, pattern):
+                continue
+            path = filing_dir / filename
+            if entry.get("blob") or self._remote_exists(path):
+                found[filename] = path
+        return [found[name] for name in sorted(found)]
+
+    def _remote_exists(self, path: Path) -> bool:
+        key = self.filing_key(path)
+        return self._is_remote(key, path) and self.storage.exists(key)
+
+    def _entry(self, path: Path) -> Optional[Dict]:
+        return self.load_manifest(path.parent).get(path.name)
+
+    def exists(self, path: Path) -> bool:
+        if path.exists():
+            return True
+        entry = self._entry(path)
+        return bool(entry and entry.get("blob")) or self._remote_exists(path)
+
+    def open(self, path: Path) -> BinaryIO:
+        """Streaming binary reader: local file, blob, or raw object in storage"""
+        try:
+            return open(path, 'rb')
+        except FileNotFoundError:
+            entry = self._entry(path)
+            if entry and entry.get("blob"):
+                return self.open_blob(entry["sha256"])
+            key = self.filing_key(path)
+            if self._is_remote(key, path):
+                return self.storage.open_read(key)
+            raise
+
+    def read_bytes(self, path: Path) -> bytes:
+        with self.open(path) as f:
+            return f.read()
+
+    def read_text(self, path: Path) -> str:
+        """Same result as open(path, 'r', encoding='utf-8', errors='ignore').read()"""
+        return io.TextIOWrapper(io.BytesIO(self.read_bytes(path)), encoding="utf-8", errors="ignore").read()
+
+    def size(self, path: Path) -> int:
+        """Uncompressed size in bytes"""
+        try:
+            return path.stat().st_size
+        except FileNotFoundError:
+            entry = self._entry(path)
+            if entry and entry.get("size") is not None:
+                return entry["size"]
+            key = self.filing_key(path)
+            if self._is_remote(key, path):
+                return self.storage.size(key)
+            raise
+
+    # ==================== Migration ====================
+
+    def migrate_directory(self, filing_dir: Path, dry_run: bool = False) -> Dict:
+        """
+        Move a legacy raw filing directory into the blob store
+
+        Files without a manifest entry are recorded as kind "legacy".
+        Returns bytes before/after for reporting.
+        """
+        manifest = DownloadManifest.load(filing_dir)
+        stats = {"files": 0, "raw_bytes": 0, "stored_bytes": 0, "dedup_hits": 0}
+
+        for path in sorted(filing_dir.iterdir()):
+            if not path.is_file() or path.name == MANIFEST_FILENAME or path.name.endswith((".part", ".tmp")):
+                continue
+            size = path.stat().st_size
+            sha256 = sha256_file(path)
+            stats["files"] += 1
+            stats["raw_bytes"] += size
+            if self.has_blob(sha256):
+                stats["dedup_hits"] += 1
+            if dry_run:
+                continue
+
+            entry = manifest.get(path.name)
+            if not entry or entry.get("sha256") != sha256:
+                kind = "index" if path.name == "index.htm" else "legacy"
+                manifest.record(path.name, "", size, sha256, valid=True, kind=kind)
+            self.store_file(filing_dir, path.name, manifest)
+            stats["stored_bytes"] += manifest.get(path.name).get("stored_size", size)
+
+        return stats
+
+    def iter_filing_dirs(self):
+        """Local filing directories (legacy raw layout included)"""
+        if not self.filings_dir.exists():
+            return
+        for cik_dir in self.filings_dir.iterdir():
+            if cik_dir.is_dir():
+                for filing_dir in cik_dir.iterdir():
+                    if filing_dir.is_dir():
+                        yield filing_dir
+
+    def iter_manifests(self) -> Iterator[Tuple[Path, DownloadManifest, ObjectInfo]]:
+        """Every manifest in storage, whichever worker downloaded the filing"""
+        suffix = f"/{MANIFEST_FILENAME}"
+        for info in self.storage.list(f"{FILINGS_PREFIX}/"):
+            if not info.key.endswith(suffix):
+                continue
+            relative = info.key[len(FILINGS_PREFIX) + 1:-len(suffix)]
+            filing_dir = self.filings_dir / relative
+            try:
+                manifest = DownloadManifest.parse(filing_dir, self.storage.get_bytes(info.key))
+            except Exception as e:
+                logger.warning(f"Skipping unreadable manifest {info.key}: {e}")
+                continue
+            yield filing_dir, manifest, info
+
+    # ==================== Retention ====================
+
+    def _filing_age_days(self, manifest: DownloadManifest, mtime: float) -> float:
+        fetched = [e.get("fetched_at") for e in manifest.files.values() if e.get("fetched_at")]
+        if fetched:
+            newest = max(datetime.fromisoformat(f) for f in fetched)
+        else:
+            newest = datetime.fromtimestamp(mtime, tz=timezone.utc)
+        return (datetime.now(timezone.utc) - newest) / timedelta(days=1)
+
+    def _delete_filing(self, filing_dir: Path):
+        key = self.filing_key(filing_dir)
+        if key is not None:
+            for info in list(self.storage.list(f"{key}/")):
+                self.storage.delete(info.key)
+        shutil.rmtree(filing_dir, ignore_errors=True)
+
+    def apply_retention(self, dry_run: bool = False) -> Dict:
+        """Archive-recompress old filings, delete expired ones, then collect orphan blobs"""
+        stats = {"archived": 0, "deleted": 0, "blobs_removed": 0, "bytes_freed": 0}
+
+        for filing_dir, manifest, info in list(self.iter_manifests()):
+            age_days = self._filing_age_days(manifest, info.mtime)
+
+            if self.retention_days and age_days > self.retention_days:
+                stats["deleted"] += 1
+                if not dry_run:
+                    self._delete_filing(filing_dir)
+                continue
+
+            if self.zstd and self.archive_after_days and age_days > self.archive_after_days:
+                changed = False
+                for entry in manifest.files.values():
+                    if entry.get("blob") and not entry.get("archived"):
+                        if not dry_run:
+                            self._recompress(entry)
+                            changed = True
+                        stats["archived"] += 1
+                if changed:
+                    filing_dir.mkdir(parents=True, exist_ok=True)
+                    manifest.save()
+                    self.publish_manifest(filing_dir)
+
+        # Legacy local directories that never got a manifest
+        if self.retention_days:
+            for filing_dir in list(self.iter_filing_dirs()):
+                if (filing_dir / MANIFEST_FILENAME).exists():
+                    continue
+                manifest = DownloadManifest(filing_dir)
+                if self._filing_age_days(manifest, filing_dir.stat().st_mtime) > self.retention_days:
+                    stats["deleted"] += 1
+                    if not dry_run:
+                        shutil.rmtree(filing_dir, ignore_errors=True)
+
+        gc_stats = self.gc(dry_run=dry_run)
+        stats["blobs_removed"] = gc_stats["removed"]
+        stats["bytes_freed"] = gc_stats["bytes_freed"]
+        return stats
+
+    def _recompress(self, entry: Dict):
+        key = self._find_blob(entry["sha256"])
+        if key is None:
+            return
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, raw_name = tempfile.mkstemp(dir=self.tmp_dir, suffix=".tmp")
+        raw_path = Path(raw_name)
+        try:
+            with self.open_blob(entry["sha256"]) as src, os.fdopen(fd, 'wb') as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            tmp_path = self._compress_file(raw_path, level=self.archive_level)
+        finally:
+            raw_path.unlink(missing_ok=True)
+
+        target = self.blob_key(entry["sha256"], "zstd")
+        entry["stored_size"] = tmp_path.stat().st_size
+        self.storage.put_file(target, tmp_path, move=True)
+        if key != target:
+            self.storage.delete(key)
+        entry["archived"] = True
+
+    def gc(self, dry_run: bool = False) -> Dict:
+        """Mark-and-sweep: delete blobs that no manifest references"""
+        referenced: Set[str] = set()
+        for _, manifest, _ in self.iter_manifests():
+            for entry in manifest.files.values():
+                if entry.get("blob") and entry.get("sha256"):
+                    referenced.add(entry["sha256"])
+
+        stats = {"removed": 0, "bytes_freed": 0}
+        cutoff = time.time() - self.gc_grace_seconds
+        for info in list(self.storage.list(f"{BLOB_PREFIX}/")):
+            sha256 = info.key.rsplit("/", 1)[-1].split(".")[0]
+            if sha256 in referenced or info.mtime > cutoff:
+                continue
+            stats["removed"] += 1
+            stats["bytes_freed"] += info.size
+            if not dry_run:
+                self.storage.delete(info.key)
+        return stats
+
+    def get_stats(self) -> Dict:
+        blob_bytes = sum(info.size for info in self.storage.list(f"{BLOB_PREFIX}/"))
+        raw_bytes = 0
+        for filing_dir in self.iter_filing_dirs():
+            for path in filing_dir.iterdir():
+                if path.is_file() and path.name != MANIFEST_FILENAME:
+                    raw_bytes += path.stat().st_size
+        logical_bytes = 0
+        for _, manifest, _ in self.iter_manifests():
+            logical_bytes += sum(e.get("size", 0) for e in manifest.files.values() if e.get("blob"))
+        return {
+            "mode": self.mode,
+            "backend": self.storage.name,
+            "codec": self.codec,
+            "blob_bytes": blob_bytes,
+            "raw_bytes": raw_bytes,
+            "logical_blob_bytes": logical_bytes,
+            "compression_ratio": round(logical_bytes / blob_bytes, 2) if blob_bytes else None,
+        }
+
+
+# Create singleton instance
+filing_store = FilingStore()
@@ -0,0 +1,253 @@
+# app/services/ingestion_gate.py
+"""
+Queue-depth-aware admission of new filings into the Celery pipeline
+
+process_filing_task is rate-limited to 10/minute, so after an outage an
+unconditional enqueue of everything the scanner finds leaves the newest
+filings waiting behind hours of stale ones. Instead, every enqueue goes
+through the gate:
+
+- the broker queue depth is read (cached for a couple of seconds)
+- at or above the high watermark the gate closes; it reopens only once the
+  depth is back at the low watermark (hysteresis, no flapping)
+- while open, at most (high watermark - depth) filings are admitted,
+  newest first; the rest simply stay PENDING in the database
+- drain_pending() later admits PENDING filings newest first as room frees
+  up (called by the scheduler and by process_pending_filings)
+
+Filings admitted recently are remembered in a Redis sorted set so a drain
+does not enqueue a filing that is still sitting in the queue. If the queue
+depth cannot be read the gate fails open.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence
+
+from app.core.cache import cache
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.filing import Filing, ProcessingStatus
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionGate:
+    """Admits filings to the processing queue while it is below its watermarks"""
+
+    def __init__(self):
+        self.enabled = settings.INGESTION_BACKPRESSURE_ENABLED
+        self.high_watermark = settings.INGESTION_QUEUE_HIGH_WATERMARK
+        self.low_watermark = min(settings.INGESTION_QUEUE_LOW_WATERMARK, self.high_watermark)
+        self.depth_cache_seconds = settings.INGESTION_QUEUE_DEPTH_CACHE_SECONDS
+        self.drain_interval = settings.INGESTION_DRAIN_INTERVAL_SECONDS
+        self.requeue_after = settings.INGESTION_REQUEUE_AFTER_SECONDS
+        self.queue_name = celery_app.conf.task_default_queue
+        self.admitted_key = "ingestion:admitted"
+
+        self.saturated = False
+        self.last_drain = 0.0
+        self._depth: Optional[int] = None
+        self._depth_read_at = 0.0
+        self._lock = threading.Lock()
+        self.stats = {
+            "admitted": 0,
+            "deferred": 0,
+            "drained": 0,
+            "saturation_events": 0,
+            "depth_errors": 0,
+        }
+        self.last_decision: Dict = {}
+
+    # ==================== Queue depth ====================
+
+    def queue_depth(self, refresh: bool = False) -> Optional[int]:
+        """Messages waiting in the broker queue (None = unknown)"""
+        now = time.monotonic()
+        with self._lock:
+            if not refresh and self._depth is not None and now - self._depth_read_at < self.depth_cache_seconds:
+                return self._depth
+        try:
+            with celery_app.connection_or_acquire() as conn:
+                try:
+                    depth = conn.default_channel.queue_declare(queue=self.queue_name, passive=True).message_count
+                except conn.channel_errors as e:
+                    # The Redis transport deletes the list key once the queue is empty
+                    if getattr(e, "reply_code", None) != 404 and "NOT_FOUND" not in str(e):
+                        raise
+                    depth = 0
+        except Exception as e:
+            self.stats["depth_errors"] += 1
+            logger.warning(f"Cannot read depth of queue '{self.queue_name}', admitting without backpressure: {e}")
+            return None
+        with self._lock:
+            self._depth = depth
+            self._depth_read_at = now
+        return depth
+
+    def _capacity(self, depth: int) -> int:
+        """Filings that may be admitted now, updating the saturated state"""
+        if self.saturated and depth <= self.low_watermark:
+            self.saturated = False
+            logger.info(f"Processing queue drained to {depth} - resuming admissions")
+        elif not self.saturated and depth >= self.high_watermark:
+            self.saturated = True
+            self.stats["saturation_events"] += 1
+            logger.warning(f"Processing queue at {depth} (high watermark {self.high_watermark}) - holding new filings")
+        if self.saturated:
+            return 0
+        return self.high_watermark - depth
+
+    # ==================== Admission ====================
+
+    def admit(self, filing_ids: Sequence[int], source: str = "scan") -> Dict[str, List[int]]:
+        """
+        Enqueue as many filings as the queue has room for
+
+        Args:
+            filing_ids: Filing IDs, newest first (admission follows this order)
+            source: Label for logs/metrics ("scan", "drain")
+
+        Returns:
+            {"admitted": [...], "deferred": [...]} - deferred filings stay PENDING
+        """
+        filing_ids = list(filing_ids)
+        if not filing_ids:
+            return {"admitted": [], "deferred": []}
+
+        depth = self.queue_depth() if self.enabled else None
+        capacity = len(filing_ids) if depth is None else self._capacity(depth)
+        admitted, deferred = filing_ids[:capacity], filing_ids[capacity:]
+
+        if admitted:
+            self._enqueue(admitted)
+            with self._lock:
+                if self._depth is not None:
+                    self._depth += len(admitted)  # until the next real read
+
+        self.stats["admitted"] += len(admitted)
+        self.stats["deferred"] += len(deferred)
+        self.last_decision = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "source": source,
+            "queue_depth": depth,
+            "admitted": len(admitted),
+            "deferred": len(deferred),
+        }
+        if deferred:
+            logger.info(
+                f"Backpressure ({source}): queue depth {depth}, admitted {len(admitted)}, "
+                f"deferred {len(deferred)} filings (kept PENDING)"
+            )
+        return {"admitted": admitted, "deferred": deferred}
+
+    def _enqueue(self, filing_ids: List[int]):
+        # Deferred import: the tasks module imports the services that use this gate
+        from celery import group
+        from app.tasks.filing_tasks import process_filing_task
+
+        if len(filing_ids) == 1:
+            process_filing_task.delay(filing_ids[0])
+        else:
+            group(process_filing_task.s(filing_id) for filing_id in filing_ids).apply_async()
+
+        try:
+            now = time.time()
+            pipe = cache.redis_client.pipeline()
+            pipe.zadd(self.admitted_key, {str(filing_id): now for filing_id in filing_ids})
+            pipe.zremrangebyscore(self.admitted_key, 0, now - self.requeue_after)
+            pipe.execute()
+        except Exception as e:
+            logger.debug(f"Could not record admitted filings: {e}")
+
+    def _recently_admitted(self, filing_ids: List[int]) -> set:
+        if not filing_ids:
+            return set()
+        try:
+            cutoff = time.time() - self.requeue_after
+            scores = cache.redis_client.zmscore(self.admitted_key, [str(i) for i in filing_ids])
+            return {i for i, score in zip(filing_ids, scores) if score is not None and score >= cutoff}
+        except Exception as e:
+            logger.debug(f"Could not read admitted filings: {e}")
+            return set()
+
+    # ==================== Draining held filings ====================
+
+    def drain_due(self) -> bool:
+        """Whether the scheduler should run drain_pending() now"""
+        return self.enabled and time.monotonic() - self.last_drain >= self.drain_interval
+
+    def drain_pending(self, limit: int = 50) -> Dict:
+        """
+        Admit PENDING filings, newest first, up to the queue's free room
+
+        Skips filings admitted within INGESTION_REQUEUE_AFTER_SECONDS (still
+        queued) and filings a worker started less than 5 minutes ago.
+        """
+        self.last_drain = time.monotonic()
+        depth = self.queue_depth(refresh=True) if self.enabled else None
+        room = limit if depth is None else min(limit, self._capacity(depth))
+        if room <= 0:
+            return {"queued": 0, "skipped": 0, "filing_ids": [], "queue_depth": depth}
+
+        db = SessionLocal()
+        try:
+            started_cutoff = datetime.now(timezone.utc) - timedelta(minutes=5)
+            # Over-fetch: recently admitted rows are filtered out below
+            candidates = db.query(Filing.id, Filing.accession_number, Filing.company_id,
+                                  Filing.processing_started_at).filter(
+                Filing.status == ProcessingStatus.PENDING
+            ).order_by(
+                Filing.filing_date.desc(),
+                Filing.id.desc()  # Newest first
+            ).limit(room + limit).all()
+        finally:
+            db.close()
+
+        skipped = 0
+        eligible = []
+        for filing_id, accession_number, company_id, started_at in candidates:
+            if not accession_number or not company_id:
+                logger.warning(f"Skipping invalid pending filing {filing_id}")
+                skipped += 1
+                continue
+            if started_at:
+                if started_at.tzinfo is None:
+                    started_at = started_at.replace(tzinfo=timezone.utc)
+                if started_at > started_cutoff:
+                    skipped += 1
+                    continue
+            eligible.append(filing_id)
+
+        recent = self._recently_admitted(eligible)
+        skipped += len(recent)
+        filing_ids = [i for i in eligible if i not in recent][:room]
+
+        result = self.admit(filing_ids, source="drain")
+        self.stats["drained"] += len(result["admitted"])
+        if result["admitted"]:
+            logger.info(f"Drained {len(result['admitted'])} pending filings into the processing queue")
+        return {
+            "queued": len(result["admitted"]),
+            "skipped": skipped,
+            "filing_ids": result["admitted"],
+            "queue_depth": depth,
+        }
+
+    def get_stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "queue": self.queue_name,
+            "queue_depth": self._depth,
+            "high_watermark": self.high_watermark,
+            "low_watermark": self.low_watermark,
+            "saturated": self.saturated,
+            **self.stats,
+            "last_decision": self.last_decision,
+        }
+
+
+# Create singleton instance
+ingestion_gate = IngestionGate()
@@ -0,0 +1,522 @@
+# app/services/ixbrl_facts.py
+"""
+Streaming Inline XBRL fact extraction
+
+TextExtractor unwraps ix:nonFraction / ix:nonNumeric tags to get plain text,
+which throws away exactly the data we then ask the LLM to re-discover
+(revenue, net income, EPS). This module reads the tags instead:
+
+- parse_ixbrl() streams the document through an lxml pull parser (1MB
+  chunks, processed elements cleared), collecting every xbrli:context
+  (period, whether it carries dimensions), xbrli:unit and tagged fact
+  (concept, context, unit, decimals, scale, sign, normalized value)
+- summarize_facts() picks the headline numbers deterministically: the
+  non-dimensional fact for the document period (dei:DocumentPeriodEndDate
+  context), shortest duration for quarterly reports, longest for annual;
+  revenue, net income and EPS only in USD
+- IXBRLFactExtractor stores the facts in financial_facts and fills
+  Filing.revenue / net_income (millions), eps and financial_data
+
+Text blocks (ix:nonNumeric escape="true") are not stored: their content is
+already in the extracted text.
+"""
+import logging
+from collections import Counter
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import BinaryIO, Dict, List, NamedTuple, Optional, Tuple
+
+from lxml import etree
+from sqlalchemy.orm import Session
+
+from app.models.filing import Filing, FilingType
+from app.models.financial_fact import FinancialFact
+from app.services.filing_store import filing_store
+
+logger = logging.getLogger(__name__)
+
+IX_NAMESPACES = ("http://www.xbrl.org/2013/inlineXBRL", "http://www.xbrl.org/2008/inlineXBRL")
+XBRLI_NS = "http://www.xbrl.org/2003/instance"
+XBRLDI_NS = "http://xbrl.org/2006/xbrldi"
+XSI_NIL = "{http://www.w3.org/2001/XMLSchema-instance}nil"
+
+IX_NON_FRACTION = {f"{{{ns}}}nonFraction" for ns in IX_NAMESPACES}
+IX_NON_NUMERIC = {f"{{{ns}}}nonNumeric" for ns in IX_NAMESPACES}
+XBRLI_CONTEXT = f"{{{XBRLI_NS}}}context"
+XBRLI_UNIT = f"{{{XBRLI_NS}}}unit"
+XBRLI_PERIOD_TAGS = {f"{{{XBRLI_NS}}}{name}": name for name in ("instant", "startDate", "endDate")}
+XBRLI_MEASURE = f"{{{XBRLI_NS}}}measure"
+XBRLI_DENOMINATOR = f"{{{XBRLI_NS}}}unitDenominator"
+XBRLDI_MEMBERS = {f"{{{XBRLDI_NS}}}explicitMember", f"{{{XBRLDI_NS}}}typedMember"}
+
+CHUNK_SIZE = 1024 * 1024
+SNIFF_BYTES = 64 * 1024
+MAX_TEXT_FACT_CHARS = 500  # Longer nonNumeric facts are narrative, not data
+
+# Transformation registry formats (prefix and dashes dropped)
+ZERO_FORMATS = {"zerodash", "fixedzero", "nocontent"}
+COMMA_DECIMAL_FORMATS = {"numcommadecimal", "numdotcomma", "numspacecomma"}
+NUMBER_WORDS = {
+    "no": 0, "none": 0, "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+}
+DASHES = {"-", "—", "–", "‒", "―"}
+
+# Headline metrics: concepts in order of preference
+DURATION_METRICS = {
+    "revenue": [
+        "us-gaap:Revenues",
+        "us-gaap:RevenueFromContractWithCustomerExcludingAssessedTax",
+        "us-gaap:RevenueFromContractWithCustomerIncludingAssessedTax",
+        "us-gaap:SalesRevenueNet",
+        "us-gaap:RevenuesNetOfInterestExpense",
+        "ifrs-full:Revenue",
+    ],
+    "net_income": [
+        "us-gaap:NetIncomeLoss",
+        "us-gaap:NetIncomeLossAvailableToCommonStockholdersBasic",
+        "us-gaap:ProfitLoss",
+        "ifrs-full:ProfitLossAttributableToOwnersOfParent",
+        "ifrs-full:ProfitLoss",
+    ],
+    "eps": [
+        "us-gaap:EarningsPerShareDiluted",
+        "us-gaap:EarningsPerShareBasicAndDiluted",
+        "us-gaap:EarningsPerShareBasic",
+        "ifrs-full:DilutedEarningsLossPerShare",
+        "ifrs-full:BasicEarningsLossPerShare",
+    ],
+    "eps_basic": [
+        "us-gaap:EarningsPerShareBasic",
+        "us-gaap:EarningsPerShareBasicAndDiluted",
+        "ifrs-full:BasicEarningsLossPerShare",
+    ],
+    "gross_profit": ["us-gaap:GrossProfit", "ifrs-full:GrossProfit"],
+    "operating_income": ["us-gaap:OperatingIncomeLoss", "ifrs-full:ProfitLossFromOperatingActivities"],
+    "operating_cash_flow": [
+        "us-gaap:NetCashProvidedByUsedInOperatingActivities",
+        "ifrs-full:CashFlowsFromUsedInOperatingActivities",
+    ],
+}
+INSTANT_METRICS = {
+    "total_assets": ["us-gaap:Assets", "ifrs-full:Assets"],
+    "total_liabilities": ["us-gaap:Liabilities", "ifrs-full:Liabilities"],
+    "stockholders_equity": ["us-gaap:StockholdersEquity", "ifrs-full:EquityAttributableToOwnersOfParent"],
+    "cash": [
+        "us-gaap:CashAndCashEquivalentsAtCarryingValue",
+        "us-gaap:CashCashEquivalentsRestrictedCashAndRestrictedCashEquivalents",
+        "ifrs-full:CashAndCashEquivalents",
+    ],
+}
+MILLIONS_METRICS = {"revenue", "net_income"}  # Filing columns stored in millions
+# Filing columns and the prompt print dollars: other currencies are not picked
+METRIC_UNITS = {"revenue": "USD", "net_income": "USD", "eps": "USD/shares", "eps_basic": "USD/shares"}
+EPS_LABELS = {
+    "us-gaap:EarningsPerShareDiluted": "Diluted EPS",
+    "us-gaap:EarningsPerShareBasicAndDiluted": "Basic & Diluted EPS",
+    "us-gaap:EarningsPerShareBasic": "Basic EPS",
+    "ifrs-full:DilutedEarningsLossPerShare": "Diluted EPS",
+    "ifrs-full:BasicEarningsLossPerShare": "Basic EPS",
+}
+
+ANNUAL_FORMS = {FilingType.FORM_10K, FilingType.FORM_20F}
+
+
+class Context(NamedTuple):
+    period_start: Optional[date]  # None for instants
+    period_end: Optional[date]
+    dimensional: bool  # Has segment/scenario dimension members
+
+
+class Fact(NamedTuple):
+    concept: str  # QName as written, e.g. "us-gaap:Revenues"
+    context_ref: str
+    unit: Optional[str]  # "USD", "USD/shares", ... (None for nonNumeric)
+    value: Optional[float]  # Scaled and signed (nonFraction)
+    text: Optional[str]  # nonNumeric value
+    decimals: Optional[str]  # "-6", "2", "INF"
+    scale: int
+
+
+class FactSet:
+    """Everything one iXBRL document tags"""
+
+    def __init__(self):
+        self.contexts: Dict[str, Context] = {}
+        self.units: Dict[str, str] = {}
+        self.facts: List[Fact] = []
+        self.skipped_text_blocks = 0
+        self.unparsed_values = 0
+
+    def context(self, fact: Fact) -> Optional[Context]:
+        return self.contexts.get(fact.context_ref)
+
+    def unique_facts(self) -> List[Fact]:
+        """One fact per (concept, context, unit); documents repeat tagged values"""
+        seen = set()
+        unique = []
+        for fact in self.facts:
+            key = (fact.concept, fact.context_ref, fact.unit)
+            if key not in seen:
+                seen.add(key)
+                unique.append(fact)
+        return unique
+
+    def dei(self, name: str) -> Optional[Fact]:
+        concept = f"dei:{name}"
+        for fact in self.facts:
+            if fact.concept == concept:
+                return fact
+        return None
+
+
+# ==================== Parsing ====================
+
+def _parse_date(text: Optional[str]) -> Optional[date]:
+    try:
+        return date.fromisoformat((text or "").strip()[:10])
+    except ValueError:
+        return None
+
+
+def _unit_name(measures: List[str], denominators: List[str]) -> str:
+    def name(measure: str) -> str:
+        return measure.strip().split(":")[-1]
+    numerator = "*".join(name(m) for m in measures)
+    if denominators:
+        return f"{numerator}/{'*'.join(name(m) for m in denominators)}"
+    return numerator
+
+
+def parse_number(text: str, fmt: Optional[str] = None) -> Optional[Decimal]:
+    """Displayed number -> Decimal per the ixt transformation format (no scale/sign)"""
+    fmt = (fmt or "").split(":")[-1].replace("-", "").lower()
+    text = text.strip()
+    if fmt in ZERO_FORMATS:
+        return Decimal(0)
+    if fmt == "numwordsen" and text.lower() in NUMBER_WORDS:
+        return Decimal(NUMBER_WORDS[text.lower()])
+    if fmt in COMMA_DECIMAL_FORMATS:
+        text = text.replace(".", "").replace(" ", "").replace("\xa0", "").replace(",", ".")
+    digits = "".join(ch for ch in text if ch.isdigit() or ch == ".")
+    if not digits.strip("."):
+        return Decimal(0) if text in DASHES else None
+    try:
+        return Decimal(digits)
+    except InvalidOperation:
+        return None
+
+
+def parse_ixbrl(stream: BinaryIO) -> FactSet:
+    """
+    Collect contexts, units and facts from an iXBRL document in one streaming pass
+
+    Args:
+        stream: Binary reader over the document (read in CHUNK_SIZE chunks)
+    """
+    fact_set = FactSet()
+    parser = etree.XMLPullParser(events=("start", "end"), recover=True, huge_tree=True,
+                                 resolve_entities=False, no_network=True)
+    holding = 0  # Open elements whose children are still needed
+
+    def handle(event: str, elem):
+        nonlocal holding
+        tag = elem.tag
+        if not isinstance(tag, str):
+            return  # Comments, processing instructions
+
+        if event == "start":
+            if tag in IX_NON_FRACTION or tag == XBRLI_CONTEXT or tag == XBRLI_UNIT:
+                holding += 1
+            elif tag in IX_NON_NUMERIC and elem.get("escape", "").lower() not in ("true", "1"):
+                holding += 1
+            return
+
+        if tag in IX_NON_FRACTION:
+            holding -= 1
+            _add_numeric_fact(fact_set, elem)
+        elif tag in IX_NON_NUMERIC:
+            if elem.get("escape", "").lower() in ("true", "1"):
+                fact_set.skipped_text_blocks += 1
+            else:
+                holding -= 1
+                _add_text_fact(fact_set, elem)
+        elif tag == XBRLI_CONTEXT:
+            holding -= 1
+            _add_context(fact_set, elem)
+        elif tag == XBRLI_UNIT:
+            holding -= 1
+            _add_unit(fact_set, elem)
+
+        if holding == 0:
+            # Nothing open needs this subtree any more
+            elem.clear()
+            parent = elem.getparent()
+            if parent is not None:
+                while elem.getprevious() is not None:
+                    del parent[0]
+
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            handle(event, elem)
+    try:
+        parser.close()
+    except etree.XMLSyntaxError:
+        pass
+    for event, elem in parser.read_events():
+        handle(event, elem)
+
+    # ix:resources may come after the facts that reference its units
+    fact_set.facts = [
+        fact._replace(unit=fact_set.units.get(fact.unit, fact.unit)) if fact.unit else fact
+        for fact in fact_set.facts
+    ]
+    return fact_set
+
+
+def _add_context(fact_set: FactSet, elem):
+    period = {}
+    dimensional = False
+    for child in elem.iter():
+        name = XBRLI_PERIOD_TAGS.get(child.tag)
+        if name:
+            period[name] = _parse_date(child.text)
+        elif child.tag in XBRLDI_MEMBERS:
+            dimensional = True
+    context_id = elem.get("id")
+    if not context_id:
+        return
+    if "instant" in period:
+        fact_set.contexts[context_id] = Context(None, period["instant"], dimensional)
+    else:
+        fact_set.contexts[context_id] = Context(period.get("startDate"), period.get("endDate"), dimensional)
+
+
+def _add_unit(fact_set: FactSet, elem):
+    measures, denominators = [], []
+    for child in elem.iter(XBRLI_MEASURE):
+        parent = child.getparent()
+        target = denominators if parent is not None and parent.tag == XBRLI_DENOMINATOR else measures
+        target.append(child.text or "")
+    unit_id = elem.get("id")
+    if unit_id and measures:
+        fact_set.units[unit_id] = _unit_name(measures, denominators)
+
+
+def _add_numeric_fact(fact_set: FactSet, elem):
+    concept, context_ref = elem.get("name"), elem.get("contextRef")
+    if not concept or not context_ref:
+        return
+    if elem.get(XSI_NIL, "").lower() == "true":
+        return
+    try:
+        scale = int(elem.get("scale") or 0)
+    except ValueError:
+        scale = 0
+    number = parse_number("".join(elem.itertext()), elem.get("format"))
+    if number is None:
+        fact_set.unparsed_values += 1
+        return
+    number = number.scaleb(scale)
+    if elem.get("sign") == "-":
+        number = -number
+    fact_set.facts.append(Fact(
+        concept=concept,
+        context_ref=context_ref,
+        unit=elem.get("unitRef"),  # Resolved once all units are read
+        value=float(number),
+        text=None,
+        decimals=elem.get("decimals"),
+        scale=scale,
+    ))
+
+
+def _add_text_fact(fact_set: FactSet, elem):
+    concept, context_ref = elem.get("name"), elem.get("contextRef")
+    if not concept or not context_ref:
+        return
+    text = " ".join("".join(elem.itertext()).split())
+    if not text or len(text) > MAX_TEXT_FACT_CHARS:
+        return
+    fact_set.facts.append(Fact(concept, context_ref, None, None, text, None, 0))
+
+
+# ==================== Headline numbers ====================
+
+def report_period_end(fact_set: FactSet) -> Optional[date]:
+    """End of the period the document reports on"""
+    period_fact = fact_set.dei("DocumentPeriodEndDate")
+    if period_fact:
+        context = fact_set.context(period_fact)
+        if context and context.period_end:
+            return context.period_end
+    # Fallback: the most common end date of non-dimensional durations
+    ends = Counter(
+        context.period_end for context in fact_set.contexts.values()
+        if context.period_start and context.period_end and not context.dimensional
+    )
+    return ends.most_common(1)[0][0] if ends else None
+
+
+def _pick(fact_set: FactSet, concepts: List[str], period_end: date,
+          instant: bool, annual: bool, unit: Optional[str] = None) -> Optional[Tuple[Fact, Context]]:
+    for concept in concepts:
+        candidates = []
+        for fact in fact_set.facts:
+            if fact.concept != concept or fact.value is None:
+                continue
+            if unit and fact.unit != unit:
+                continue
+            context = fact_set.context(fact)
+            if not context or context.dimensional or context.period_end != period_end:
+                continue
+            if instant != (context.period_start is None):
+                continue
+            candidates.append((fact, context))
+        if candidates:
+            if instant:
+                return candidates[0]
+            # Quarterly reports: the quarter, not year-to-date; annual: the full year
+            duration = lambda item: (item[1].period_end - item[1].period_start).days
+            return max(candidates, key=duration) if annual else min(candidates, key=duration)
+    return None
+
+
+def summarize_facts(fact_set: FactSet, annual: Optional[bool] = None) -> Dict:
+    """
+    Headline metrics for the reported period
+
+    Args:
+        annual: Full-year report (longest duration wins); None = from
+            dei:DocumentFiscalPeriodFocus ("FY")
+    """
+    period_end = report_period_end(fact_set)
+    focus = fact_set.dei("DocumentFiscalPeriodFocus")
+    year = fact_set.dei("DocumentFiscalYearFocus")
+    if annual is None:
+        annual = bool(focus and focus.text and focus.text.upper() == "FY")
+
+    summary = {
+        "source": "ixbrl",
+        "period_end": period_end.isoformat() if period_end else None,
+        "fiscal_period": focus.text if focus else None,
+        "fiscal_year": year.text if year else None,
+        "fact_count": len(fact_set.unique_facts()),
+        "metrics": {},
+    }
+    if not period_end:
+        return summary
+
+    for metrics, instant in ((DURATION_METRICS, False), (INSTANT_METRICS, True)):
+        for metric, concepts in metrics.items():
+            picked = _pick(fact_set, concepts, period_end, instant, annual, METRIC_UNITS.get(metric))
+            if not picked:
+                continue
+            fact, context = picked
+            summary["metrics"][metric] = {
+                "concept": fact.concept,
+                "value": fact.value,
+                "unit": fact.unit,
+                "decimals": fact.decimals,
+                "period_start": context.period_start.isoformat() if context.period_start else None,
+                "period_end": context.period_end.isoformat(),
+            }
+    return summary
+
+
+# ==================== Filing integration ====================
+
+class IXBRLFactExtractor:
+    """Finds a filing's iXBRL document, stores its facts and headline numbers"""
+
+    def find_ixbrl_document(self, filing_dir: Path) -> Optional[Path]:
+        """The main document if it is inline XBRL, else the first iXBRL .htm"""
+        candidates = []
+        main_doc = filing_store.load_manifest(filing_dir).find("main")
+        if main_doc:
+            candidates.append(filing_dir / main_doc)
+        candidates.extend(
+            path for path in filing_store.glob(filing_dir, "*.htm")
+            if path.name != "index.htm" and path not in candidates
+        )
+        for path in candidates:
+            try:
+                with filing_store.open(path) as f:
+                    head = f.read(SNIFF_BYTES)
+            except OSError:
+                continue
+            if any(ns.encode() in head for ns in IX_NAMESPACES):
+                return path
+        return None
+
+    def extract_from_filing(self, filing_dir: Path) -> Optional[FactSet]:
+        path = self.find_ixbrl_document(filing_dir)
+        if not path:
+            return None
+        with filing_store.open(path) as f:
+            fact_set = parse_ixbrl(f)
+        logger.info(
+            f"Parsed {len(fact_set.facts)} iXBRL facts from {path.name} "
+            f"({len(fact_set.contexts)} contexts, {fact_set.skipped_text_blocks} text blocks skipped)"
+        )
+        return fact_set
+
+    def store_facts(self, db: Session, filing: Filing, fact_set: FactSet) -> int:
+        """Replace the filing's rows in financial_facts"""
+        db.query(FinancialFact).filter(FinancialFact.filing_id == filing.id).delete(synchronize_session=False)
+        rows = []
+        for fact in fact_set.unique_facts():
+            context = fact_set.context(fact) or Context(None, None, False)
+            rows.append(FinancialFact(
+                filing_id=filing.id,
+                concept=fact.concept[:255],
+                context_ref=fact.context_ref[:255],
+                period_start=context.period_start,
+                period_end=context.period_end,
+                dimensional=context.dimensional,
+                unit=fact.unit[:50] if fact.unit else None,
+                value=fact.value,
+                value_text=fact.text,
+                decimals=fact.decimals[:10] if fact.decimals else None,
+                scale=fact.scale,
+            ))
+        db.add_all(rows)
+        return len(rows)
+
+    def apply_to_filing(self, db: Session, filing: Filing, filing_dir: Path) -> Optional[Dict]:
+        """
+        Extract, store and summarize the filing's facts
+
+        Sets revenue / net_income (millions) and eps only when the document
+        tags them in USD for its reporting period; financial_data gets the summary.
+        Returns the summary, or None for filings without inline XBRL.
+        """
+        fact_set = self.extract_from_filing(filing_dir)
+        if fact_set is None or not fact_set.facts:
+            return None
+
+        summary = summarize_facts(fact_set, annual=filing.filing_type in ANNUAL_FORMS or None)
+        summary["fact_count"] = self.store_facts(db, filing, fact_set)
+
+        metrics = summary["metrics"]
+        for metric in ("revenue", "net_income", "eps"):
+            if metric in metrics:
+                value = metrics[metric]["value"]
+                setattr(filing, metric, value / 1_000_000 if metric in MILLIONS_METRICS else value)
+        filing.financial_data = summary
+        db.commit()
+
+        logger.info(
+            f"Stored {summary['fact_count']} XBRL facts for {filing.accession_number}: "
+            f"{', '.join(sorted(metrics)) or 'no headline metrics'}"
+        )
+        return summary
+
+
+# Create singleton instance
+ixbrl_fact_extractor = IXBRLFactExtractor()
@@ -0,0 +1,160 @@
+# app/services/poll_planner.py
+"""
+Priority planner for the per-CIK submissions scan
+
+Instead of polling every monitored CIK on one fixed interval, CIKs are put
+into tiers and each tier has its own poll interval:
+
+- hot:  earnings today or tomorrow (earnings_calendar table)
+- warm: an 8-K filed in the last few days
+- cold: everyone else (slow sweep)
+
+The scheduler ticks frequently and each tick polls only the CIKs whose
+tier interval has elapsed, most overdue first, capped to a share of the
+SEC request budget. Tiers are rebuilt from the database periodically.
+"""
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Set
+
+import pytz
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.company import Company
+from app.models.earnings_calendar import EarningsCalendar
+from app.models.filing import Filing
+
+logger = logging.getLogger(__name__)
+
+EST_TZ = pytz.timezone('US/Eastern')
+
+HOT = "hot"
+WARM = "warm"
+COLD = "cold"
+
+
+class PollPlanner:
+    """Decides which CIKs are due for a submissions poll on each tick"""
+
+    def __init__(self):
+        self.intervals = {
+            HOT: settings.SCANNER_HOT_INTERVAL_SECONDS,
+            WARM: settings.SCANNER_WARM_INTERVAL_SECONDS,
+            COLD: settings.SCANNER_COLD_INTERVAL_SECONDS,
+        }
+        self.tick_seconds = settings.SCANNER_TICK_SECONDS
+        self.warm_lookback_days = settings.SCANNER_WARM_LOOKBACK_DAYS
+        self.refresh_seconds = settings.SCANNER_TIER_REFRESH_SECONDS
+        # Leave room in the SEC budget for downloads and the S-1 RSS poll
+        self.budget_share = settings.SCANNER_POLL_BUDGET_SHARE
+
+        self.hot_ciks: Set[str] = set()
+        self.warm_ciks: Set[str] = set()
+        self.last_polled: Dict[str, float] = {}
+        self.last_refresh = 0.0
+
+    def tier_of(self, cik: str) -> str:
+        if cik in self.hot_ciks:
+            return HOT
+        if cik in self.warm_ciks:
+            return WARM
+        return COLD
+
+    def max_per_tick(self) -> int:
+        """How many CIKs one tick may poll without exceeding our budget share"""
+        return max(1, int(settings.SEC_REQUESTS_PER_SECOND * self.tick_seconds * self.budget_share))
+
+    def refresh_tiers(self, monitored_ciks: Set[str], force: bool = False):
+        """Rebuild hot/warm sets from earnings_calendar and recent 8-Ks"""
+        now = time.monotonic()
+        if not force and self.last_refresh and now - self.last_refresh < self.refresh_seconds:
+            return
+
+        db = SessionLocal()
+        try:
+            today = datetime.now(EST_TZ).date()
+            rows = db.query(Company.cik).join(
+                EarningsCalendar, EarningsCalendar.company_id == Company.id
+            ).filter(
+                EarningsCalendar.earnings_date >= today,
+                EarningsCalendar.earnings_date <= today + timedelta(days=1)
+            ).distinct().all()
+            hot = {r[0] for r in rows} & monitored_ciks
+
+            since = datetime.now(timezone.utc) - timedelta(days=self.warm_lookback_days)
+            rows = db.query(Company.cik).join(
+                Filing, Filing.company_id == Company.id
+            ).filter(
+                Filing.form_type == "8-K",
+                Filing.filing_date >= since
+            ).distinct().all()
+            warm = ({r[0] for r in rows} & monitored_ciks) - hot
+
+            self.hot_ciks = hot
+            self.warm_ciks = warm
+            self.last_refresh = now
+            logger.info(
+                f"Poll tiers refreshed: {len(hot)} hot (earnings today/tomorrow), "
+                f"{len(warm)} warm (recent 8-K), "
+                f"{len(monitored_ciks) - len(hot) - len(warm)} cold"
+            )
+        except Exception as e:
+            # Keep the previous tiers; retry on the next tick
+            logger.error(f"Error refreshing poll tiers: {e}")
+        finally:
+            db.close()
+
+    def promote(self, cik: str):
+        """A new 8-K was just seen - poll this CIK at the warm rate"""
+        if cik and cik not in self.hot_ciks:
+            self.warm_ciks.add(cik)
+
+    def due_ciks(self, monitored_ciks: Iterable[str]) -> List[str]:
+        """
+        CIKs whose tier interval has elapsed, most overdue first
+
+        Never-polled CIKs are due immediately, so a cold start begins with a
+        sweep that is spread over several ticks by the per-tick cap.
+        """
+        now = time.monotonic()
+        due = []
+        for cik in monitored_ciks:
+            last = self.last_polled.get(cik)
+            if last is None:
+                due.append((float("inf"), cik))
+                continue
+            interval = self.intervals[self.tier_of(cik)]
+            overdue = (now - last) / interval
+            if overdue >= 1:
+                due.append((overdue, cik))
+
+        due.sort(key=lambda x: x[0], reverse=True)
+        return [cik for _, cik in due[:self.max_per_tick()]]
+
+    def mark_polled(self, ciks: Iterable[str]):
+        now = time.monotonic()
+        for cik in ciks:
+            self.last_polled[cik] = now
+
+    def get_stats(self, monitored_count: int) -> Dict:
+        # Steady-state request rate if every tier is polled on schedule
+        cold = max(0, monitored_count - len(self.hot_ciks) - len(self.warm_ciks))
+        planned_rps = (
+            len(self.hot_ciks) / self.intervals[HOT]
+            + len(self.warm_ciks) / self.intervals[WARM]
+            + cold / self.intervals[COLD]
+        )
+        return {
+            "hot": len(self.hot_ciks),
+            "warm": len(self.warm_ciks),
+            "cold": cold,
+            "intervals": self.intervals,
+            "max_per_tick": self.max_per_tick(),
+            "planned_requests_per_second": round(planned_rps, 2),
+        }
+
+
+# Create singleton instance
+poll_planner = PollPlanner()
@@ -4,8 +4,16 @@ import logging
 from datetime import datetime, time
 from typing import Optional, Dict
 from app.services.edgar_scanner import edgar_scanner
+from app.services.poll_planner import poll_planner
+from app.services.shard_coordinator import shard_coordinator
+from app.services.company_directory import company_directory
+from app.services.ingestion_gate import ingestion_gate
+from app.services.extraction_pool import ExtractionPool
 from app.services.earnings_calendar_service import EarningsCalendarService
 from app.core.database import SessionLocal
+from app.core.rate_limiter import sec_rate_limiter
+from app.core.leader_election import LeaderElection
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -18,13 +26,45 @@ class FilingScheduler:
     - JSON submissions API for 8-K/10-Q/10-K (every 70s)
     - RSS for S-1 only (every 70s)
     - Daily earnings calendar update at 6 AM
+    - PENDING filings held back by ingestion backpressure re-admitted every minute
+    
+    Priority polling (SCANNER_PRIORITY_ENABLED, json mode):
+    - Tick every SCANNER_TICK_SECONDS; each tick polls only the CIKs due in
+      their tier (earnings today/tomorrow > recent 8-K > slow sweep)
+    
+    Firehose mode (SCANNER_MODE="firehose"):
+    - All-forms current feed every few seconds (8-K/10-Q/10-K/S-1)
+    - JSON sweep in the background only for reconciliation
+    
+    Every API worker/replica starts the scheduler, but with leader election
+    enabled only the holder of the Redis lease runs the scan loop; the
+    others stay on standby and take over when the lease expires.
+    
+    Sharded mode (SCANNER_SHARD_COUNT > 1) replaces the single leader:
+    every scanner runs the loop for the CIK shards it holds a lease on.
     """
     
     def __init__(self):
-        self.scan_interval = 70  # 70 seconds (JSON scan needs ~51s for 513 CIKs)
+        self.mode = settings.SCANNER_MODE
+        if self.mode == "firehose":
+            self.scan_interval = settings.SCANNER_FEED_INTERVAL_SECONDS
+        elif settings.SCANNER_PRIORITY_ENABLED:
+            self.scan_interval = settings.SCANNER_TICK_SECONDS
+        else:
+            self.scan_interval = 70  # 70 seconds (JSON scan needs ~51s for 513 CIKs)
+        self.reconcile_interval = settings.SCANNER_RECONCILE_INTERVAL_SECONDS
+        self.last_reconcile: Optional[datetime] = None
+        self.reconcile_task: Optional[asyncio.Task] = None
         self.is_running = False
         self.task: Optional[asyncio.Task] = None
         self.scan_count = 0
+        
+        # Leader election (one active scan loop cluster-wide)
+        self.sharded = shard_coordinator.enabled
+        self.election_enabled = settings.SCHEDULER_LEADER_ELECTION_ENABLED and not self.sharded
+        self.heartbeat_interval = settings.SCHEDULER_LEADER_HEARTBEAT_SECONDS
+        self.leader = LeaderElection("scheduler", lease_seconds=settings.SCHEDULER_LEADER_LEASE_SECONDS)
+        self.election_task: Optional[asyncio.Task] = None
         self.filings_found = 0
         self.last_calendar_update = None
         self.calendar_update_hour = 6  # Update calendar at 6 AM daily
@@ -36,24 +76,95 @@ class FilingScheduler:
             return
         
         self.is_running = True
-        self.task = asyncio.create_task(self._run_scheduler())
-        logger.info(f"📡 Scheduler started (v2 JSON+RSS mode - {self.scan_interval}s intervals)")
+        if self.sharded:
+            self.election_task = asyncio.create_task(self._run_shard_heartbeat())
+            logger.info(
+                f"📡 Scheduler started as {shard_coordinator.node_id} - "
+                f"claiming shards of {shard_coordinator.shard_count}"
+            )
+        elif self.election_enabled:
+            self.election_task = asyncio.create_task(self._run_election())
+            logger.info(f"📡 Scheduler started as {self.leader.node_id} - waiting for leader lease")
+        else:
+            self.task = asyncio.create_task(self._run_scheduler())
+            logger.info(f"📡 Scheduler started ({self._mode_label()} mode - {self.scan_interval}s intervals)")
         
     async def stop(self):
         """Stop the scheduler"""
         self.is_running = False
+        if self.election_task:
+            self.election_task.cancel()
+            try:
+                await self.election_task
+            except asyncio.CancelledError:
+                pass
+        await self._stop_scan_loop()
+        if self.election_enabled:
+            self.leader.release()
+        if self.sharded:
+            shard_coordinator.release_all()
+        logger.info(f"Filing scheduler stopped. Total scans: {self.scan_count}, Filings found: {self.filings_found}")
+    
+    @property
+    def is_active(self) -> bool:
+        """Whether this process is the one running the scan loop"""
+        return self.task is not None and not self.task.done()
+    
+    async def _stop_scan_loop(self):
+        if self.reconcile_task and not self.reconcile_task.done():
+            self.reconcile_task.cancel()
         if self.task:
             self.task.cancel()
             try:
                 await self.task
             except asyncio.CancelledError:
                 pass
-        logger.info(f"Filing scheduler stopped. Total scans: {self.scan_count}, Filings found: {self.filings_found}")
+            self.task = None
+    
+    async def _run_election(self):
+        """Heartbeat the leader lease; run the scan loop only while we hold it"""
+        while self.is_running:
+            try:
+                is_leader = self.leader.heartbeat()
+                if is_leader and not self.is_active:
+                    logger.info(
+                        f"📡 Leader {self.leader.node_id} (token {self.leader.token}) starting scan loop "
+                        f"({self._mode_label()} mode - {self.scan_interval}s intervals)"
+                    )
+                    self.task = asyncio.create_task(self._run_scheduler())
+                elif not is_leader and self.is_active:
+                    logger.warning(f"Leadership lost - stopping scan loop on {self.leader.node_id}")
+                    await self._stop_scan_loop()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in leader election loop: {e}", exc_info=True)
+            await asyncio.sleep(self.heartbeat_interval)
+    
+    async def _run_shard_heartbeat(self):
+        """Keep our CIK shard leases; run the scan loop while we hold any"""
+        while self.is_running:
+            try:
+                owned = shard_coordinator.heartbeat()
+                if owned and not self.is_active:
+                    logger.info(f"📡 Holding shards {owned} - starting scan loop ({self._mode_label()} mode)")
+                    self.task = asyncio.create_task(self._run_scheduler())
+                elif not owned and self.is_active:
+                    logger.warning("No shards held - stopping scan loop")
+                    await self._stop_scan_loop()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in shard heartbeat loop: {e}", exc_info=True)
+            await asyncio.sleep(self.heartbeat_interval)
         
     async def _run_scheduler(self):
         """Main scheduler loop"""
         logger.info("Scheduler loop started (JSON+RSS mode)")
         
+        # Warm the CIK directory before the first scan
+        company_directory.ensure_loaded()
+        
         # Run initial scan immediately
         await self._perform_scan()
         
@@ -81,18 +192,62 @@ class FilingScheduler:
                 # Continue running even if there's an error
                 await asyncio.sleep(self.scan_interval)
     
+    def _mode_label(self) -> str:
+        if self.mode == "firehose":
+            return f"firehose feed + JSON reconcile every {self.reconcile_interval}s"
+        if settings.SCANNER_PRIORITY_ENABLED:
+            return "v2 JSON+RSS, earnings-priority tiers"
+        return "v2 JSON+RSS"
+    
+    def _reconcile_due(self) -> bool:
+        """Whether a per-CIK JSON reconciliation sweep should start (firehose mode)"""
+        if self.reconcile_task and not self.reconcile_task.done():
+            return False
+        if self.last_reconcile is None or edgar_scanner.reconcile_requested:
+            return True
+        return (datetime.now() - self.last_reconcile).total_seconds() >= self.reconcile_interval
+    
+    async def _run_reconcile(self):
+        """Background JSON sweep so feed polling continues meanwhile"""
+        self.last_reconcile = datetime.now()
+        try:
+            new_filings = await edgar_scanner.scan_for_new_filings(full_sweep=True)
+            self.filings_found += len(new_filings)
+            if new_filings:
+                logger.info(f"Reconciliation sweep found {len(new_filings)} filings missed by the feed")
+        except Exception as e:
+            logger.error(f"Error during reconciliation sweep: {e}", exc_info=True)
+    
     async def _perform_scan(self):
         """Perform a single scan"""
+        # Fencing: a paused ex-leader must not scan after its lease was taken over
+        if self.election_enabled and not self.leader.check_fence():
+            logger.warning(f"Skipping scan - {self.leader.node_id} no longer holds the leader lease")
+            return
+        if self.sharded and not shard_coordinator.check_fences():
+            logger.warning("Skipping scan - all shard leases lost")
+            return
+        
         self.scan_count += 1
         scan_start = datetime.now()
         
         try:
-            # Run the scanner (logging handled by edgar_scanner)
-            new_filings = await edgar_scanner.scan_for_new_filings()
+            if self.mode == "firehose":
+                if self._reconcile_due():
+                    self.reconcile_task = asyncio.create_task(self._run_reconcile())
+                # The current feed is not partitioned: only the shard-0 holder polls it
+                new_filings = await edgar_scanner.scan_current_feed() if shard_coordinator.owns_global_work else []
+            else:
+                # Run the scanner (logging handled by edgar_scanner)
+                new_filings = await edgar_scanner.scan_for_new_filings()
             
             # Update statistics
             self.filings_found += len(new_filings)
             
+            # Re-admit filings held back while the processing queue was saturated
+            if shard_coordinator.owns_global_work and ingestion_gate.drain_due():
+                await asyncio.to_thread(ingestion_gate.drain_pending)
+            
             # Only log summary if new filings found (avoid duplicate logs)
             scan_duration = (datetime.now() - scan_start).total_seconds()
             
@@ -139,6 +294,9 @@ class FilingScheduler:
             # Update timestamp
             self.last_calendar_update = datetime.now()
             
+            # New earnings dates change which companies are polled hot
+            poll_planner.refresh_tiers(edgar_scanner.monitored_ciks, force=True)
+            
             # Log results
             duration = (datetime.now() - update_start).total_seconds()
             logger.info(
@@ -157,7 +315,7 @@ class FilingScheduler:
         
         try:
             scan_start = datetime.now()
-            new_filings = await edgar_scanner.scan_for_new_filings()
+            new_filings = await edgar_scanner.scan_for_new_filings(full_sweep=True)
             scan_duration = (datetime.now() - scan_start).total_seconds()
             
             logger.info(
@@ -197,12 +355,21 @@ class FilingScheduler:
         """Get scheduler status"""
         return {
             "is_running": self.is_running,
+            "is_active": self.is_active,
             "scan_interval_seconds": self.scan_interval,
             "total_scans": self.scan_count,
             "total_filings_found": self.filings_found,
-            "mode": "v2 JSON+RSS (70s)",
+            "mode": f"{self._mode_label()} ({self.scan_interval}s)",
+            "last_reconcile": self.last_reconcile.isoformat() if self.last_reconcile else None,
             "last_calendar_update": self.last_calendar_update.isoformat() if self.last_calendar_update else None,
-            "calendar_update_hour": self.calendar_update_hour
+            "calendar_update_hour": self.calendar_update_hour,
+            "leader_election": self.leader.get_status() if self.election_enabled else {"enabled": False},
+            "shards": shard_coordinator.get_status(),
+            "company_directory": company_directory.get_stats(),
+            "poll_tiers": poll_planner.get_stats(len(edgar_scanner.monitored_ciks)),
+            "ingestion": ingestion_gate.get_stats(),
+            "extraction_pool": ExtractionPool.cluster_stats(),
+            "sec_rate_limiter": sec_rate_limiter.get_stats()
         }
 
 
@@ -1,11 +1,17 @@
 import httpx
 import asyncio
-import feedparser
+import json
 import re
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta, timezone
 import logging
+from app.core.cache import cache
 from app.core.config import settings
+from app.core.rate_limiter import sec_rate_limiter
+from app.services.sec_http import sec_http_client
+from app.services.etag_store import etag_store
+from app.services.atom_stream import AtomEntryStream, entry_accession
+from app.services.submissions_decoder import decode_recent
 
 logger = logging.getLogger(__name__)
 
@@ -25,48 +31,82 @@ class SECClient:
     """
     
     def __init__(self):
-        self.base_url = "https://data.sec.gov"
+        self.base_url = settings.SEC_DATA_URL
         self.headers = {
             "User-Agent": settings.SEC_USER_AGENT,
             "Accept": "application/json",
-            "Host": "data.sec.gov"
         }
         # Rate limiting: 10 requests per second
-        self.rate_limit_delay = 0.1  # 100ms between requests
-        self.last_request_time = datetime.min
+        # Shared with FilingDownloader and every other worker (Redis token bucket)
+        self.rate_limit_delay = 1.0 / settings.SEC_REQUESTS_PER_SECOND
+        self.rate_limiter = sec_rate_limiter
+        
+        # Max submissions requests in flight during a batch scan
+        self.scan_concurrency = settings.SEC_SCAN_CONCURRENCY
         
         # ETag cache for JSON submissions (reduces bandwidth)
-        self.etag_cache: Dict[str, str] = {}  # {cik: etag}
+        # Persisted in Redis (disk fallback) so restarts and replicas get 304s too
+        self.etag_store = etag_store
         
         # Supported form types for JSON scanning
         self.json_supported_forms = {"10-K", "10-Q", "8-K"}
         
-    async def _rate_limit(self):
-        """Ensure we don't exceed SEC rate limits"""
-        now = datetime.now()
-        time_since_last = (now - self.last_request_time).total_seconds()
+        # Submissions JSON: only the newest entries of filings.recent are decoded
+        self.submissions_recent_limit = 3
+        self.submissions_recent_fields = ("accessionNumber", "filingDate", "form", "primaryDocument")  # SEC order
         
-        if time_since_last < self.rate_limit_delay:
-            await asyncio.sleep(self.rate_limit_delay - time_since_last)
+        # RSS last-seen cursor per form type (Redis, local copy as fallback)
+        self.rss_cursor_prefix = "sec:rss_cursor:"
+        self.rss_cursor_size = 20
+        self.rss_cursor_ttl = 7 * 24 * 3600
+        self._rss_cursors: Dict[str, List[str]] = {}
         
-        self.last_request_time = datetime.now()
+    async def _rate_limit(self):
+        """Ensure we don't exceed SEC rate limits (shared budget, safe under concurrency)"""
+        await self.rate_limiter.acquire()
     
-    async def get_rss_filings(self, form_type: str = "S-1", lookback_minutes: int = 60) -> List[Dict]:
+    async def get_rss_filings(self, form_type: str = "S-1", lookback_minutes: int = 60,
+                              use_cursor: bool = True) -> List[Dict]:
         """
         Get filings from SEC RSS feed - NOW ONLY USED FOR S-1 (IPO) DISCOVERY
         
         Note: 8-K/10-Q/10-K now use JSON submissions API for reliability.
         RSS is kept only for S-1 because IPO companies have unknown CIKs.
         
+        The cursor advances as soon as the feed is read. Callers that store
+        the filings should use poll_rss_filings() and save the cursor only
+        once the filings are committed.
+        
         Args:
             form_type: "S-1" (primary use case) or "all" for backward compatibility
             lookback_minutes: How many minutes to look back (for filtering)
+            use_cursor: Stop at the last entry seen by the previous poll (persisted
+                in Redis). False re-reads the whole page (reconciliation sweeps).
             
         Returns:
             List of recent filings from RSS
         """
+        result = await self.poll_rss_filings(form_type, lookback_minutes, use_cursor)
+        self.save_rss_cursors(result["cursors"])
+        return result["filings"]
+    
+    async def poll_rss_filings(self, form_type: str = "S-1", lookback_minutes: int = 60,
+                               use_cursor: bool = True) -> Dict:
+        """
+        Read the RSS feed without advancing the persisted cursor
+        
+        Args:
+            form_type: "S-1" (primary use case) or "all"
+            lookback_minutes: How many minutes to look back (for filtering)
+            use_cursor: Stop at the last entry seen by the previous poll
+            
+        Returns:
+            Dict with the parsed filings and the new cursor per form type
+            (pass it to save_rss_cursors() once the filings are stored)
+        """
+        cursors: Dict[str, List[str]] = {}
         # Build RSS URL - filter for company filings only
-        base_rss_url = "https://www.sec.gov/cgi-bin/browse-edgar"
+        base_rss_url = f"{settings.SEC_BASE_URL}/cgi-bin/browse-edgar"
         params = {
             "action": "getcurrent",
             "owner": "exclude",  # Exclude individual ownership reports
@@ -95,49 +135,31 @@ class SECClient:
             all_filings = []
             
             # If "all", fetch each type separately for better results
-            if form_type == "all":
-                form_types_to_check = ["10-K", "10-Q", "8-K","S-1"]
-                for specific_form in form_types_to_check:
+            forms_to_check = ["10-K", "10-Q", "8-K", "S-1"] if form_type == "all" else [form_type]
+            for specific_form in forms_to_check:
+                if form_type == "all":
                     params["type"] = specific_form
-                    param_str = "&".join(f"{k}={v}" for k, v in params.items())
-                    rss_url = f"{base_rss_url}?{param_str}"
-                    
-                    logger.info(f"Fetching {specific_form} filings from: {rss_url}")
-                    
-                    async with httpx.AsyncClient() as client:
-                        response = await client.get(
-                            rss_url,
-                            headers={
-                                "User-Agent": settings.SEC_USER_AGENT,
-                                "Accept": "application/atom+xml,application/xml,text/xml;q=0.9,*/*;q=0.8"
-                            },
-                            timeout=30.0
-                        )
-                        
-                        if response.status_code == 200:
-                            feed = feedparser.parse(response.text)
-                            if hasattr(feed, 'entries'):
-                                all_filings.extend(feed.entries)
-                                logger.info(f"Found {len(feed.entries)} {specific_form} entries")
-            else:
-                # Single form type
                 param_str = "&".join(f"{k}={v}" for k, v in params.items())
                 rss_url = f"{base_rss_url}?{param_str}"
                 
-                async with httpx.AsyncClient() as client:
-                    response = await client.get(
-                        rss_url,
-                        headers={
-                            "User-Agent": settings.SEC_USER_AGENT,
-                            "Accept": "application/atom+xml,application/xml,text/xml;q=0.9,*/*;q=0.8"
-                        },
-                        timeout=30.0
-                    )
-                    response.raise_for_status()
-                    
-                    feed = feedparser.parse(response.text)
-                    if hasattr(feed, 'entries'):
-                        all_filings = feed.entries
+                # Stop parsing at the newest entry the previous poll already saw
+                cursor = self._load_rss_cursor(specific_form) if use_cursor else []
+                try:
+                    entries, reached_cursor = await self._stream_feed_entries(rss_url, set(cursor))
+                except httpx.HTTPStatusError as e:
+                    if form_type != "all":
+                        raise
+                    logger.warning(f"Skipping {specific_form} feed: HTTP {e.response.status_code}")
+                    continue
+                
+                all_filings.extend(entries)
+                cursors[specific_form] = [entry_accession(e) for e in entries] + cursor
+                
+                if reached_cursor and not entries:
+                    logger.debug(f"No new {specific_form} entries since last poll")
+                else:
+                    logger.info(f"Found {len(entries)} new {specific_form} entries"
+                               f"{' (stopped at cursor)' if reached_cursor else ''}")
             
             logger.info(f"Total entries to process: {len(all_filings)}")
             
@@ -155,150 +177,24 @@ class SECClient:
             
             for entry in all_filings:
                 try:
-                    # Parse entry title
-                    title = entry.get('title', '')
-                    if not title:
+                    filing_data = self._parse_rss_entry(entry)
+                    if not filing_data:
                         continue
                     
-                    # Enhanced regex patterns to handle various formats including (Filer) suffix
-                    patterns = [
-                        # Pattern 1: Form - Company (CIK) (Filer/Subject/etc)
-                        r'^([\w\-/]+)\s*-\s*(.+?)\s*\((\d{1,10})\)(?:\s*\([^)]+\))*$',
-                        # Pattern 2: Form - Company (CIK)
-                        r'^([\w\-/]+)\s*-\s*(.+?)\s*\((\d{1,10})\)$',
-                        # Pattern 3: Form - Company without CIK
-                        r'^([\w\-/]+)\s*-\s*(.+?)$'
-                    ]
-                    
-                    title_match = None
-                    for pattern in patterns:
-                        title_match = re.match(pattern, title)
-                        if title_match:
-                            break
-                    
-                    if not title_match:
-                        # Log more details for debugging
-                        logger.warning(f"Could not parse title format: '{title}'")
-                        continue
-                    
-                    form = title_match.group(1).strip()
-                    company_name = title_match.group(2).strip()
-                    
-                    # Clean up company name - remove any trailing suffixes
-                    company_name = re.sub(r'\s*\([^)]*\)\s*$', '', company_name).strip()
-                    
-                    # Get CIK from match or from link
-                    cik = None
-                    if title_match.lastindex >= 3:
-                        cik = title_match.group(3).zfill(10)
-                    else:
-                        # Try to extract from link
-                        link = entry.get('link', '')
-                        cik_match = re.search(r'CIK=(\d+)', link)
-                        if cik_match:
-                            cik = cik_match.group(1).zfill(10)
-                    
-                    if not cik:
-                        # Try one more place - the summary field
-                        summary = entry.get('summary', '')
-                        cik_match = re.search(r'CIK[:\s]+(\d+)', summary)
-                        if cik_match:
-                            cik = cik_match.group(1).zfill(10)
-                        else:
-                            logger.warning(f"Could not find CIK for: '{title}'")
-                            continue
-                    
-                    # Handle form variants (10-K/A, 8-K/A, etc.)
-                    base_form = form.split('/')[0]
-                    
-                    # Only process forms we care about
-                    if base_form not in ["10-K", "10-Q", "8-K", "S-1"]:
-                        # Also check for special 8-K variants
-                        if not form.startswith("8-K"):
-                            continue
-                    
-                    # Extract accession number from link
-                    link = entry.get('link', '')
-                    acc_match = re.search(
-                        r'AccessionNumber=(\d{10}-\d{2}-\d{6})',
-                        link
-                    )
-                    
-                    if not acc_match:
-                        # Try alternative pattern
-                        acc_match = re.search(
-                            r'(\d{10}-\d{2}-\d{6})',
-                            link
-                        )
-                    
-                    accession_number = acc_match.group(1) if acc_match else ""
-                    
-                    # Parse date - try multiple formats
-                    published = entry.get('published', entry.get('updated', ''))
-                    filed_datetime = None
-                    
-                    logger.debug(f"📅 Parsing date for: {company_name} ({cik})")
-                    logger.debug(f"   Published string: {published}")
-                    
-                    date_formats = [
-                        '%a, %d %b %Y %H:%M:%S %Z',  # Mon, 23 Jun 2025 16:30:00 EDT
-                        '%Y-%m-%dT%H:%M:%S%z',       # 2025-06-23T16:30:00-04:00
-                        '%Y-%m-%dT%H:%M:%S',         # 2025-06-23T16:30:00
-                        '%Y-%m-%d %H:%M:%S',         # 2025-06-23 16:30:00
-                    ]
-                    
-                    for fmt in date_formats:
-                        try:
-                            # Handle timezone abbreviations
-                            date_str = published.replace('EDT', '-0400').replace('EST', '-0500')
-                            date_str = date_str.replace('PDT', '-0700').replace('PST', '-0800')
-                            filed_datetime = datetime.strptime(date_str, fmt)
-                            logger.debug(f"   ✅ Parsed with format: {fmt}")
-                            logger.debug(f"   Parsed datetime: {filed_datetime}")
-                            break
-                        except:
-                            continue
-                    
-                    if not filed_datetime:
-                        # Use current time as fallback
-                        filed_datetime = datetime.now()
-                        logger.warning(f"⚠️  Could not parse date for {company_name}: {published}, using current time")
-                    
-                    # CRITICAL FIX: Convert to UTC for timezone-aware comparison
-                    # Don't remove timezone info - convert to UTC instead
-                    if filed_datetime.tzinfo:
-                        # Convert to UTC
-                        filed_datetime_utc = filed_datetime.astimezone(timezone.utc)
-                    else:
-                        # Naive datetime - assume it's already in UTC
-                        filed_datetime_utc = filed_datetime.replace(tzinfo=timezone.utc)
-                    
-                    # Skip if older than lookback period (both are now UTC timezone-aware)
+                    # Skip if older than lookback period (both are UTC)
+                    filed_datetime_utc = filing_data['filing_datetime'].replace(tzinfo=timezone.utc)
                     if filed_datetime_utc < cutoff_time:
                         # Only log at debug level to reduce noise
-                        logger.debug(f"Filtered out (too old): {form} - {company_name} (CIK: {cik}), filed {filed_datetime_utc}")
+                        logger.debug(
+                            f"Filtered out (too old): {filing_data['form']} - {filing_data['company_name']} "
+                            f"(CIK: {filing_data['cik']}), filed {filed_datetime_utc}"
+                        )
                         continue
                     
-                    # Successfully parsed filing
-                    # Store as naive datetime for filing_datetime field (backward compatibility)
-                    filing_datetime_naive = filed_datetime_utc.replace(tzinfo=None)
-                    
-                    filing_data = {
-                        "cik": cik,
-                        "form": form,
-                        "company_name": company_name,
-                        "filing_date": filing_datetime_naive.strftime('%Y-%m-%d'),
-                        "filing_datetime": filing_datetime_naive,
-                        "accession_number": accession_number,
-                        "primary_document": "",  # Will get from detail API if needed
-                        "rss_link": link,
-                        "summary": entry.get('summary', '')[:200]  # First 200 chars
-                    }
-                    
                     filings.append(filing_data)
                     
                     # Log successful parsing at debug level
-                    logger.debug(f"Parsed: {form} - {company_name} (CIK: {cik})")
+                    logger.debug(f"Parsed: {filing_data['form']} - {filing_data['company_name']} (CIK: {filing_data['cik']})")
                     
                 except Exception as e:
                     logger.error(f"Error parsing RSS entry: {e}", exc_info=True)
@@ -318,14 +214,327 @@ class SECClient:
                     form_counts[form_type] = form_counts.get(form_type, 0) + 1
                 logger.debug(f"Filing breakdown: {form_counts}")
             
-            return filings
+            return {"filings": filings, "cursors": cursors}
             
         except httpx.HTTPError as e:
             logger.error(f"Error fetching RSS feed: {e}")
-            return []
+            return {"filings": [], "cursors": {}}
         except Exception as e:
             logger.error(f"Unexpected error in RSS parsing: {e}", exc_info=True)
+            return {"filings": [], "cursors": {}}
+    
+    def _load_rss_cursor(self, form_type: str) -> List[str]:
+        """Accessions at the top of the feed as of the previous poll (newest first)"""
+        key = f"{self.rss_cursor_prefix}{form_type}"
+        try:
+            raw = cache.redis_client.get(key)
+            if raw:
+                return json.loads(raw)
             return []
+        except Exception as e:
+            logger.debug(f"RSS cursor unavailable in Redis, using local copy: {e}")
+            return self._rss_cursors.get(form_type, [])
+    
+    def save_rss_cursors(self, cursors: Dict[str, List[Optional[str]]]):
+        """Persist cursors returned by poll_rss_filings()"""
+        for form_type, accessions in cursors.items():
+            self._save_rss_cursor(form_type, accessions)
+    
+    def _save_rss_cursor(self, form_type: str, accessions: List[Optional[str]]):
+        # Several accessions, so the cursor survives the newest entry being pulled from the feed
+        cursor = list(dict.fromkeys(a for a in accessions if a))[:self.rss_cursor_size]
+        self._rss_cursors[form_type] = cursor
+        try:
+            cache.redis_client.set(f"{self.rss_cursor_prefix}{form_type}", json.dumps(cursor),
+                                   ex=self.rss_cursor_ttl)
+        except Exception as e:
+            logger.debug(f"Could not persist RSS cursor: {e}")
+    
+    async def _stream_feed_entries(self, rss_url: str, stop_accessions: Optional[set] = None) -> Tuple[List[Dict], bool]:
+        """
+        Stream one atom feed page, parsing entries as they arrive
+        
+        Reading stops (and the connection is closed) at the first entry whose
+        accession is in stop_accessions, so an unchanged feed costs one entry
+        of parsing.
+        
+        Returns:
+            (entries newer than the cursor, newest first; whether the cursor was reached)
+        """
+        entries = []
+        reached_cursor = False
+        stream = AtomEntryStream()
+        
+        def collect(batch: List[Dict]) -> bool:
+            for entry in batch:
+                if stop_accessions and entry_accession(entry) in stop_accessions:
+                    return True
+                entries.append(entry)
+            return False
+        
+        await self._rate_limit()
+        client = sec_http_client.get_client()
+        async with client.stream(
+            "GET",
+            rss_url,
+            headers={
+                "User-Agent": settings.SEC_USER_AGENT,
+                "Accept": "application/atom+xml,application/xml,text/xml;q=0.9,*/*;q=0.8"
+            },
+            timeout=30.0
+        ) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                reached_cursor = collect(stream.feed(chunk))
+                if reached_cursor:
+                    break
+        
+        if not reached_cursor:
+            reached_cursor = collect(stream.close())
+        
+        logger.debug(f"Parsed {stream.entries_parsed} feed entries, {len(entries)} new")
+        return entries, reached_cursor
+    
+    def _parse_rss_entry(self, entry) -> Optional[Dict]:
+        """
+        Parse one browse-edgar atom entry into filing data
+        
+        Returns:
+            Filing dict (filing_datetime is naive UTC) or None if the entry
+            is unparseable or not a form we track
+        """
+        # Parse entry title
+        title = entry.get('title', '')
+        if not title:
+            return None
+        
+        # Enhanced regex patterns to handle various formats including (Filer) suffix
+        patterns = [
+            # Pattern 1: Form - Company (CIK) (Filer/Subject/etc)
+            r'^([\w\-/]+)\s*-\s*(.+?)\s*\((\d{1,10})\)(?:\s*\([^)]+\))*$',
+            # Pattern 2: Form - Company (CIK)
+            r'^([\w\-/]+)\s*-\s*(.+?)\s*\((\d{1,10})\)$',
+            # Pattern 3: Form - Company without CIK
+            r'^([\w\-/]+)\s*-\s*(.+?)$'
+        ]
+        
+        title_match = None
+        for pattern in patterns:
+            title_match = re.match(pattern, title)
+            if title_match:
+                break
+        
+        if not title_match:
+            # Log more details for debugging
+            logger.warning(f"Could not parse title format: '{title}'")
+            return None
+        
+        form = title_match.group(1).strip()
+        company_name = title_match.group(2).strip()
+        
+        # Clean up company name - remove any trailing suffixes
+        company_name = re.sub(r'\s*\([^)]*\)\s*$', '', company_name).strip()
+        
+        # Get CIK from match or from link
+        cik = None
+        if title_match.lastindex >= 3:
+            cik = title_match.group(3).zfill(10)
+        else:
+            # Try to extract from link
+            link = entry.get('link', '')
+            cik_match = re.search(r'CIK=(\d+)', link)
+            if cik_match:
+                cik = cik_match.group(1).zfill(10)
+        
+        if not cik:
+            # Try one more place - the summary field
+            summary = entry.get('summary', '')
+            cik_match = re.search(r'CIK[:\s]+(\d+)', summary)
+            if cik_match:
+                cik = cik_match.group(1).zfill(10)
+            else:
+                logger.warning(f"Could not find CIK for: '{title}'")
+                return None
+        
+        # Handle form variants (10-K/A, 8-K/A, etc.)
+        base_form = form.split('/')[0]
+        
+        # Only process forms we care about
+        if base_form not in ["10-K", "10-Q", "8-K", "S-1"]:
+            # Also check for special 8-K variants
+            if not form.startswith("8-K"):
+                return None
+        
+        # Extract accession number from link
+        link = entry.get('link', '')
+        acc_match = re.search(
+            r'AccessionNumber=(\d{10}-\d{2}-\d{6})',
+            link
+        )
+        
+        if not acc_match:
+            # Try alternative pattern
+            acc_match = re.search(
+                r'(\d{10}-\d{2}-\d{6})',
+                link
+            )
+        
+        accession_number = acc_match.group(1) if acc_match else ""
+        
+        # Parse date - try multiple formats
+        published = entry.get('published', entry.get('updated', ''))
+        filed_datetime = None
+        
+        logger.debug(f"📅 Parsing date for: {company_name} ({cik})")
+        logger.debug(f"   Published string: {published}")
+        
+        date_formats = [
+            '%a, %d %b %Y %H:%M:%S %Z',  # Mon, 23 Jun 2025 16:30:00 EDT
+            '%Y-%m-%dT%H:%M:%S%z',       # 2025-06-23T16:30:00-04:00
+            '%Y-%m-%dT%H:%M:%S',         # 2025-06-23T16:30:00
+            '%Y-%m-%d %H:%M:%S',         # 2025-06-23 16:30:00
+        ]
+        
+        for fmt in date_formats:
+            try:
+                # Handle timezone abbreviations
+                date_str = published.replace('EDT', '-0400').replace('EST', '-0500')
+                date_str = date_str.replace('PDT', '-0700').replace('PST', '-0800')
+                filed_datetime = datetime.strptime(date_str, fmt)
+                logger.debug(f"   ✅ Parsed with format: {fmt}")
+                logger.debug(f"   Parsed datetime: {filed_datetime}")
+                break
+            except:
+                continue
+        
+        if not filed_datetime:
+            # Use current time as fallback
+            filed_datetime = datetime.now()
+            logger.warning(f"⚠️  Could not parse date for {company_name}: {published}, using current time")
+        
+        # CRITICAL FIX: Convert to UTC for timezone-aware comparison
+        # Don't remove timezone info - convert to UTC instead
+        if filed_datetime.tzinfo:
+            # Convert to UTC
+            filed_datetime_utc = filed_datetime.astimezone(timezone.utc)
+        else:
+            # Naive datetime - assume it's already in UTC
+            filed_datetime_utc = filed_datetime.replace(tzinfo=timezone.utc)
+        
+        # Successfully parsed filing
+        # Store as naive datetime for filing_datetime field (backward compatibility)
+        filing_datetime_naive = filed_datetime_utc.replace(tzinfo=None)
+        
+        filing_data = {
+            "cik": cik,
+            "form": form,
+            "company_name": company_name,
+            "filing_date": filing_datetime_naive.strftime('%Y-%m-%d'),
+            "filing_datetime": filing_datetime_naive,
+            "accession_number": accession_number,
+            "primary_document": "",  # Will get from detail API if needed
+            "rss_link": link,
+            "summary": entry.get('summary', '')[:200]  # First 200 chars
+        }
+        
+        return filing_data
+    
+    async def _fetch_current_feed(self, form_type: str = "", start: int = 0, count: int = 100,
+                                  stop_accessions: Optional[set] = None) -> Tuple[List[Dict], bool]:
+        """
+        Fetch one page of the browse-edgar "getcurrent" atom feed
+        
+        Args:
+            form_type: Form filter ("" = all forms)
+            start: Offset into the feed (newest first)
+            count: Entries per page (EDGAR max is 100)
+            stop_accessions: Stop reading at the first of these (the cursor)
+            
+        Returns:
+            (feed entries newest first, whether a stop accession was reached)
+        """
+        params = {
+            "action": "getcurrent",
+            "owner": "exclude",
+            "type": form_type,
+            "output": "atom",
+            "count": str(count),
+            "start": str(start)
+        }
+        param_str = "&".join(f"{k}={v}" for k, v in params.items())
+        rss_url = f"{settings.SEC_BASE_URL}/cgi-bin/browse-edgar?{param_str}"
+        
+        return await self._stream_feed_entries(rss_url, stop_accessions)
+    
+    async def get_current_filings(self, seen_accessions: Optional[set] = None, max_pages: int = 3) -> Dict:
+        """
+        Firehose poll: all-forms current feed, newest first, down to the last-seen cursor
+        
+        One request normally covers everything filed since the previous poll.
+        If the cursor is not reached within max_pages (burst or long pause),
+        "gap" is set so the caller can run a per-CIK JSON reconciliation sweep.
+        
+        Args:
+            seen_accessions: Accession numbers returned by previous polls (the cursor)
+            max_pages: Max 100-entry pages to walk before giving up on the cursor
+            
+        Returns:
+            Dict with filings newer than the cursor, the accessions of every
+            entry read (tracked forms or not, newest first, for the cursor),
+            gap flag and page count
+        """
+        filings = []
+        accessions = []
+        batch_accessions = set()
+        reached_cursor = False
+        pages = 0
+        
+        try:
+            for page in range(max_pages):
+                entries, reached_cursor = await self._fetch_current_feed(
+                    start=page * 100, stop_accessions=seen_accessions
+                )
+                pages += 1
+                
+                for entry in entries:
+                    # Untracked forms (Form 4, 13F, ...) still move the cursor
+                    entry_acc = entry_accession(entry)
+                    if entry_acc:
+                        if seen_accessions and entry_acc in seen_accessions:
+                            reached_cursor = True
+                            break
+                        if entry_acc not in accessions:
+                            accessions.append(entry_acc)
+                    try:
+                        filing_data = self._parse_rss_entry(entry)
+                    except Exception as e:
+                        logger.debug(f"Skipping unparseable feed entry: {e}")
+                        continue
+                    if not filing_data or not filing_data.get("accession_number"):
+                        continue
+                    
+                    accession = filing_data["accession_number"]
+                    if seen_accessions and accession in seen_accessions:
+                        reached_cursor = True
+                        break
+                    
+                    # Filer/subject entries repeat the same accession
+                    if accession not in batch_accessions:
+                        batch_accessions.add(accession)
+                        filings.append(filing_data)
+                
+                # No cursor yet (first poll): one page is enough
+                if reached_cursor or not seen_accessions or len(entries) < 100:
+                    break
+        except httpx.HTTPError as e:
+            logger.error(f"Error fetching current feed: {e}")
+            return {"filings": filings, "accessions": accessions, "gap": True, "pages": pages, "error": str(e)}
+        
+        gap = bool(seen_accessions) and not reached_cursor
+        if gap:
+            logger.warning(f"Current feed cursor not reached after {pages} page(s) - reconciliation needed")
+        
+        return {"filings": filings, "accessions": accessions, "gap": gap, "pages": pages}
     
     async def get_recent_submissions(self, lookback_minutes: int = 5) -> List[Dict]:
         """
@@ -350,30 +559,30 @@ class SECClient:
         # Pad CIK to 10 digits
         cik_padded = str(cik).zfill(10)
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}/submissions/CIK{cik_padded}.json",
-                    headers=self.headers,
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                
-                data = response.json()
-                return {
-                    "cik": data.get("cik"),
-                    "name": data.get("name"),
-                    "ticker": data.get("tickers", [None])[0] if data.get("tickers") else None,
-                    "sic": data.get("sic"),
-                    "sic_description": data.get("sicDescription"),
-                    "category": data.get("category"),
-                    "entity_type": data.get("entityType"),
-                    "website": data.get("website")
-                }
-                
-            except httpx.HTTPError as e:
-                logger.error(f"Error fetching company info for CIK {cik}: {e}")
-                return None
+        client = sec_http_client.get_client()
+        try:
+            response = await client.get(
+                f"{self.base_url}/submissions/CIK{cik_padded}.json",
+                headers=self.headers,
+                timeout=30.0
+            )
+            response.raise_for_status()
+            
+            data = response.json()
+            return {
+                "cik": data.get("cik"),
+                "name": data.get("name"),
+                "ticker": data.get("tickers", [None])[0] if data.get("tickers") else None,
+                "sic": data.get("sic"),
+                "sic_description": data.get("sicDescription"),
+                "category": data.get("category"),
+                "entity_type": data.get("entityType"),
+                "website": data.get("website")
+            }
+            
+        except httpx.HTTPError as e:
+            logger.error(f"Error fetching company info for CIK {cik}: {e}")
+            return None
     
     async def get_filing_details(self, accession_number: str, cik: str) -> Optional[Dict]:
         """
@@ -391,33 +600,33 @@ class SECClient:
         # Format accession number for URL (remove dashes)
         acc_no_clean = accession_number.replace("-", "")
         
-        async with httpx.AsyncClient() as client:
-            try:
-                # Get filing metadata
-                url = f"{self.base_url}/Archives/edgar/data/{cik}/{acc_no_clean}/index.json"
-                response = await client.get(url, headers=self.headers, timeout=30.0)
-                response.raise_for_status()
-                
-                data = response.json()
-                
-                # Find primary document
-                primary_doc = None
-                for doc in data.get("directory", {}).get("item", []):
-                    if doc.get("type") == "10-K" or doc.get("type") == "10-Q" or doc.get("type") == "8-K":
-                        primary_doc = doc.get("name")
-                        break
-                
-                return {
-                    "accession_number": accession_number,
-                    "cik": cik,
-                    "primary_document": primary_doc,
-                    "filing_date": data.get("filingDate"),
-                    "documents": data.get("directory", {}).get("item", [])
-                }
-                
-            except httpx.HTTPError as e:
-                logger.error(f"Error fetching filing details: {e}")
-                return None
+        client = sec_http_client.get_client()
+        try:
+            # Get filing metadata
+            url = f"{self.base_url}/Archives/edgar/data/{cik}/{acc_no_clean}/index.json"
+            response = await client.get(url, headers=self.headers, timeout=30.0)
+            response.raise_for_status()
+            
+            data = response.json()
+            
+            # Find primary document
+            primary_doc = None
+            for doc in data.get("directory", {}).get("item", []):
+                if doc.get("type") == "10-K" or doc.get("type") == "10-Q" or doc.get("type") == "8-K":
+                    primary_doc = doc.get("name")
+                    break
+            
+            return {
+                "accession_number": accession_number,
+                "cik": cik,
+                "primary_document": primary_doc,
+                "filing_date": data.get("filingDate"),
+                "documents": data.get("directory", {}).get("item", [])
+            }
+            
+        except httpx.HTTPError as e:
+            logger.error(f"Error fetching filing details: {e}")
+            return None
     
     async def search_companies(self, query: str) -> List[Dict]:
         """
@@ -431,168 +640,214 @@ class SECClient:
         """
         await self._rate_limit()
         
-        async with httpx.AsyncClient() as client:
-            try:
-                # Get company tickers mapping
-                response = await client.get(
-                    "https://www.sec.gov/files/company_tickers.json",
-                    headers=self.headers,
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                
-                data = response.json()
-                results = []
+        client = sec_http_client.get_client()
+        try:
+            # Get company tickers mapping
+            response = await client.get(
+                f"{settings.SEC_BASE_URL}/files/company_tickers.json",
+                headers=self.headers,
+                timeout=30.0
+            )
+            response.raise_for_status()
+            
+            data = response.json()
+            results = []
+            
+            # Search through the tickers
+            query_upper = query.upper()
+            for item in data.values():
+                ticker = item.get("ticker", "")
+                title = item.get("title", "")
                 
-                # Search through the tickers
-                query_upper = query.upper()
-                for item in data.values():
-                    ticker = item.get("ticker", "")
-                    title = item.get("title", "")
+                if query_upper in ticker or query_upper in title.upper():
+                    results.append({
+                        "cik": str(item.get("cik_str", "")).zfill(10),
+                        "name": title,
+                        "ticker": ticker
+                    })
                     
-                    if query_upper in ticker or query_upper in title.upper():
-                        results.append({
-                            "cik": str(item.get("cik_str", "")).zfill(10),
-                            "name": title,
-                            "ticker": ticker
-                        })
-                        
-                        if len(results) >= 10:
-                            break
-                
-                return results
-                
-            except httpx.HTTPError as e:
-                logger.error(f"Error searching companies: {e}")
-                return []
+                    if len(results) >= 10:
+                        break
+            
+            return results
+            
+        except httpx.HTTPError as e:
+            logger.error(f"Error searching companies: {e}")
+            return []
 
 
     # ==================== JSON Submissions API Methods ====================
     
-    async def get_company_submissions(self, cik: str) -> Optional[Dict]:
+    async def get_company_submissions(self, cik: str, client: Optional[httpx.AsyncClient] = None) -> Optional[Dict]:
         """
         Get recent filings for a single company via JSON submissions API
         
         Args:
             cik: Central Index Key (will be padded to 10 digits)
+            client: Optional HTTP client (defaults to the pooled EDGAR client)
             
         Returns:
             Dict with recent filings or None if failed
         """
+        client = client or sec_http_client.get_client()
+        
         await self._rate_limit()
         
         cik_padded = str(cik).zfill(10)
         url = f"{self.base_url}/submissions/CIK{cik_padded}.json"
         
-        # Prepare headers with ETag if cached
+        # Prepare headers with ETag / Last-Modified if cached
         headers = self.headers.copy()
-        cached_etag = self.etag_cache.get(cik_padded)
-        if cached_etag:
-            headers["If-None-Match"] = cached_etag
+        cached = self.etag_store.get(cik_padded)
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
         
-        async with httpx.AsyncClient() as client:
+        try:
+            response = await client.get(url, headers=headers, timeout=30.0)
+            
+            # 304 Not Modified - no changes, replay the filings seen with this ETag
+            if response.status_code == 304:
+                self.etag_store.mark_not_modified(cik_padded)
+                return {
+                    "status": "not_modified",
+                    "cik": cik_padded,
+                    "filings": cached.get("filings", []) if cached else []
+                }
+            
+            response.raise_for_status()
+            
+            # Decode only the newest entries of filings.recent (full decode as fallback)
             try:
-                response = await client.get(url, headers=headers, timeout=30.0)
-                
-                # 304 Not Modified - no changes
-                if response.status_code == 304:
-                    return {"status": "not_modified", "cik": cik_padded, "filings": []}
-                
-                response.raise_for_status()
-                
-                # Update ETag cache
-                new_etag = response.headers.get("ETag")
-                if new_etag:
-                    self.etag_cache[cik_padded] = new_etag
-                
+                company_name, recent = decode_recent(
+                    response.text, self.submissions_recent_fields, self.submissions_recent_limit
+                )
+            except ValueError as e:
+                logger.debug(f"Partial decode failed for CIK {cik_padded} ({e}), decoding full document")
                 data = response.json()
-                
-                # Extract recent filings
+                company_name = data.get("name", "")
                 recent = data.get("filings", {}).get("recent", {})
-                if not recent:
-                    return {"status": "ok", "cik": cik_padded, "filings": []}
-                
-                # Build filing list from parallel arrays
-                filings = []
-                forms = recent.get("form", [])
-                accession_numbers = recent.get("accessionNumber", [])
-                filing_dates = recent.get("filingDate", [])
-                primary_documents = recent.get("primaryDocument", [])
-                
-                # Only process most recent filings (3 entries for real-time detection)
-                for i in range(min(3, len(forms))):
-                    form = forms[i] if i < len(forms) else ""
-                    
-                    # Only include supported form types (exact match, no /A variants)
-                    if form not in self.json_supported_forms:
-                        continue
-                    
-                    filings.append({
-                        "form": form,
-                        "accession_number": accession_numbers[i] if i < len(accession_numbers) else "",
-                        "filing_date": filing_dates[i] if i < len(filing_dates) else "",
-                        "primary_document": primary_documents[i] if i < len(primary_documents) else "",
-                        "cik": cik_padded,
-                        "company_name": data.get("name", ""),
-                    })
+            
+            if not recent:
+                return {"status": "ok", "cik": cik_padded, "filings": []}
+            
+            # Build filing list from parallel arrays
+            filings = []
+            forms = recent.get("form", [])
+            accession_numbers = recent.get("accessionNumber", [])
+            filing_dates = recent.get("filingDate", [])
+            primary_documents = recent.get("primaryDocument", [])
+            
+            # Only process most recent filings (3 entries for real-time detection)
+            for i in range(min(self.submissions_recent_limit, len(forms))):
+                form = forms[i] if i < len(forms) else ""
                 
-                return {"status": "ok", "cik": cik_padded, "filings": filings}
+                # Only include supported form types (exact match, no /A variants)
+                if form not in self.json_supported_forms:
+                    continue
                 
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 404:
-                    logger.debug(f"CIK {cik_padded} not found")
-                else:
-                    logger.warning(f"HTTP error for CIK {cik_padded}: {e.response.status_code}")
-                return None
-            except Exception as e:
-                logger.warning(f"Error fetching submissions for CIK {cik_padded}: {e}")
-                return None
+                filings.append({
+                    "form": form,
+                    "accession_number": accession_numbers[i] if i < len(accession_numbers) else "",
+                    "filing_date": filing_dates[i] if i < len(filing_dates) else "",
+                    "primary_document": primary_documents[i] if i < len(primary_documents) else "",
+                    "cik": cik_padded,
+                    "company_name": company_name,
+                })
+            
+            # Update ETag cache
+            self.etag_store.set(
+                cik_padded,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                filings=filings
+            )
+            
+            return {"status": "ok", "cik": cik_padded, "filings": filings}
+            
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                logger.debug(f"CIK {cik_padded} not found")
+            else:
+                logger.warning(f"HTTP error for CIK {cik_padded}: {e.response.status_code}")
+            return None
+        except Exception as e:
+            logger.warning(f"Error fetching submissions for CIK {cik_padded}: {e}")
+            return None
     
-    async def get_batch_submissions(self, ciks: List[str], known_accessions: set) -> Dict:
+    async def get_batch_submissions(
+        self,
+        ciks: List[str],
+        known_accessions: Optional[set] = None,
+        concurrency: Optional[int] = None
+    ) -> Dict:
         """
         Batch query submissions for multiple CIKs
         
+        Up to `concurrency` requests are kept in flight over the pooled
+        EDGAR client while the shared token bucket caps throughput at
+        SEC_REQUESTS_PER_SECOND, so a full sweep takes ~len(ciks)/10 seconds
+        instead of len(ciks) * (latency + 100ms).
+        
         Args:
             ciks: List of CIKs to query
             known_accessions: Set of accession numbers already in database
+                (None = return every candidate and let the caller dedup)
+            concurrency: Max requests in flight (defaults to SEC_SCAN_CONCURRENCY, 1 = serial)
             
         Returns:
             Dict with new filings and scan statistics
         """
         scan_start = datetime.now(timezone.utc)
         
+        concurrency = max(1, concurrency or self.scan_concurrency)
+        semaphore = asyncio.Semaphore(concurrency)
+        client = sec_http_client.get_client()
+        
+        async def fetch(cik: str) -> Optional[Dict]:
+            async with semaphore:
+                return await self.get_company_submissions(cik, client=client)
+        
+        # gather preserves input order, so new_filings come out in CIK order
+        results = await asyncio.gather(*(fetch(cik) for cik in ciks))
+        
         new_filings = []
+        seen_accessions = set()
         success_count = 0
         cached_count = 0
         error_count = 0
         
-        for cik in ciks:
-            result = await self.get_company_submissions(cik)
-            
+        for result in results:
             if result is None:
                 error_count += 1
                 continue
             
             if result.get("status") == "not_modified":
                 cached_count += 1
-                success_count += 1
-                continue
             
             success_count += 1
             
-            # Check for new filings
+            # Check for new filings (304s replay cached filings, usually all known)
             for filing in result.get("filings", []):
                 accession = filing.get("accession_number", "")
-                if accession and accession not in known_accessions:
-                    new_filings.append(filing)
+                if not accession or accession in seen_accessions:
+                    continue
+                if known_accessions is not None and accession in known_accessions:
+                    continue
+                seen_accessions.add(accession)
+                new_filings.append(filing)
         
         scan_duration = (datetime.now(timezone.utc) - scan_start).total_seconds()
         
         # Log scan summary (single line)
         logger.info(
-            f"JSON scan: {len(ciks)} CIKs in {scan_duration:.1f}s | "
+            f"JSON scan: {len(ciks)} CIKs in {scan_duration:.1f}s "
+            f"(concurrency={concurrency}) | "
             f"success={success_count} cached={cached_count} errors={error_count} | "
-            f"new_filings={len(new_filings)}"
+            f"new_filings={len(new_filings)} | "
+            f"etag_hit_rate={self.etag_store.get_stats()['hit_rate']:.0%}"
         )
         
         return {
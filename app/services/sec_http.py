@@ -0,0 +1,96 @@
+# app/services/sec_http.py
+"""
+Persistent pooled HTTP client for all EDGAR traffic (data.sec.gov + www.sec.gov)
+
+One long-lived httpx.AsyncClient is kept per event loop, so keep-alive
+connections (and HTTP/2 multiplexing when h2 is installed) are reused across
+scans and downloads instead of paying TCP+TLS setup on every request.
+httpx connection pools are bound to the loop that created them, which is why
+the API process (one loop) and Celery worker threads (one loop each) get
+their own client.
+"""
+import asyncio
+import importlib.util
+import logging
+import threading
+import weakref
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SECHttpClient:
+    """Owner of the pooled EDGAR HTTP clients"""
+
+    def __init__(self):
+        self.http2 = settings.SEC_HTTP2_ENABLED and importlib.util.find_spec("h2") is not None
+        if settings.SEC_HTTP2_ENABLED and not self.http2:
+            logger.warning("SEC_HTTP2_ENABLED is set but 'h2' is not installed - using HTTP/1.1")
+
+        self.limits = httpx.Limits(
+            max_connections=settings.SEC_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SEC_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.SEC_HTTP_KEEPALIVE_EXPIRY
+        )
+        self.timeout = httpx.Timeout(settings.SEC_HTTP_TIMEOUT)
+        self.headers = {
+            "User-Agent": settings.SEC_USER_AGENT,
+            "Accept-Encoding": "gzip, deflate",
+        }
+
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _create_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            http2=self.http2,
+            limits=self.limits,
+            timeout=self.timeout,
+            headers=self.headers,
+            follow_redirects=True
+        )
+
+    def get_client(self) -> httpx.AsyncClient:
+        """Get the pooled client for the running event loop (created on first use)"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.get(loop)
+            if client is None or client.is_closed:
+                client = self._create_client()
+                self._clients[loop] = client
+                logger.debug(f"Created pooled SEC HTTP client (http2={self.http2})")
+            return client
+
+    async def aclose(self):
+        """Close the client owned by the running event loop (FastAPI lifespan shutdown)"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.pop(loop, None)
+        if client is not None and not client.is_closed:
+            await client.aclose()
+            logger.info("SEC HTTP client closed")
+
+    def close_loop(self, loop: asyncio.AbstractEventLoop):
+        """
+        Close the client bound to a loop that is not running
+        Used by the Celery worker lifecycle before the loop itself is closed
+        """
+        with self._lock:
+            client = self._clients.pop(loop, None)
+        if client is None or client.is_closed:
+            return
+        if loop.is_closed() or loop.is_running():
+            logger.warning("Cannot close SEC HTTP client cleanly - loop not usable")
+            return
+        loop.run_until_complete(client.aclose())
+
+    def open_client_count(self) -> int:
+        with self._lock:
+            return sum(1 for c in self._clients.values() if not c.is_closed)
+
+
+# Create singleton instance
+sec_http_client = SECHttpClient()
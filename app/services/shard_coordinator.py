@@ -0,0 +1,161 @@
+# app/services/shard_coordinator.py
+"""
+CIK partition leases for multi-node scanning
+
+The monitored CIK universe is split into SCANNER_SHARD_COUNT shards by
+`int(cik) % shard_count`. Each scanner process claims shards through
+Redis leases (one LeaderElection per shard, so each claim carries its own
+fencing token) and only polls the CIKs of the shards it holds.
+
+Live scanners register in a heartbeat sorted set. Every heartbeat a node
+aims for ceil(shards / live_nodes) shards: it releases extras when a node
+joins and picks up expired shards when one dies, so the cluster rebalances
+within one lease period. Work that is not per-CIK (S-1 RSS, current feed)
+belongs to whoever holds shard 0.
+
+All nodes still draw from the shared Redis SEC rate limiter, so adding
+scanners adds coverage, never request volume above the global budget.
+"""
+import logging
+import math
+import time
+from typing import Dict, Iterable, List, Set
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.leader_election import LeaderElection
+
+logger = logging.getLogger(__name__)
+
+
+class ShardCoordinator:
+    """Claims and rebalances CIK shards for this scanner process"""
+
+    def __init__(self):
+        self.shard_count = max(1, settings.SCANNER_SHARD_COUNT)
+        self.lease_seconds = settings.SCANNER_SHARD_LEASE_SECONDS
+        self.nodes_key = "scanner:nodes"
+
+        self.leases = {
+            shard: LeaderElection(f"scanner:shard:{shard}", lease_seconds=self.lease_seconds)
+            for shard in range(self.shard_count)
+        }
+        # All shard leases share one identity for this process
+        self.node_id = self.leases[0].node_id
+        for lease in self.leases.values():
+            lease.node_id = self.node_id
+
+        self.live_nodes = 1
+
+    @property
+    def enabled(self) -> bool:
+        return self.shard_count > 1
+
+    @property
+    def redis(self):
+        return cache.redis_client
+
+    @property
+    def owned_shards(self) -> List[int]:
+        return sorted(shard for shard, lease in self.leases.items() if lease.is_leader)
+
+    @property
+    def owns_global_work(self) -> bool:
+        """Shard 0's holder also runs the non-partitioned polls (S-1 RSS, current feed)"""
+        return not self.enabled or self.leases[0].is_leader
+
+    def shard_of(self, cik: str) -> int:
+        try:
+            return int(cik) % self.shard_count
+        except (TypeError, ValueError):
+            return 0
+
+    def filter_ciks(self, ciks: Iterable[str]) -> Set[str]:
+        """The subset of CIKs this node is responsible for"""
+        if not self.enabled:
+            return set(ciks)
+        owned = set(self.owned_shards)
+        return {cik for cik in ciks if self.shard_of(cik) in owned}
+
+    def _register_node(self) -> int:
+        """Heartbeat this node and return the number of live scanners"""
+        now = time.time()
+        pipe = self.redis.pipeline()
+        pipe.zadd(self.nodes_key, {self.node_id: now})
+        pipe.zremrangebyscore(self.nodes_key, "-inf", now - self.lease_seconds)
+        pipe.zcard(self.nodes_key)
+        pipe.expire(self.nodes_key, self.lease_seconds * 4)
+        return max(1, int(pipe.execute()[2]))
+
+    def heartbeat(self) -> List[int]:
+        """
+        Renew held shards, then release or claim shards towards a fair share
+
+        Returns:
+            Shards held after the heartbeat
+        """
+        if not self.enabled:
+            return [0]
+
+        try:
+            self.live_nodes = self._register_node()
+        except Exception as e:
+            logger.warning(f"Scanner node heartbeat failed: {e}")
+
+        # Renew what we hold (drops shards whose lease was taken over)
+        for shard in self.owned_shards:
+            self.leases[shard].heartbeat()
+
+        target = math.ceil(self.shard_count / self.live_nodes)
+        owned = self.owned_shards
+
+        # A node joined: hand back extras so it can claim them
+        if len(owned) > target:
+            for shard in owned[target:]:
+                self.leases[shard].release()
+            logger.info(f"Rebalanced: released shards {owned[target:]} ({self.live_nodes} live scanners)")
+
+        # A node died or we just started: claim free shards up to our share
+        elif len(owned) < target:
+            # Start at a node-specific offset so nodes don't all race for shard 0
+            start = hash(self.node_id) % self.shard_count
+            for i in range(self.shard_count):
+                if len(self.owned_shards) >= target:
+                    break
+                shard = (start + i) % self.shard_count
+                lease = self.leases[shard]
+                if not lease.is_leader:
+                    lease.heartbeat()
+
+        return self.owned_shards
+
+    def check_fences(self) -> List[int]:
+        """Drop shards whose lease token is no longer current (before a scan)"""
+        for shard in self.owned_shards:
+            lease = self.leases[shard]
+            if not lease.check_fence():
+                logger.warning(f"Shard {shard} fenced off (token {lease.token})")
+                lease.token = None
+        return self.owned_shards
+
+    def release_all(self):
+        for shard in self.owned_shards:
+            self.leases[shard].release()
+        try:
+            self.redis.zrem(self.nodes_key, self.node_id)
+        except Exception as e:
+            logger.debug(f"Error unregistering scanner node: {e}")
+
+    def get_status(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "node_id": self.node_id,
+            "shard_count": self.shard_count,
+            "live_nodes": self.live_nodes,
+            "owned_shards": self.owned_shards,
+            "owns_global_work": self.owns_global_work,
+        }
+
+
+# Create singleton instance
+shard_coordinator = ShardCoordinator()
@@ -0,0 +1,116 @@
+# app/services/submissions_decoder.py
+"""
+Partial decoder for data.sec.gov submissions JSON
+
+A mature filer's submissions document carries thousands of historical
+filings in the parallel arrays under filings.recent, while the scanner
+only looks at the newest few. Instead of json.loads() on the whole
+document, decode_recent() finds each needed array and decodes only its
+first `limit` elements with JSONDecoder.raw_decode, so the cost no longer
+grows with the filer's history.
+
+The document layout is SEC's, not ours: anything unexpected raises
+ValueError and the caller falls back to a full decode.
+"""
+import json
+import re
+from typing import Dict, Iterable, List, Tuple
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_FILINGS_KEY = re.compile(r'"filings"\s*:\s*\{')
+_RECENT_KEY = re.compile(r'"recent"\s*:\s*\{')
+_NAME_KEY = re.compile(r'"name"\s*:\s*')
+
+_key_patterns: Dict[str, "re.Pattern"] = {}
+
+
+def _skip_ws(text: str, pos: int) -> int:
+    return _WHITESPACE.match(text, pos).end()
+
+
+def _find_key(text: str, compact: str, pattern, pos: int = 0, endpos: int = -1) -> int:
+    """
+    Offset just past `"key":<open>` or -1
+
+    SEC serves compact JSON, so a plain str.find (memchr-fast) almost always
+    hits; the regex only covers whitespace-formatted documents.
+    """
+    endpos = len(text) if endpos < 0 else endpos
+    index = text.find(compact, pos, endpos)
+    if index >= 0:
+        return index + len(compact)
+    match = pattern.search(text, pos, endpos)
+    return match.end() if match else -1
+
+
+def _array_pattern(key: str):
+    pattern = _key_patterns.get(key)
+    if pattern is None:
+        pattern = _key_patterns[key] = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+    return pattern
+
+
+def _read_array_head(text: str, pos: int, limit: int) -> List:
+    """Decode up to `limit` elements of the array whose '[' ends just before pos"""
+    values = []
+    pos = _skip_ws(text, pos)
+    if text[pos] == ']':
+        return values
+    while len(values) < limit:
+        value, pos = _decoder.raw_decode(text, pos)
+        values.append(value)
+        pos = _skip_ws(text, pos)
+        if text[pos] == ']':
+            break
+        if text[pos] != ',':
+            raise ValueError(f"Unexpected {text[pos]!r} in array at {pos}")
+        pos = _skip_ws(text, pos + 1)
+    return values
+
+
+def decode_recent(text: str, fields: Iterable[str], limit: int) -> Tuple[str, Dict[str, List]]:
+    """
+    Decode the company name and the first `limit` entries of filings.recent
+
+    Args:
+        text: Submissions JSON document
+        fields: Keys of filings.recent to decode, ideally in SEC's document order
+            (accessionNumber, filingDate, ..., form, ..., primaryDocument)
+        limit: Entries to decode from the start (newest first) of each array
+
+    Returns:
+        (company name, {field: first `limit` values})
+
+    Raises:
+        ValueError: Layout not recognised - decode the full document instead
+    """
+    filings_end = _find_key(text, '"filings":{', _FILINGS_KEY)
+    if filings_end < 0:
+        raise ValueError("No filings object")
+    recent_end = _find_key(text, '"recent":{', _RECENT_KEY, filings_end)
+    if recent_end < 0:
+        raise ValueError("No filings.recent object")
+
+    # Top-level name precedes "filings" in SEC's layout
+    name = ""
+    name_end = _find_key(text, '"name":', _NAME_KEY, 0, filings_end)
+    if name_end >= 0:
+        name, _ = _decoder.raw_decode(text, _skip_ws(text, name_end))
+        if not isinstance(name, str):
+            raise ValueError("Unexpected company name value")
+
+    # Fields given in document order are found in one forward pass;
+    # anything out of order is searched again from the top of recent
+    recent = {}
+    pos = recent_end
+    for field in fields:
+        compact, pattern = f'"{field}":[', _array_pattern(field)
+        array_start = _find_key(text, compact, pattern, pos)
+        if array_start < 0:
+            array_start = _find_key(text, compact, pattern, recent_end)
+        if array_start < 0:
+            raise ValueError(f"No filings.recent.{field} array")
+        recent[field] = _read_array_head(text, array_start, limit)
+        pos = array_start
+    return name, recent
@@ -16,13 +16,33 @@ ENHANCED: 支持 Exhibit 99 + 10.x 系列的完整附件提取
 5. 保持表格结构完整的革命性方法
 """
 import re
+import importlib.util
+import warnings
 from pathlib import Path
 from typing import Dict, Optional, List, Tuple
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
 import logging
 
+from app.core.config import settings
+from app.services.filing_store import filing_store
+from app.services.document_walker import DocumentWalk, walk_document
+
 logger = logging.getLogger(__name__)
 
+# XHTML/iXBRL is deliberately parsed with an HTML tree builder (same tree as html.parser)
+warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
+
+LXML_AVAILABLE = importlib.util.find_spec("lxml") is not None
+
+# Bump whenever extraction output changes: cached extractions of older versions are ignored
+EXTRACTOR_VERSION = "1"
+
+PARSER_BACKENDS = ("auto", "lxml", "html.parser")
+
+# Well-formed XHTML (every iXBRL document): no implied end tags, so lxml and
+# html.parser build the same tree
+XHTML_PATTERN = re.compile(r'^[\s\ufeff]*(?:<\?xml|<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML)|xmlns="http://www\.w3\.org/1999/xhtml"', re.I)
+
 
 class TextExtractor:
     """
@@ -33,6 +53,7 @@ class TextExtractor:
     def __init__(self):
         self.min_section_length = 100  # Minimum characters for a valid section
         self.max_section_length = 50000  # Maximum characters to avoid memory issues
+        self.parser_backend = self._select_parser_backend(settings.TEXT_EXTRACTOR_PARSER)
         
         # ENHANCED: 附件处理配置
         self.exhibit_config = {
@@ -197,14 +218,41 @@ class TextExtractor:
             }
         }
     
+    @staticmethod
+    def _select_parser_backend(requested: str) -> str:
+        """
+        HTML parser backend:
+        - "auto": lxml for well-formed XHTML/iXBRL, html.parser for legacy HTML
+        - "lxml": lxml for every document (legacy HTML with implied end tags,
+          e.g. unclosed <P>, gets a different - flatter - tree than html.parser)
+        - "html.parser": pure-Python parser only
+        """
+        if requested not in PARSER_BACKENDS:
+            logger.warning(f"Unknown TEXT_EXTRACTOR_PARSER '{requested}', using 'auto'")
+            requested = "auto"
+        if requested != "html.parser" and not LXML_AVAILABLE:
+            if requested == "lxml":
+                logger.warning("TEXT_EXTRACTOR_PARSER is 'lxml' but lxml is not installed - using html.parser")
+            return "html.parser"
+        return requested
+    
+    def _parser_for(self, html_content: str) -> str:
+        """bs4 tree builder for one document"""
+        if self.parser_backend == "auto":
+            return "lxml" if XHTML_PATTERN.search(html_content, 0, 2048) else "html.parser"
+        return self.parser_backend
+    
+    def _make_soup(self, html_content: str) -> BeautifulSoup:
+        return BeautifulSoup(html_content, self._parser_for(html_content))
+    
     def extract_from_filing(self, filing_dir: Path) -> Dict[str, str]:
         """
         Extract text from all documents in a filing directory
         
         ENHANCED: 现在支持完整的附件处理（99 + 10.x系列）
         """
-        # Check if directory exists
-        if not filing_dir.exists():
+        # Check if directory exists (locally or in filing storage)
+        if not filing_store.has_filing(filing_dir):
             logger.warning(f"Filing directory does not exist: {filing_dir}")
             return {
                 'error': 'Filing directory not found',
@@ -215,7 +263,7 @@ class TextExtractor:
             }
         
         # First, check if we have a TXT file (preferred)
-        txt_files = list(filing_dir.glob("*.txt"))
+        txt_files = list(filing_store.glob(filing_dir, "*.txt"))
         if txt_files:
             txt_file = txt_files[0]
             logger.info(f"Found TXT file, using {txt_file.name}")
@@ -223,11 +271,11 @@ class TextExtractor:
         
         # For S-1, prioritize correct document patterns
         html_files = []
-        if filing_dir.exists():
+        if filing_store.has_filing(filing_dir):
             # Check for S-1 specific patterns first
             s1_patterns = ['forms-1.htm', '*-s1*.htm', '*s1.htm', 's-1.htm', 's1.htm']
             for pattern in s1_patterns:
-                matching_files = list(filing_dir.glob(pattern))
+                matching_files = list(filing_store.glob(filing_dir, pattern))
                 # Exclude fee tables
                 matching_files = [f for f in matching_files if not self._is_fee_table(f.name)]
                 if matching_files:
@@ -236,8 +284,8 @@ class TextExtractor:
         
         # If no S-1 specific files, find general HTML documents
         if not html_files:
-            html_files = [f for f in filing_dir.glob("*.htm") if f.name != "index.htm"]
-            html_files.extend([f for f in filing_dir.glob("*.html") if f.name != "index.html"])
+            html_files = [f for f in filing_store.glob(filing_dir, "*.htm") if f.name != "index.htm"]
+            html_files.extend([f for f in filing_store.glob(filing_dir, "*.html") if f.name != "index.html"])
             # Exclude fee tables
             html_files = [f for f in html_files if not self._is_fee_table(f.name)]
         
@@ -345,7 +393,7 @@ class TextExtractor:
             
             # 查找该类别的附件文件
             for pattern in config['patterns']:
-                found_files = list(filing_dir.glob(pattern))
+                found_files = list(filing_store.glob(filing_dir, pattern))
                 category_files.extend(found_files)
             
             # 去重并排序
@@ -364,7 +412,7 @@ class TextExtractor:
             for exhibit_file in category_files:
                 try:
                     # 检查文件大小
-                    file_size_mb = exhibit_file.stat().st_size / (1024 * 1024)
+                    file_size_mb = filing_store.size(exhibit_file) / (1024 * 1024)
                     max_size_mb = config.get('max_size_mb', 50)
                     
                     if file_size_mb > max_size_mb:
@@ -372,11 +420,10 @@ class TextExtractor:
                         continue
                     
                     # 读取并提取内容
-                    with open(exhibit_file, 'r', encoding='utf-8', errors='ignore') as f:
-                        html_content = f.read()
+                    html_content = filing_store.read_text(exhibit_file)
                     
-                    # 使用BeautifulSoup解析
-                    soup = BeautifulSoup(html_content, 'html.parser')
+                    # 使用BeautifulSoup解析 (parser backend per document)
+                    soup = self._make_soup(html_content)
                     
                     # 提取增强内容 - 使用表格结构保持方法
                     enhanced_content = self._extract_enhanced_content_from_soup(soup)
@@ -405,6 +452,8 @@ class TextExtractor:
                         
                         logger.info(f"✅ Extracted {category} content from {exhibit_file.name}: {len(enhanced_content)} chars")
                 
+                except MemoryError:
+                    raise  # Not a document problem: the extraction pool reports the memory cap
                 except Exception as e:
                     logger.error(f"❌ Error extracting from {exhibit_file.name}: {e}")
                     continue
@@ -465,8 +514,7 @@ class TextExtractor:
         Extract text from SEC TXT filing
         """
         try:
-            with open(txt_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
+            content = filing_store.read_text(txt_path)
             
             # Handle empty file
             if not content:
@@ -519,6 +567,8 @@ class TextExtractor:
             
             return sections
             
+        except MemoryError:
+            raise
         except Exception as e:
             logger.error(f"Error extracting from TXT file {txt_path}: {e}")
             return {
@@ -534,8 +584,7 @@ class TextExtractor:
         Extract structured text sections from an HTML filing with Markdown enhancement
         """
         try:
-            with open(html_path, 'r', encoding='utf-8', errors='ignore') as f:
-                html_content = f.read()
+            html_content = filing_store.read_text(html_path)
             
             # Handle empty file
             if not html_content:
@@ -552,7 +601,7 @@ class TextExtractor:
                 logger.warning(f"File appears to be only a fee calculation table: {html_path}")
                 # Try to find the real S-1 document in the same directory
                 parent_dir = html_path.parent
-                alt_files = [f for f in parent_dir.glob("*.htm") if not self._is_fee_table(f.name) and f != html_path]
+                alt_files = [f for f in filing_store.glob(parent_dir, "*.htm") if not self._is_fee_table(f.name) and f != html_path]
                 if alt_files:
                     logger.info(f"Found alternative file: {alt_files[0].name}")
                     return self.extract_from_html(alt_files[0])
@@ -566,17 +615,20 @@ class TextExtractor:
                 logger.info("Detected iXBRL document, using special extraction")
                 return self._extract_from_ixbrl(html_content, filing_type)
             
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = self._make_soup(html_content)
+            
+            # One traversal collects text, tables and section candidates
+            walk = walk_document(soup)
             
             # REVOLUTIONARY: Extract enhanced content with Markdown table conversion
-            enhanced_text = self._extract_enhanced_content_from_soup(soup)
+            enhanced_text = self._enhanced_content_from_walk(walk)
             
-            # Remove script and style elements
-            for element in soup(['script', 'style', 'link', 'meta']):
+            # Remove script and style elements (the walk did not descend into them)
+            for element in walk.skipped:
                 element.decompose()
             
             # Extract text
-            text = soup.get_text()
+            text = walk.full_text
             
             # Clean up text
             text = self._clean_text(text)
@@ -606,6 +658,8 @@ class TextExtractor:
             
             return sections
             
+        except MemoryError:
+            raise
         except Exception as e:
             logger.error(f"Error extracting text from {html_path}: {e}")
             return {
@@ -644,6 +698,10 @@ class TextExtractor:
         - Preserves table structure instead of creating chaotic separators
         - Enhances key financial data with proper markup
         """
+        return self._enhanced_content_from_walk(walk_document(soup))
+    
+    def _enhanced_content_from_walk(self, walk: DocumentWalk) -> str:
+        """Build the Markdown enhanced text from a document walk (see document_walker)"""
         logger.info("Starting enhanced content extraction with Markdown table conversion")
         
         # Build Markdown document
@@ -651,9 +709,9 @@ class TextExtractor:
         
         # 1. Process tables - convert to clean Markdown tables
         tables_processed = 0
-        for table in soup.find_all('table'):
-            if self._is_financial_table(table):
-                markdown_table = self._table_to_markdown_clean(table)
+        for table in walk.tables:
+            if self._is_financial_table_text(walk.text(table).lower(), len(table.rows)):
+                markdown_table = self._rows_to_markdown(walk.table_rows(table))
                 if markdown_table:
                     markdown_doc.append(markdown_table)
                     tables_processed += 1
@@ -661,8 +719,8 @@ class TextExtractor:
         logger.info(f"Processed {tables_processed} financial tables into Markdown format")
         
         # 2. Process text sections - enhance with markup
-        for section in self._find_sections(soup):
-            enhanced_section = self._enhance_text_section(section)
+        for section in walk.sections:
+            enhanced_section = self._enhance_text_section(section.text, walk.section_title(section))
             if enhanced_section:
                 markdown_doc.append(enhanced_section)
         
@@ -679,8 +737,12 @@ class TextExtractor:
         """
         Determine if a table contains financial data
         """
-        table_text = table_soup.get_text().lower()
-        
+        return self._is_financial_table_text(table_soup.get_text().lower(), len(table_soup.find_all('tr')))
+    
+    def _is_financial_table_text(self, table_text: str, rows: int) -> bool:
+        """
+        Financial table test on the table's lower-cased text and row count
+        """
         # Financial keywords that indicate important tables
         financial_keywords = [
             'revenue', 'income', 'assets', 'liabilities', 'cash', 'earnings',
@@ -696,8 +758,6 @@ class TextExtractor:
         has_financial_numbers = bool(re.search(r'\$[\d,]+|\d+[,.]?\d*\s*(?:million|billion)', table_text))
         
         # Table must have multiple rows and columns
-        rows = len(table_soup.find_all('tr'))
-        
         return keyword_matches >= 2 and has_financial_numbers and rows >= 2
     
     def _table_to_markdown_clean(self, table_soup) -> str:
@@ -710,21 +770,33 @@ class TextExtractor:
         Before: | | | | | | | | 13,640 | | | 15,009 | |
         After:  | Net sales | 3,535 | 5,082 | 13,640 | 15,009 |
         """
+        try:
+            rows = [
+                [cell.get_text().strip() for cell in row.find_all(['td', 'th'])]
+                for row in table_soup.find_all('tr')
+            ]
+        except MemoryError:
+            raise
+        except Exception as e:
+            logger.error(f"Error converting table to Markdown: {e}")
+            return ""
+        return self._rows_to_markdown(rows)
+    
+    def _rows_to_markdown(self, rows: List[List[str]]) -> str:
+        """
+        Markdown table from stripped cell texts per <tr> (see _table_to_markdown_clean)
+        """
         try:
             markdown_lines = []
             
-            rows = table_soup.find_all('tr')
             if not rows:
                 return ""
             
             # Process each row
-            for row_idx, row in enumerate(rows):
-                cells = row.find_all(['td', 'th'])
-                
+            for row_idx, cells in enumerate(rows):
                 # Extract cell contents and filter empty cells
                 clean_cells = []
-                for cell in cells:
-                    cell_text = cell.get_text().strip()
+                for cell_text in cells:
                     # Only include cells with meaningful content
                     if cell_text and len(cell_text) > 0:
                         # Clean up the text
@@ -752,30 +824,20 @@ class TextExtractor:
             else:
                 return ""
                 
+        except MemoryError:
+            raise
         except Exception as e:
             logger.error(f"Error converting table to Markdown: {e}")
             return ""
     
-    def _find_sections(self, soup: BeautifulSoup) -> List:
-        """
-        Find meaningful text sections for enhancement
-        """
-        sections = []
-        
-        # Find paragraphs and div elements with substantial text
-        for element in soup.find_all(['p', 'div']):
-            text = element.get_text().strip()
-            if len(text) > 200:  # Only include substantial content
-                sections.append(element)
-        
-        return sections
-    
-    def _enhance_text_section(self, section) -> str:
+    def _enhance_text_section(self, text: str, section_title: Optional[str] = None) -> str:
         """
         Enhance text section with Markdown formatting for key financial data
-        """
-        text = section.get_text().strip()
         
+        Args:
+            text: Stripped section text (a <p>/<div> over 200 chars)
+            section_title: Nearest heading sibling or leading bold text, if any
+        """
         if len(text) < 100:
             return ""
         
@@ -801,35 +863,12 @@ class TextExtractor:
             flags=re.IGNORECASE
         )
         
-        # Extract section title if present
-        section_title = self._extract_section_title(section)
+        # Prefix section title if present
         if section_title:
             text = f"## {section_title}\n\n{text}"
         
         return text
     
-    def _extract_section_title(self, section) -> Optional[str]:
-        """
-        Extract section title from HTML element
-        """
-        # Look for preceding header elements
-        prev_sibling = section.find_previous_sibling()
-        while prev_sibling:
-            if prev_sibling.name in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
-                title = prev_sibling.get_text().strip()
-                if len(title) < 100:  # Reasonable title length
-                    return title
-            prev_sibling = prev_sibling.find_previous_sibling()
-        
-        # Look for bold text at the beginning of the section
-        first_bold = section.find(['b', 'strong'])
-        if first_bold:
-            title = first_bold.get_text().strip()
-            if len(title) < 100:
-                return title
-        
-        return None
-    
     def _generate_enhanced_markdown_from_text(self, text: str, filing_type: str) -> str:
         """
         Generate enhanced Markdown from plain text (for TXT files)
@@ -1534,37 +1573,17 @@ class TextExtractor:
         """
         Enhanced iXBRL extraction with better content preservation and Markdown enhancement
         """
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Remove all ix: namespace elements' tags but keep their text
-        for elem in soup.find_all(re.compile(r'^ix:', re.I)):
-            elem.unwrap()
+        soup = self._make_soup(html_content)
         
-        # Remove script and style
-        for element in soup(['script', 'style', 'link', 'meta', 'noscript']):
-            element.decompose()
+        # One traversal: ix: tags treated as unwrapped (text kept), script/style/
+        # link/meta/noscript skipped, body text collected with block spacing
+        walk = walk_document(soup, ixbrl=True)
         
         # Extract enhanced content with Markdown
-        enhanced_text = self._extract_enhanced_content_from_soup(soup)
-        
-        # Extract text with structure preservation
-        text_parts = []
-        
-        # Process body content
-        body = soup.find('body')
-        if body:
-            # Walk through all elements
-            for element in body.descendants:
-                if isinstance(element, str):
-                    text = element.strip()
-                    if text and not text.isspace():
-                        text_parts.append(text)
-                elif element.name in ['div', 'p', 'br', 'h1', 'h2', 'h3']:
-                    # Add spacing for structure
-                    text_parts.append('\n')
+        enhanced_text = self._enhanced_content_from_walk(walk)
         
         # Join and clean
-        text = ' '.join(text_parts)
+        text = ' '.join(walk.body_parts)
         text = re.sub(r'\n\s*\n\s*\n', '\n\n', text)
         text = re.sub(r'[ \t]+', ' ', text)
         text = text.strip()
@@ -13,7 +13,9 @@ CRITICAL FIX: Resolved DetachedInstanceError by preloading relationships
 import logging
 from typing import Optional, Dict, Union
 from celery import Task
+from celery.signals import worker_process_shutdown, worker_shutdown
 import asyncio
+import threading
 from datetime import datetime, timezone
 import time
 import traceback
@@ -22,9 +24,12 @@ from app.core.celery_app import celery_app
 from app.core.database import SessionLocal, ThreadSafeSession, get_task_db
 from app.models.filing import Filing, ProcessingStatus, FilingType
 from app.services.filing_downloader import filing_downloader
+from app.services.filing_store import filing_store
 from app.services.ai_processor import ai_processor
 from app.core.cache import FilingCache
 from app.services.notification_service import notification_service
+from app.services.sec_http import sec_http_client
+from app.services.ingestion_gate import ingestion_gate
 
 # CRITICAL FIX: Import SQLAlchemy joinedload for relationship preloading
 from sqlalchemy.orm import joinedload
@@ -32,6 +37,47 @@ from sqlalchemy.orm import joinedload
 logger = logging.getLogger(__name__)
 
 
+# One persistent event loop per worker thread. The pooled SEC HTTP client is
+# bound to the loop that created it, so a fresh loop per task would throw away
+# every keep-alive connection and pay TCP+TLS setup again.
+_thread_state = threading.local()
+_task_loops = set()
+_task_loops_lock = threading.Lock()
+
+
+def get_task_event_loop() -> asyncio.AbstractEventLoop:
+    """Get (or create) the event loop owned by the current worker thread"""
+    loop = getattr(_thread_state, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        _thread_state.loop = loop
+        with _task_loops_lock:
+            _task_loops.add(loop)
+    asyncio.set_event_loop(loop)
+    return loop
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def close_task_event_loops(**kwargs):
+    """Close pooled SEC connections and worker loops when the Celery worker stops"""
+    with _task_loops_lock:
+        loops = list(_task_loops)
+        _task_loops.clear()
+    
+    for loop in loops:
+        try:
+            sec_http_client.close_loop(loop)
+        except Exception as e:
+            logger.warning(f"Error closing SEC HTTP client: {e}")
+        finally:
+            if not loop.is_running() and not loop.is_closed():
+                loop.close()
+    
+    if loops:
+        logger.info(f"Closed {len(loops)} worker event loop(s)")
+
+
 class FilingTask(Task):
     """Base task with database session management"""
     
@@ -163,112 +209,106 @@ def process_filing_task(self, filing_id: int):
                     "message": "Already processed"
                 }
             
-            # Create event loop for async operations
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+            # Reuse this worker thread's event loop (keeps pooled SEC connections alive)
+            loop = get_task_event_loop()
             
-            try:
-                # Step 1: Download filing documents
-                if filing.status in [ProcessingStatus.PENDING, ProcessingStatus.FAILED]:
-                    logger.info(f"Downloading filing {filing.accession_number}")
-                    
-                    # Update status to DOWNLOADING
-                    filing.status = ProcessingStatus.DOWNLOADING
-                    filing.processing_started_at = datetime.utcnow()
-                    db.commit()
-                    
-                    # Run async download_filing
+            # Step 1: Download filing documents
+            if filing.status in [ProcessingStatus.PENDING, ProcessingStatus.FAILED]:
+                logger.info(f"Downloading filing {filing.accession_number}")
+                
+                # Update status to DOWNLOADING
+                filing.status = ProcessingStatus.DOWNLOADING
+                filing.processing_started_at = datetime.utcnow()
+                db.commit()
+                
+                # Run async download_filing
+                success = loop.run_until_complete(
+                    filing_downloader.download_filing(db, filing)
+                )
+                
+                if not success:
+                    # Check if specific error is available
+                    error_detail = filing.error_message or "Unknown download error"
+                    raise Exception(f"Failed to download filing: {error_detail}")
+                
+                # ENHANCED: Validate downloaded content
+                from pathlib import Path
+                filing_dir = Path(f"data/filings/{filing.company.cik}/{filing.accession_number.replace('-', '')}")
+                if not filing_store.has_filing(filing_dir):
+                    raise Exception(f"Filing directory not created: {filing_dir}")
+                
+                # Check if we have any content files
+                content_files = filing_store.glob(filing_dir, "*.htm") + filing_store.glob(filing_dir, "*.html") + filing_store.glob(filing_dir, "*.txt")
+                if not content_files:
+                    raise Exception(f"No content files downloaded for filing {filing.accession_number}")
+                
+                logger.info(f"Successfully downloaded {len(content_files)} files for {filing.accession_number}")
+            
+            # Step 2 & 3: AI processing (includes text extraction)
+            if filing.status in [ProcessingStatus.PARSING, ProcessingStatus.DOWNLOADING]:
+                logger.info(f"Processing filing {filing.accession_number} with AI")
+                
+                # Check if OpenAI API key is configured
+                from app.core.config import settings
+                if not settings.OPENAI_API_KEY:
+                    raise Exception("OpenAI API key not configured")
+                
+                # Run async AI processing with better error handling
+                try:
                     success = loop.run_until_complete(
-                        filing_downloader.download_filing(db, filing)
+                        ai_processor.process_filing(db, filing)
                     )
                     
                     if not success:
-                        # Check if specific error is available
-                        error_detail = filing.error_message or "Unknown download error"
-                        raise Exception(f"Failed to download filing: {error_detail}")
-                    
-                    # ENHANCED: Validate downloaded content
-                    from pathlib import Path
-                    filing_dir = Path(f"data/filings/{filing.company.cik}/{filing.accession_number.replace('-', '')}")
-                    if not filing_dir.exists():
-                        raise Exception(f"Filing directory not created: {filing_dir}")
-                    
-                    # Check if we have any content files
-                    content_files = list(filing_dir.glob("*.htm")) + list(filing_dir.glob("*.html")) + list(filing_dir.glob("*.txt"))
-                    if not content_files:
-                        raise Exception(f"No content files downloaded for filing {filing.accession_number}")
-                    
-                    logger.info(f"Successfully downloaded {len(content_files)} files for {filing.accession_number}")
-                
-                # Step 2 & 3: AI processing (includes text extraction)
-                if filing.status in [ProcessingStatus.PARSING, ProcessingStatus.DOWNLOADING]:
-                    logger.info(f"Processing filing {filing.accession_number} with AI")
-                    
-                    # Check if OpenAI API key is configured
-                    from app.core.config import settings
-                    if not settings.OPENAI_API_KEY:
-                        raise Exception("OpenAI API key not configured")
-                    
-                    # Run async AI processing with better error handling
-                    try:
-                        success = loop.run_until_complete(
-                            ai_processor.process_filing(db, filing)
-                        )
-                        
-                        if not success:
-                            # Check if there's a specific error message
-                            error_detail = filing.error_message or "AI processing returned failure"
-                            
-                            # Check if it's an API key issue
-                            if "api_key" in error_detail.lower() or "unauthorized" in error_detail.lower():
-                                raise Exception(f"OpenAI API authentication failed - check API key")
-                            elif "rate" in error_detail.lower():
-                                raise Exception(f"OpenAI API rate limit exceeded")
-                            elif "quota" in error_detail.lower():
-                                raise Exception(f"OpenAI API quota exceeded")
-                            else:
-                                raise Exception(f"AI processing failed: {error_detail}")
-                        
-                    except Exception as ai_error:
-                        # Log the full error for debugging
-                        logger.error(f"AI processing error details: {ai_error}", exc_info=True)
+                        # Check if there's a specific error message
+                        error_detail = filing.error_message or "AI processing returned failure"
                         
-                        # Get more specific error information
-                        error_str = str(ai_error)
-                        
-                        # Check for common OpenAI errors
-                        if "openai" in error_str.lower():
-                            if "api" in error_str.lower() and "key" in error_str.lower():
-                                raise Exception("OpenAI API key is invalid or not set")
-                            elif "rate" in error_str.lower():
-                                raise Exception("OpenAI rate limit exceeded - retry later")
-                            elif "quota" in error_str.lower():
-                                raise Exception("OpenAI quota exceeded - check billing")
-                            elif "timeout" in error_str.lower():
-                                raise Exception("OpenAI API timeout - filing may be too large")
-                            else:
-                                raise Exception(f"OpenAI API error: {error_str[:200]}")
+                        # Check if it's an API key issue
+                        if "api_key" in error_detail.lower() or "unauthorized" in error_detail.lower():
+                            raise Exception(f"OpenAI API authentication failed - check API key")
+                        elif "rate" in error_detail.lower():
+                            raise Exception(f"OpenAI API rate limit exceeded")
+                        elif "quota" in error_detail.lower():
+                            raise Exception(f"OpenAI API quota exceeded")
                         else:
-                            # Re-raise the original error with more context
-                            raise Exception(f"AI processing failed: {error_str[:200]}")
+                            raise Exception(f"AI processing failed: {error_detail}")
                     
-                    # ENHANCED: Validate AI output
-                    if not filing.unified_analysis or len(filing.unified_analysis) < 100:
-                        # Try to get more specific error info
-                        if filing.error_message:
-                            raise Exception(f"AI processing incomplete: {filing.error_message}")
-                        else:
-                            raise Exception("AI processing produced insufficient content")
+                except Exception as ai_error:
+                    # Log the full error for debugging
+                    logger.error(f"AI processing error details: {ai_error}", exc_info=True)
                     
-                    # Check for data source markings (v5 requirement)
-                    if filing.analysis_version == "v5" and '[DOC:' not in filing.unified_analysis:
-                        logger.warning("AI output missing data source markings")
+                    # Get more specific error information
+                    error_str = str(ai_error)
                     
-                    logger.info(f"AI processing completed successfully for {filing.accession_number}")
-            
-            finally:
-                # Clean up the event loop
-                loop.close()
+                    # Check for common OpenAI errors
+                    if "openai" in error_str.lower():
+                        if "api" in error_str.lower() and "key" in error_str.lower():
+                            raise Exception("OpenAI API key is invalid or not set")
+                        elif "rate" in error_str.lower():
+                            raise Exception("OpenAI rate limit exceeded - retry later")
+                        elif "quota" in error_str.lower():
+                            raise Exception("OpenAI quota exceeded - check billing")
+                        elif "timeout" in error_str.lower():
+                            raise Exception("OpenAI API timeout - filing may be too large")
+                        else:
+                            raise Exception(f"OpenAI API error: {error_str[:200]}")
+                    else:
+                        # Re-raise the original error with more context
+                        raise Exception(f"AI processing failed: {error_str[:200]}")
+                
+                # ENHANCED: Validate AI output
+                if not filing.unified_analysis or len(filing.unified_analysis) < 100:
+                    # Try to get more specific error info
+                    if filing.error_message:
+                        raise Exception(f"AI processing incomplete: {filing.error_message}")
+                    else:
+                        raise Exception("AI processing produced insufficient content")
+                
+                # Check for data source markings (v5 requirement)
+                if filing.analysis_version == "v5" and '[DOC:' not in filing.unified_analysis:
+                    logger.warning("AI output missing data source markings")
+                
+                logger.info(f"AI processing completed successfully for {filing.accession_number}")
             
             # Step 4: Post-processing validation and cache invalidation
             if filing.status == ProcessingStatus.COMPLETED:
@@ -305,6 +345,13 @@ def process_filing_task(self, filing_id: int):
                     # Don't fail the entire task if notification queueing fails
         
         finally:
+            # Drain exhibits still downloading in early-start mode (same loop as download)
+            if filing is not None:
+                try:
+                    get_task_event_loop().run_until_complete(filing_downloader.wait_for_exhibits(filing))
+                except Exception as exhibit_error:
+                    logger.warning(f"Error finishing background exhibit downloads: {exhibit_error}")
+            
             # CRITICAL FIX: Ensure session is properly closed
             if db:
                 db.close()
@@ -432,63 +479,18 @@ def process_pending_filings():
     Find and process all pending filings
     This task can be scheduled to run periodically
     ENHANCED: Added batch size control and validation
-    FIXED: Use timezone-aware datetime for comparisons
-    CRITICAL FIX: Use proper session management
+    BACKPRESSURE: Admits newest first, only as far as the queue is below its
+    high watermark (see ingestion_gate) instead of staggering with countdowns
     """
     try:
-        db = ThreadSafeSession()
-        try:
-            # Get all pending filings with limit for batch processing
-            pending_filings = db.query(Filing).filter(
-                Filing.status == ProcessingStatus.PENDING
-            ).order_by(
-                Filing.filing_date.desc()  # Process newest first
-            ).limit(50).all()
-            
-            logger.info(f"Found {len(pending_filings)} pending filings")
-            
-            # Validate and queue each filing
-            filing_ids = []
-            skipped = 0
-            
-            # FIXED: Use timezone-aware datetime
-            current_time_utc = datetime.now(timezone.utc)
-            
-            for filing in pending_filings:
-                # Quick validation before queueing
-                if not filing.accession_number or not filing.company_id:
-                    logger.warning(f"Skipping invalid pending filing {filing.id}")
-                    skipped += 1
-                    continue
-                
-                # Check if not already being processed
-                if filing.processing_started_at:
-                    if filing.processing_started_at.tzinfo is None:
-                        processing_started_utc = filing.processing_started_at.replace(tzinfo=timezone.utc)
-                    else:
-                        processing_started_utc = filing.processing_started_at.astimezone(timezone.utc)
-                    
-                    time_since_start = current_time_utc - processing_started_utc
-                    if time_since_start.total_seconds() < 300:  # Less than 5 minutes
-                        logger.info(f"Filing {filing.id} already being processed")
-                        skipped += 1
-                        continue
-                
-                # Queue the filing with delay to avoid overwhelming the system
-                delay = len(filing_ids) * 2  # 2 seconds between each
-                process_filing_task.apply_async(args=[filing.id], countdown=delay)
-                filing_ids.append(filing.id)
-            
-            return {
-                "status": "success",
-                "queued": len(filing_ids),
-                "skipped": skipped,
-                "filing_ids": filing_ids
-            }
-        
-        finally:
-            db.close()
-            ThreadSafeSession.remove()
+        result = ingestion_gate.drain_pending(limit=50)
+        logger.info(f"Queued {result['queued']} pending filings (queue depth {result['queue_depth']})")
+        return {
+            "status": "success",
+            "queued": result["queued"],
+            "skipped": result["skipped"],
+            "filing_ids": result["filing_ids"]
+        }
         
     except Exception as e:
         logger.error(f"Error queuing pending filings: {e}", exc_info=True)
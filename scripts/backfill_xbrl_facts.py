@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+回填 XBRL 财务事实 - 为已下载的财报提取 iXBRL facts
+Parses the inline XBRL of filings already on disk into financial_facts and
+sets revenue / net_income / eps / financial_data, without re-running the AI
+analysis.
+
+示例用法:
+  python scripts/backfill_xbrl_facts.py                 # 10-K/10-Q missing revenue
+  python scripts/backfill_xbrl_facts.py --all --limit 500
+  python scripts/backfill_xbrl_facts.py --ticker AAPL --dry-run
+"""
+
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import argparse
+import logging
+import time
+
+from sqlalchemy.orm import joinedload
+
+from app.core.database import SessionLocal
+from app.models.filing import Filing, FilingType
+from app.services.filing_store import filing_store
+from app.services.ixbrl_facts import ixbrl_fact_extractor, summarize_facts
+
+# 设置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def backfill(all_types: bool, ticker: str, limit: int, dry_run: bool):
+    db = SessionLocal()
+    try:
+        query = db.query(Filing).options(joinedload(Filing.company))
+        if not all_types:
+            query = query.filter(
+                Filing.filing_type.in_([FilingType.FORM_10K, FilingType.FORM_10Q]),
+                Filing.revenue.is_(None)
+            )
+        if ticker:
+            query = query.filter(Filing.ticker == ticker.upper())
+        query = query.order_by(Filing.filing_date.desc())
+        if limit:
+            query = query.limit(limit)
+        filings = query.all()
+
+        totals = {"filings": len(filings), "with_facts": 0, "facts": 0, "revenue": 0, "missing": 0}
+        start = time.perf_counter()
+        for filing in filings:
+            if not filing.company:
+                continue
+            filing_dir = Path(f"data/filings/{filing.company.cik}/{filing.accession_number.replace('-', '')}")
+            if not filing_store.has_filing(filing_dir):
+                totals["missing"] += 1
+                continue
+            try:
+                if dry_run:
+                    fact_set = ixbrl_fact_extractor.extract_from_filing(filing_dir)
+                    summary = summarize_facts(fact_set) if fact_set and fact_set.facts else None
+                else:
+                    summary = ixbrl_fact_extractor.apply_to_filing(db, filing, filing_dir)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error processing {filing.accession_number}: {e}")
+                continue
+            if not summary:
+                continue
+            totals["with_facts"] += 1
+            totals["facts"] += summary["fact_count"]
+            if "revenue" in summary["metrics"]:
+                totals["revenue"] += 1
+            metrics = ", ".join(f"{k}={v['value']:,.2f}" for k, v in summary["metrics"].items()
+                                if k in ("revenue", "net_income", "eps"))
+            print(f"{filing.ticker or filing.company.cik:<8} {filing.filing_type.value:<6} "
+                  f"{filing.accession_number}  {summary['fact_count']:>5} facts  {metrics}")
+
+        elapsed = time.perf_counter() - start
+        print(f"\n{'='*60}")
+        print(f"{'[DRY RUN] ' if dry_run else ''}XBRL backfill summary ({elapsed:.1f}s)")
+        print(f"{'='*60}")
+        print(f"Filings:          {totals['filings']} ({totals['missing']} not downloaded)")
+        print(f"With iXBRL facts: {totals['with_facts']} ({totals['facts']} facts)")
+        print(f"Revenue found:    {totals['revenue']}")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='回填 XBRL 财务事实 (Backfill financial_facts from downloaded iXBRL filings)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.split("示例用法:")[1]
+    )
+    parser.add_argument('--all', action='store_true', help='所有财报类型，包括已有 revenue 的')
+    parser.add_argument('--ticker', type=str, default=None)
+    parser.add_argument('--limit', type=int, default=0, help='最多处理的财报数 (0 = no limit)')
+    parser.add_argument('--dry-run', action='store_true', help='只解析，不写数据库')
+    args = parser.parse_args()
+
+    backfill(args.all, args.ticker, args.limit, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+采集链路吞吐基准 - 对本地回放服务器运行扫描和下载
+EDGARScanner.scan_for_new_filings + FilingDownloader.download_filing against
+scripts/sec_replay_server.py, reporting requests/s, p50/p99 per-request
+latency, status breakdown (200/304/429) and full-sweep / download time.
+
+Runs in a scratch working directory with its own sqlite database, local
+rate limiter, disk ETag store and local filing storage; Celery tasks queued
+by the scanner go to an in-memory broker and are never consumed.
+
+示例用法:
+  python scripts/sec_replay_server.py generate --fixtures data/sec_fixtures --limit 100
+  python scripts/benchmark_ingestion.py --fixtures data/sec_fixtures
+  python scripts/benchmark_ingestion.py --fixtures data/sec_fixtures --rps 50 --server-rate 0 --latency-ms 20
+  python scripts/benchmark_ingestion.py --fixtures data/sec_fixtures --json > baseline.json
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import json
+import logging
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "scripts"))
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class RequestRecorder:
+    """httpx event hooks timing every request made through the pooled client"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.latencies = []
+        self.statuses = Counter()
+        self.started = time.perf_counter()
+
+    async def on_request(self, request):
+        request.extensions["bench_start"] = time.perf_counter()
+
+    async def on_response(self, response):
+        start = response.request.extensions.get("bench_start")
+        if start is not None:
+            self.latencies.append((time.perf_counter() - start) * 1000)
+        self.statuses[response.status_code] += 1
+
+    def summary(self, elapsed: float) -> dict:
+        count = len(self.latencies)
+        return {
+            "requests": count,
+            "elapsed_s": round(elapsed, 3),
+            "requests_per_s": round(count / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(self.latencies, 50), 1),
+            "p99_ms": round(percentile(self.latencies, 99), 1),
+            "status": {str(code): n for code, n in sorted(self.statuses.items())},
+        }
+
+
+async def run(args) -> dict:
+    # App modules read settings at import time
+    from app.core.config import settings
+    from app.models import Base
+    from app.core.database import engine, SessionLocal
+    from app.models.filing import Filing
+    from app.services.sec_http import sec_http_client
+    from app.services.edgar_scanner import edgar_scanner
+    from app.services.filing_downloader import filing_downloader
+    from app.core.celery_app import celery_app
+    from sec_replay_server import ReplayServer
+
+    celery_app.conf.broker_url = "memory://"
+    celery_app.conf.result_backend = "cache+memory://"
+    Base.metadata.create_all(bind=engine)
+
+    # Only poll CIKs the fixtures cover (generate --limit N)
+    fixture_ciks = {
+        path.stem[3:] for path in (args.fixtures / "data.sec.gov" / "submissions").glob("CIK*.json")
+    }
+    edgar_scanner.monitored_ciks &= fixture_ciks
+
+    server = ReplayServer(args.fixtures, latency_ms=args.latency_ms, jitter=args.jitter,
+                          rate=args.server_rate, burst=args.server_burst)
+    runner = await server.start(port=args.port)
+
+    recorder = RequestRecorder()
+    client = sec_http_client.get_client()
+    client.event_hooks["request"].append(recorder.on_request)
+    client.event_hooks["response"].append(recorder.on_response)
+
+    results = {
+        "config": {
+            "ciks": len(edgar_scanner.monitored_ciks),
+            "rps_limit": settings.SEC_REQUESTS_PER_SECOND,
+            "server_rate": args.server_rate,
+            "latency_ms": args.latency_ms,
+        }
+    }
+    try:
+        # Cold sweep: every submissions document is new
+        recorder.reset()
+        start = time.perf_counter()
+        new_filings = await edgar_scanner.scan_for_new_filings(full_sweep=True)
+        results["cold_sweep"] = recorder.summary(time.perf_counter() - start)
+        results["cold_sweep"]["new_filings"] = len(new_filings)
+
+        # Warm sweep: nothing changed, conditional GETs should answer 304
+        recorder.reset()
+        start = time.perf_counter()
+        warm_filings = await edgar_scanner.scan_for_new_filings(full_sweep=True)
+        results["warm_sweep"] = recorder.summary(time.perf_counter() - start)
+        results["warm_sweep"]["new_filings"] = len(warm_filings)
+
+        # Downloads for what the cold sweep inserted
+        db = SessionLocal()
+        try:
+            query = db.query(Filing).order_by(Filing.id)
+            if args.downloads:
+                query = query.limit(args.downloads)
+            filings = query.all()
+            recorder.reset()
+            start = time.perf_counter()
+            succeeded = 0
+            for filing in filings:
+                if await filing_downloader.download_filing(db, filing):
+                    succeeded += 1
+            results["downloads"] = recorder.summary(time.perf_counter() - start)
+            results["downloads"]["filings"] = len(filings)
+            results["downloads"]["succeeded"] = succeeded
+        finally:
+            db.close()
+    finally:
+        await sec_http_client.aclose()
+        await runner.cleanup()
+
+    results["server"] = dict(server.stats)
+    return results
+
+
+def print_report(results: dict):
+    config = results["config"]
+    print(f"\n{'='*60}")
+    print(f"Ingestion benchmark: {config['ciks']} CIKs, client limit {config['rps_limit']} req/s, "
+          f"server limit {config['server_rate'] or 'none'}, median latency {config['latency_ms']}ms")
+    print(f"{'='*60}")
+    for phase in ("cold_sweep", "warm_sweep", "downloads"):
+        stats = results.get(phase)
+        if not stats:
+            continue
+        extra = (f"{stats['succeeded']}/{stats['filings']} filings" if phase == "downloads"
+                 else f"{stats['new_filings']} new filings")
+        status = ", ".join(f"{code}: {n}" for code, n in stats["status"].items())
+        print(f"{phase:<11} {stats['elapsed_s']:>8.2f}s  {stats['requests']:>6} req  "
+              f"{stats['requests_per_s']:>7.2f} req/s  p50 {stats['p50_ms']:>7.1f}ms  "
+              f"p99 {stats['p99_ms']:>7.1f}ms  [{status}]  {extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='采集链路吞吐基准 (Scanner/downloader throughput against the SEC replay server)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.split("示例用法:")[1]
+    )
+    parser.add_argument('--fixtures', type=Path, default=Path('data/sec_fixtures'))
+    parser.add_argument('--port', type=int, default=8899)
+    parser.add_argument('--latency-ms', type=float, default=80.0, help='回放服务器中位延迟 (ms)')
+    parser.add_argument('--jitter', type=float, default=0.5)
+    parser.add_argument('--server-rate', type=float, default=10.0, help='服务器端限流，超出返回 429 (0 = none)')
+    parser.add_argument('--server-burst', type=int, default=10)
+    parser.add_argument('--rps', type=float, default=None, help='覆盖 SEC_REQUESTS_PER_SECOND')
+    parser.add_argument('--downloads', type=int, default=20, help='下载的财报数 (0 = all inserted)')
+    parser.add_argument('--workdir', type=Path, default=None, help='工作目录 (默认临时目录)')
+    parser.add_argument('--json', action='store_true', help='输出 JSON (for comparing runs)')
+    args = parser.parse_args()
+
+    args.fixtures = args.fixtures.resolve()
+    if not args.fixtures.is_dir():
+        parser.error(f"fixtures not found: {args.fixtures} (run sec_replay_server.py generate first)")
+
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="ingestion-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    os.chdir(workdir)
+
+    base = f"http://127.0.0.1:{args.port}"
+    os.environ.update({
+        "SEC_DATA_URL": f"{base}/data.sec.gov",
+        "SEC_BASE_URL": f"{base}/www.sec.gov",
+        "SEC_ARCHIVE_URL": f"{base}/www.sec.gov/Archives/edgar/data",
+        "DATABASE_URL": f"sqlite:///{workdir / 'bench.db'}",
+        "SEC_RATE_LIMIT_BACKEND": "local",
+        "SEC_ETAG_STORE_BACKEND": "disk",
+        "STORAGE_BACKEND": "local",
+        "STORAGE_LOCAL_ROOT": str(workdir / "data"),
+    })
+    if args.rps is not None:
+        os.environ["SEC_REQUESTS_PER_SECOND"] = str(args.rps)
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    results = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+        print(f"Workdir: {workdir}")
+
+
+if __name__ == "__main__":
+    main()
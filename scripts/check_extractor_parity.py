@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+文本提取一致性检查与基准 - html.parser vs lxml
+Runs TextExtractor.extract_from_html over a corpus with the reference
+backend (html.parser) and a candidate backend (auto / lxml), checks that
+full_text / enhanced_text / primary_content / filing_type and every
+extracted section are identical, and times parsing and full extraction.
+
+The built-in corpus is synthetic (no network): an iXBRL 10-K, an XHTML
+EX-99.1 press release, a legacy-HTML 8-K with implied end tags and a
+legacy S-1 with <FONT SIZE> headers. Add real documents with --corpus
+(directories of .htm files, e.g. data/filings/{cik}/{acc}).
+
+示例用法:
+  python scripts/check_extractor_parity.py                          # auto vs html.parser
+  python scripts/check_extractor_parity.py --parser lxml            # 强制 lxml (legacy HTML 预期有差异)
+  python scripts/check_extractor_parity.py --corpus data/filings/320193 --repeat 3
+"""
+
+import sys
+import argparse
+import logging
+import random
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.text_extractor import TextExtractor, LXML_AVAILABLE
+from app.services.filing_store import filing_store
+
+
+# ==================== Synthetic corpus ====================
+
+def ixbrl_10k(sections: int = 150, tables: int = 50, seed: int = 1) -> str:
+    """Workiva-style iXBRL: one flat run of <div>s, facts wrapped in ix: tags"""
+    rng = random.Random(seed)
+    parts = [
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<html xmlns="http://www.w3.org/1999/xhtml" xmlns:ix="http://www.xbrl.org/2013/inlineXBRL" '
+        'xmlns:xbrli="http://www.xbrl.org/2003/instance" xmlns:us-gaap="http://fasb.org/us-gaap/2024">'
+        '<head><title>corp-20250531</title><meta http-equiv="Content-Type" content="text/html"/>'
+        '<style type="text/css">.s{font-weight:700}</style></head><body>',
+        '<div style="display:none"><ix:header><ix:hidden>'
+        '<ix:nonNumeric name="dei:DocumentType" contextRef="c-1">10-K</ix:nonNumeric></ix:hidden>'
+        '<ix:resources><xbrli:context id="c-1"><xbrli:entity>0000000001</xbrli:entity></xbrli:context>'
+        '</ix:resources></ix:header></div>',
+        '<div><span class="s">UNITED STATES SECURITIES AND EXCHANGE COMMISSION</span></div>'
+        '<div><span class="s">FORM 10-K</span></div><div><span>ANNUAL REPORT PURSUANT TO SECTION 13</span></div>',
+    ]
+    for s in range(sections):
+        parts.append(f'<div style="margin-top:12pt"><span style="font-weight:700">Item {s % 15 + 1}. '
+                     f'Management&#8217;s Discussion and Analysis, part {s}</span></div>')
+        for _ in range(3):
+            parts.append(
+                '<div style="text-align:justify"><span>Total revenues were $<ix:nonFraction '
+                'name="us-gaap:Revenues" contextRef="c-1" unitRef="usd" decimals="-6" scale="6">'
+                f'{rng.randint(100, 99999):,}</ix:nonFraction> million for fiscal year 2025, an increase of '
+                f'{rng.randint(1, 40)}.{rng.randint(0, 9)}% compared to fiscal year 2024&#160;primarily due to '
+                'growth in cloud services and license support revenues. </span><span>Operating income '
+                'increased &amp; margins expanded as the quarter ended May 31, 2025 showed strength across '
+                'all regions.</span></div>'
+            )
+        if s < tables:
+            rows = "".join(
+                f'<tr><td><span>Line item {i} revenue</span></td><td><span>$</span></td>'
+                f'<td style="text-align:right"><span><ix:nonFraction name="us-gaap:X{i}" contextRef="c-1" '
+                f'unitRef="usd" decimals="-6" scale="6">{rng.randint(100, 99999):,}</ix:nonFraction></span></td>'
+                f'<td><span>&#160;</span></td><td><span>{rng.randint(100, 99999):,}</span></td></tr>'
+                for i in range(12)
+            )
+            parts.append('<div><table style="border-collapse:collapse"><tr><td/><td colspan="2">'
+                         '<span>Fiscal 2025</span></td><td/><td><span>Fiscal 2024</span></td></tr>'
+                         f'{rows}<tr><td>Total</td><td>$</td><td>1,234 million</td></tr></table></div>')
+        parts.append('<div><br/></div><hr style="page-break-after:always"/>')
+    parts.append('</body></html>')
+    return "".join(parts)
+
+
+def xhtml_press_release(paragraphs: int = 60, seed: int = 2) -> str:
+    rng = random.Random(seed)
+    parts = ['<?xml version="1.0" encoding="utf-8"?>\n<html xmlns="http://www.w3.org/1999/xhtml"><head>'
+             '<title>EX-99.1</title></head><body><h2>Exhibit 99.1</h2><h1>Corp Reports Second Quarter Results</h1>']
+    for i in range(paragraphs):
+        parts.append(f'<p>Revenue for the quarter ended June 30, 2025 was ${rng.randint(1, 90)}.{rng.randint(0, 9)} '
+                     f'billion, up {rng.randint(1, 30)}% year over year. Diluted earnings per share were '
+                     f'${rng.randint(1, 9)}.{rng.randint(10, 99)}. The company raised its fiscal year 2025 '
+                     'outlook and returned capital to shareholders through dividends and repurchases, '
+                     f'paragraph {i}.</p>')
+        if i % 10 == 0:
+            parts.append('<table><tr><th>Metric</th><th>Q2 2025</th><th>Q2 2024</th></tr>'
+                         '<tr><td>Net sales</td><td>$12,345 million</td><td>$11,000 million</td></tr>'
+                         '<tr><td>Operating income</td><td>$2,100</td><td>$1,900</td></tr></table>')
+    parts.append('</body></html>')
+    return "".join(parts)
+
+
+def legacy_8k(items: int = 30, seed: int = 3) -> str:
+    """Old-style HTML: upper-case tags, unclosed <P>/<TD>/<TR>"""
+    rng = random.Random(seed)
+    parts = ['<HTML><HEAD><TITLE>8-K</TITLE></HEAD><BODY><P ALIGN=center><B>UNITED STATES<BR>SECURITIES AND '
+             'EXCHANGE COMMISSION</B><P ALIGN=center><FONT SIZE=4><B>FORM 8-K</B></FONT>']
+    for i in range(items):
+        parts.append(f'<P><B>Item 2.0{i % 3 + 1} RESULTS OF OPERATIONS AND FINANCIAL CONDITION</B><P>On July '
+                     f'{i % 28 + 1}, 2025, the Company issued a press release announcing revenue of '
+                     f'$1,{rng.randint(100, 999)} million, up {rng.randint(1, 30)}% &amp; net income of '
+                     f'${rng.randint(10, 500)} million for the quarter ended June 30, 2025, together with '
+                     'guidance for fiscal year 2026 that investors should read carefully.')
+        parts.append('<TABLE><TR><TD>Revenue<TD>$1,200<TD>$1,100<TR><TD>Net income<TD>$200 million<TD>$150'
+                     '<TR><TD>Total assets<TD>5,000<TD>4,800</TABLE>')
+    parts.append('</BODY></HTML>')
+    return "".join(parts)
+
+
+def legacy_s1(seed: int = 4) -> str:
+    rng = random.Random(seed)
+    parts = ['<html><body><p><font size="5"><b>FORM S-1 REGISTRATION STATEMENT</b></font></p>']
+    for header in ("PROSPECTUS SUMMARY", "RISK FACTORS", "USE OF PROCEEDS", "CAPITALIZATION", "DILUTION",
+                   "MANAGEMENT'S DISCUSSION AND ANALYSIS", "BUSINESS", "UNDERWRITING"):
+        parts.append(f'<p style="font-weight:bold"><b>{header}</b></p>')
+        for i in range(8):
+            parts.append(f'<p>We expect net proceeds of approximately ${rng.randint(50, 900)} million from this '
+                         f'offering. Our revenue grew {rng.randint(10, 200)}% in fiscal year 2024 and we incurred '
+                         f'a net loss of ${rng.randint(1, 90)} million. This is paragraph {i} of {header.lower()}, '
+                         'which describes our business, the offering and the risks of investing.</p>')
+    parts.append('</body></html>')
+    return "".join(parts)
+
+
+SYNTHETIC_CORPUS = {
+    "ixbrl-10k.htm": ixbrl_10k,
+    "xhtml-ex99.htm": xhtml_press_release,
+    "legacy-8k.htm": legacy_8k,
+    "legacy-s1.htm": legacy_s1,
+}
+
+
+# ==================== Checks ====================
+
+def best_time(func, repeat: int):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def first_difference(a: str, b: str) -> str:
+    for i, (x, y) in enumerate(zip(a, b)):
+        if x != y:
+            return f"at char {i}: {a[max(0, i - 30):i + 30]!r} vs {b[max(0, i - 30):i + 30]!r}"
+    return f"length {len(a)} vs {len(b)}"
+
+
+def compare(reference: dict, candidate: dict) -> list:
+    """Differences in any returned key (full_text, enhanced_text, primary_content, sections...)"""
+    if candidate.get("error") and not reference.get("error"):
+        return [f"candidate failed: {candidate['error']}"]
+    problems = []
+    for key in sorted(set(reference) | set(candidate)):
+        a, b = reference.get(key), candidate.get(key)
+        if key == "error" or a == b:
+            continue
+        detail = first_difference(a, b) if isinstance(a, str) and isinstance(b, str) else f"{a!r} vs {b!r}"
+        problems.append(f"{key}: {detail}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='文本提取一致性检查与基准 (TextExtractor parser backend parity + benchmark)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.split("示例用法:")[1]
+    )
+    parser.add_argument('--parser', choices=['auto', 'lxml'], default='auto', help='候选 backend (vs html.parser)')
+    parser.add_argument('--corpus', type=Path, nargs='*', default=[], help='额外的 .htm 文件或目录')
+    parser.add_argument('--repeat', type=int, default=1, help='每个文档计时次数 (best of N)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    if not LXML_AVAILABLE:
+        print("lxml is not installed - nothing to compare")
+        return 1
+
+    reference = TextExtractor()
+    reference.parser_backend = "html.parser"
+    candidate = TextExtractor()
+    candidate.parser_backend = args.parser
+
+    workdir = Path(tempfile.mkdtemp(prefix="extractor-parity-"))
+    documents = []
+    for name, generate in SYNTHETIC_CORPUS.items():
+        path = workdir / name
+        path.write_text(generate())
+        documents.append(path)
+    for entry in args.corpus:
+        documents.extend(sorted(filing_store.glob(entry, "*.htm")) if entry.is_dir() else [entry])
+
+    print(f"{'document':<40} {'size':>8} {'parser':>11} {'parse ref/new':>17} {'extract ref/new':>19} {'speedup':>8}  parity")
+    mismatches = 0
+    totals = [0.0, 0.0]
+    for path in documents:
+        html = filing_store.read_text(path)
+        backend = candidate._parser_for(html)
+
+        ref_parse, _ = best_time(lambda: reference._make_soup(html), args.repeat)
+        new_parse, _ = best_time(lambda: candidate._make_soup(html), args.repeat)
+        ref_time, ref_result = best_time(lambda: reference.extract_from_html(path), args.repeat)
+        new_time, new_result = best_time(lambda: candidate.extract_from_html(path), args.repeat)
+        totals[0] += ref_time
+        totals[1] += new_time
+
+        problems = compare(ref_result, new_result)
+        mismatches += bool(problems)
+        print(f"{path.name[:40]:<40} {len(html) // 1024:>6}KB {backend:>11} "
+              f"{ref_parse:>7.3f}s/{new_parse:>7.3f}s {ref_time:>8.3f}s/{new_time:>8.3f}s "
+              f"{ref_time / new_time if new_time else 0:>7.1f}x  {'OK' if not problems else 'DIFF'}")
+        for problem in problems[:5]:
+            print(f"    {problem}")
+
+    print(f"\nTotal extraction: html.parser {totals[0]:.2f}s, {args.parser} {totals[1]:.2f}s "
+          f"({totals[0] / totals[1] if totals[1] else 0:.2f}x)")
+    print(f"Parity: {len(documents) - mismatches}/{len(documents)} documents identical")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+检查财报文档存储后端 (STORAGE_BACKEND=local / s3)
+写入、流式读取、列举、删除一个测试对象，确认所有 worker 共用的存储可用
+
+本地 S3 替身 (MinIO):
+  docker run -p 9000:9000 minio/minio server /data
+  STORAGE_BACKEND=s3 S3_ENDPOINT_URL=http://localhost:9000 S3_BUCKET=filings \\
+  S3_ACCESS_KEY_ID=minioadmin S3_SECRET_ACCESS_KEY=minioadmin python scripts/check_storage_backend.py
+"""
+
+import sys
+import os
+import tempfile
+import uuid
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.storage import storage
+
+
+def main():
+    key = f"healthcheck/{uuid.uuid4().hex}.bin"
+    payload = os.urandom(3 * 1024 * 1024)
+
+    print(f"Backend: {storage.name}")
+
+    # 流式上传
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        f.write(payload)
+        src = Path(f.name)
+    storage.put_file(key, src, move=True)
+    print(f"✅ put_file {key} ({len(payload)} bytes)")
+
+    assert storage.exists(key), "object missing after put"
+    assert storage.size(key) == len(payload), "size mismatch"
+
+    # 流式读取
+    received = bytearray()
+    with storage.open_read(key) as body:
+        while True:
+            chunk = body.read(256 * 1024)
+            if not chunk:
+                break
+            received.extend(chunk)
+    assert bytes(received) == payload, "content mismatch"
+    print("✅ open_read streamed back identical content")
+
+    listed = [info.key for info in storage.list("healthcheck/")]
+    assert key in listed, "object not listed"
+    print(f"✅ list found {len(listed)} object(s) under healthcheck/")
+
+    storage.delete(key)
+    assert not storage.exists(key), "object still present after delete"
+    print("✅ delete")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+财报文档存储迁移与维护
+- migrate: 把旧的原始文件目录 (data/filings/{cik}/{acc}/) 迁移到内容寻址的压缩 blob 存储
+- retention: 旧财报高压缩率归档、过期财报删除、清理无引用 blob、清理过期的文本提取缓存
+- gc: 只清理无引用 blob
+- stats: 显示存储占用和压缩率
+"""
+
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.filing_store import filing_store
+from app.services.extraction_cache import extraction_cache
+import logging
+import argparse
+
+# 设置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def format_bytes(num: int) -> str:
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if abs(num) < 1024:
+            return f"{num:.1f}{unit}"
+        num /= 1024
+    return f"{num:.1f}TB"
+
+
+def migrate(dry_run: bool, limit: int = 0):
+    """迁移所有原始文件目录"""
+    if filing_store.mode != "blob" and not dry_run:
+        logger.error("FILING_STORE_MODE is not 'blob' - refusing to migrate")
+        return
+
+    totals = {"dirs": 0, "files": 0, "raw_bytes": 0, "stored_bytes": 0, "dedup_hits": 0}
+    for filing_dir in filing_store.iter_filing_dirs():
+        if limit and totals["dirs"] >= limit:
+            break
+        try:
+            stats = filing_store.migrate_directory(filing_dir, dry_run=dry_run)
+        except Exception as e:
+            logger.error(f"Error migrating {filing_dir}: {e}")
+            continue
+        if not stats["files"]:
+            continue
+        totals["dirs"] += 1
+        for key in ("files", "raw_bytes", "stored_bytes", "dedup_hits"):
+            totals[key] += stats[key]
+
+    print(f"\n{'='*60}")
+    print(f"{'[DRY RUN] ' if dry_run else ''}Migration summary ({filing_store.codec})")
+    print(f"{'='*60}")
+    print(f"Filing directories: {totals['dirs']}")
+    print(f"Files:              {totals['files']} ({totals['dedup_hits']} already in blob store)")
+    print(f"Bytes before:       {format_bytes(totals['raw_bytes'])}")
+    if not dry_run:
+        print(f"Bytes after:        {format_bytes(totals['stored_bytes'])}")
+        if totals['stored_bytes']:
+            print(f"Ratio:              {totals['raw_bytes'] / totals['stored_bytes']:.1f}x")
+
+
+def print_stats():
+    stats = filing_store.get_stats()
+    print(f"\n{'='*60}")
+    print("Filing store")
+    print(f"{'='*60}")
+    print(f"Mode / codec:       {stats['mode']} / {stats['codec']} ({stats['backend']} storage)")
+    print(f"Raw files:          {format_bytes(stats['raw_bytes'])}")
+    print(f"Blobs on disk:      {format_bytes(stats['blob_bytes'])}")
+    print(f"Blob content:       {format_bytes(stats['logical_blob_bytes'])}")
+    if stats['compression_ratio']:
+        print(f"Compression ratio:  {stats['compression_ratio']}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='财报文档存储迁移与维护',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例用法:
+  python scripts/migrate_filing_store.py migrate --dry-run   # 预估迁移效果
+  python scripts/migrate_filing_store.py migrate             # 迁移所有原始文件
+  python scripts/migrate_filing_store.py retention           # 归档 + 过期删除 + 清理
+  python scripts/migrate_filing_store.py gc                  # 只清理无引用 blob
+  python scripts/migrate_filing_store.py stats               # 存储统计
+        """
+    )
+    parser.add_argument('command', choices=['migrate', 'retention', 'gc', 'stats'])
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='只统计，不修改任何文件 (Report only, change nothing)'
+    )
+    parser.add_argument(
+        '--limit',
+        type=int,
+        default=0,
+        help='最多迁移的财报目录数 (Max filing directories to migrate, 0 = all)'
+    )
+    args = parser.parse_args()
+
+    if args.command == 'migrate':
+        migrate(args.dry_run, args.limit)
+    elif args.command == 'retention':
+        stats = filing_store.apply_retention(dry_run=args.dry_run)
+        print(f"{'[DRY RUN] ' if args.dry_run else ''}Archived blobs: {stats['archived']}, "
+              f"deleted filings: {stats['deleted']}, removed blobs: {stats['blobs_removed']} "
+              f"({format_bytes(stats['bytes_freed'])} freed)")
+        cache_stats = extraction_cache.purge(dry_run=args.dry_run)
+        print(f"{'[DRY RUN] ' if args.dry_run else ''}Removed extraction cache entries: {cache_stats['removed']} "
+              f"({format_bytes(cache_stats['bytes_freed'])} freed)")
+    elif args.command == 'gc':
+        stats = filing_store.gc(dry_run=args.dry_run)
+        print(f"{'[DRY RUN] ' if args.dry_run else ''}Removed blobs: {stats['removed']} "
+              f"({format_bytes(stats['bytes_freed'])} freed)")
+    else:
+        print_stats()
+
+
+if __name__ == "__main__":
+    main()
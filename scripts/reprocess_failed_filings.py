@@ -4,6 +4,7 @@
 包括：FAILED, PENDING, PARSING, DOWNLOADING 状态的财报
 FIXED: 处理ticker为None的情况
 NEW: 添加按日期重新处理所有财报的功能（选项6和命令行参数）
+NEW: 已下载并校验过的文件（manifest.json）默认复用，--refetch 强制重新下载
 """
 
 import asyncio
@@ -15,6 +16,8 @@ from sqlalchemy.orm import Session
 from app.core.database import SessionLocal
 from app.models.filing import Filing, ProcessingStatus
 from app.tasks.filing_tasks import process_filing_task
+from app.services.filing_downloader import filing_downloader
+from app.services.filing_store import filing_store
 from datetime import datetime, timedelta
 import logging
 import argparse
@@ -123,6 +126,13 @@ def get_filings_by_date(db: Session, target_date: datetime):
     return filings
 
 
+def clear_download_manifest(filing):
+    """清除下载清单，强制重新下载所有文件"""
+    filing_dir = filing_downloader._get_filing_directory(filing)
+    if filing_store.has_filing(filing_dir):
+        filing_store.delete_manifest(filing_dir)
+
+
 async def reprocess_filing(filing_id: int):
     """重新处理单个财报"""
     try:
@@ -225,6 +235,9 @@ async def main():
   
   # 按日期重新处理，只处理已完成的财报
   python scripts/reprocess_failed_filings.py --date 2025-10-27 --completed-only
+  
+  # 忽略已下载的文件，全部重新下载
+  python scripts/reprocess_failed_filings.py --refetch
         """
     )
     parser.add_argument(
@@ -237,6 +250,11 @@ async def main():
         action='store_true',
         help='只重新处理已完成状态的财报（配合 --date 使用）'
     )
+    parser.add_argument(
+        '--refetch',
+        action='store_true',
+        help='忽略下载清单，重新下载所有文件（默认复用已校验的文件）'
+    )
     
     args = parser.parse_args()
     
@@ -297,6 +315,9 @@ async def main():
                     
                     db.commit()
                     
+                    if args.refetch:
+                        clear_download_manifest(filing)
+                    
                     # 加入处理队列
                     await reprocess_filing(filing.id)
                     
@@ -489,6 +510,9 @@ async def main():
                 
                 db.commit()
                 
+                if args.refetch:
+                    clear_download_manifest(filing)
+                
                 # 加入处理队列
                 await reprocess_filing(filing.id)
                 
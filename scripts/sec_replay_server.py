@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+SEC EDGAR 回放服务器 - 本地替身 (data.sec.gov + www.sec.gov)
+用录制或生成的数据回放 submissions JSON、atom feed 和 Archives 页面，
+不访问真实 EDGAR 就能测量扫描吞吐和检测延迟
+
+Fixtures mirror EDGAR's URL paths under one directory:
+  {fixtures}/data.sec.gov/submissions/CIK0000320193.json
+  {fixtures}/www.sec.gov/cgi-bin/browse-edgar/S-1_0.atom     (type=S-1&start=0, "all" = no type)
+  {fixtures}/www.sec.gov/Archives/edgar/data/320193/0000320193-25-000001/-index.htm
+  {fixtures}/www.sec.gov/Archives/edgar/data/320193/000032019325000001/aapl-8k.htm
+
+Point the app at it:
+  SEC_DATA_URL=http://127.0.0.1:8899/data.sec.gov
+  SEC_BASE_URL=http://127.0.0.1:8899/www.sec.gov
+  SEC_ARCHIVE_URL=http://127.0.0.1:8899/www.sec.gov/Archives/edgar/data
+
+Behaviour:
+  - every response is delayed by a lognormal latency (--latency-ms median, --jitter sigma)
+  - ETag / If-None-Match and Last-Modified / If-Modified-Since answer 304
+  - requests above --rate per second (token bucket, --burst) get 429 + Retry-After
+  - serve --record: misses are fetched from live EDGAR once and saved as fixtures
+  - GET /_stats returns request counts by status (?reset=1 clears them)
+
+示例用法:
+  python scripts/sec_replay_server.py generate --fixtures data/sec_fixtures
+  python scripts/sec_replay_server.py serve --fixtures data/sec_fixtures --port 8899
+  python scripts/sec_replay_server.py serve --fixtures data/sec_fixtures --record   # 录制缺失的页面
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+# 设置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+APP_DATA_DIR = Path(__file__).parent.parent / "app" / "data"
+
+CONTENT_TYPES = {
+    ".json": "application/json",
+    ".atom": "application/atom+xml",
+    ".htm": "text/html",
+    ".html": "text/html",
+    ".txt": "text/plain",
+    ".xml": "application/xml",
+}
+
+
+# ==================== Server ====================
+
+class TokenBucket:
+    """Server-side rate limit, like EDGAR's 10 requests/second per client"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        if self.rate <= 0:
+            return True
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class ReplayServer:
+    """Serves fixtures with EDGAR-like latency, conditional GETs and throttling"""
+
+    def __init__(self, fixtures: Path, latency_ms: float = 80.0, jitter: float = 0.5,
+                 rate: float = 10.0, burst: int = 10, bandwidth_mbps: float = 0.0,
+                 record: bool = False, user_agent: Optional[str] = None):
+        self.fixtures = fixtures.resolve()
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.bucket = TokenBucket(rate, burst)
+        self.bandwidth_bytes = bandwidth_mbps * 1024 * 1024 / 8
+        self.record = record
+        self.user_agent = user_agent or os.getenv("SEC_USER_AGENT", "")
+        self.stats: Counter = Counter()
+        self._upstream = None
+        self._record_lock = asyncio.Lock()
+
+    def fixture_path(self, request: web.Request) -> Optional[Path]:
+        relative = request.path.lstrip("/")
+        if relative.endswith("cgi-bin/browse-edgar"):
+            form_type = request.query.get("type") or "all"
+            relative = f"{relative}/{form_type}_{request.query.get('start', '0')}.atom"
+        path = (self.fixtures / relative).resolve()
+        if self.fixtures not in path.parents:
+            return None
+        return path
+
+    def _delay(self, size: int) -> float:
+        delay = self.latency_ms / 1000 * math.exp(random.gauss(0, self.jitter))
+        if self.bandwidth_bytes:
+            delay += size / self.bandwidth_bytes
+        return delay
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.stats["requests"] += 1
+        if not self.bucket.take():
+            self.stats["429"] += 1
+            return web.Response(status=429, headers={"Retry-After": "1"}, text="Request Rate Threshold Exceeded")
+
+        path = self.fixture_path(request)
+        if path is None:
+            self.stats["400"] += 1
+            return web.Response(status=400)
+        if not path.is_file() and self.record:
+            await self._record(request, path)
+        if not path.is_file():
+            await asyncio.sleep(self._delay(0))
+            self.stats["404"] += 1
+            return web.Response(status=404)
+
+        stat = path.stat()
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        last_modified = datetime.fromtimestamp(int(stat.st_mtime), tz=timezone.utc)
+        headers = {"ETag": etag, "Last-Modified": format_datetime(last_modified, usegmt=True)}
+
+        if self._not_modified(request, etag, last_modified):
+            await asyncio.sleep(self._delay(0))
+            self.stats["304"] += 1
+            return web.Response(status=304, headers=headers)
+
+        body = path.read_bytes()
+        await asyncio.sleep(self._delay(len(body)))
+        self.stats["200"] += 1
+        self.stats["bytes"] += len(body)
+        content_type = CONTENT_TYPES.get(path.suffix, "application/octet-stream")
+        return web.Response(body=body, headers=headers, content_type=content_type)
+
+    @staticmethod
+    def _not_modified(request: web.Request, etag: str, last_modified: datetime) -> bool:
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match:
+            return etag in [tag.strip() for tag in if_none_match.split(",")]
+        if_modified_since = request.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                return last_modified <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    async def _record(self, request: web.Request, path: Path):
+        """Fetch a missing fixture from live EDGAR (serialized, well under 10 req/s)"""
+        import httpx
+
+        host, _, rest = request.path.lstrip("/").partition("/")
+        if host not in ("data.sec.gov", "www.sec.gov"):
+            return
+        url = f"https://{host}/{rest}"
+        async with self._record_lock:
+            if self._upstream is None:
+                self._upstream = httpx.AsyncClient(headers={"User-Agent": self.user_agent},
+                                                   follow_redirects=True, timeout=30.0)
+            response = await self._upstream.get(url, params=dict(request.query))
+            await asyncio.sleep(0.15)
+        if response.status_code == 200:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(response.content)
+            self.stats["recorded"] += 1
+            logger.info(f"Recorded {url} ({len(response.content)} bytes)")
+        else:
+            logger.warning(f"Upstream {url}: HTTP {response.status_code}")
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        stats = dict(self.stats)
+        if request.query.get("reset"):
+            self.stats.clear()
+        return web.json_response(stats)
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/_stats", self.handle_stats)
+        app.router.add_get("/{tail:.*}", self.handle)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8899) -> web.AppRunner:
+        """Start in the running event loop (used by scripts/benchmark_ingestion.py)"""
+        runner = web.AppRunner(self.make_app(), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        logger.info(f"SEC replay server on http://{host}:{port} (fixtures: {self.fixtures})")
+        return runner
+
+
+# ==================== Fixture generator ====================
+
+HISTORY_FORMS = ["4", "4", "4", "8-K", "10-Q", "SC 13G/A", "424B2", "FWP", "S-8", "DEF 14A"]
+
+
+def load_monitored_companies() -> List[Dict]:
+    """Same universe as EDGARScanner (S&P 500 + NASDAQ 100)"""
+    companies = {}
+    for filename in ("sp500_companies.json", "nasdaq100_companies.json"):
+        path = APP_DATA_DIR / filename
+        if path.exists():
+            for company in json.loads(path.read_text()).get("companies", []):
+                companies[company["cik"]] = company
+    return list(companies.values())
+
+
+def _document_html(form: str, name: str, size_kb: int) -> str:
+    paragraph = (f"<p>{name} - FORM {form}. UNITED STATES SECURITIES AND EXCHANGE COMMISSION. "
+                 "Results of operations and financial condition, revenue, operating income and "
+                 "guidance for the coming quarter.</p>\n")
+    repeat = max(1, size_kb * 1024 // len(paragraph))
+    return f"<html><head><title>{form}</title></head><body>\n" + paragraph * repeat + "</body></html>\n"
+
+
+def _index_html(cik: str, accession: str, documents: List[Dict]) -> str:
+    acc_no_dash = accession.replace("-", "")
+    rows = "\n".join(
+        f'<tr><td>{seq}</td><td>{doc["type"]}</td>'
+        f'<td><a href="/Archives/edgar/data/{int(cik)}/{acc_no_dash}/{doc["filename"]}">{doc["filename"]}</a></td>'
+        f'<td>{doc["type"]}</td><td>{doc["size"]}</td></tr>'
+        for seq, doc in enumerate(documents, start=1)
+    )
+    return (
+        f"<html><body><div id=\"secNum\">SEC Accession No. {accession}</div>\n"
+        '<table class="tableFile" summary="Document Format Files">\n'
+        "<tr><th>Seq</th><th>Description</th><th>Document</th><th>Type</th><th>Size</th></tr>\n"
+        f"{rows}\n</table></body></html>\n"
+    )
+
+
+def _write(path: Path, content: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+def _atom_feed(entries: List[str]) -> str:
+    return (
+        '<?xml version="1.0" encoding="ISO-8859-1" ?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom">\n<title>Latest Filings</title>\n'
+        + "\n".join(entries) + "\n</feed>\n"
+    )
+
+
+def _atom_entry(form: str, name: str, cik: str, accession: str, updated: datetime) -> str:
+    acc_no_dash = accession.replace("-", "")
+    return (
+        f"<entry><title>{form} - {name} ({cik}) (Filer)</title>"
+        f'<link rel="alternate" type="text/html" href="https://www.sec.gov/Archives/edgar/data/'
+        f'{int(cik)}/{acc_no_dash}/{accession}-index.htm"/>'
+        f'<summary type="html"> &lt;b&gt;Filed:&lt;/b&gt; {updated:%Y-%m-%d} &lt;b&gt;AccNo:&lt;/b&gt; {accession}</summary>'
+        f"<updated>{updated.isoformat(timespec='seconds')}</updated>"
+        f'<category scheme="https://www.sec.gov/" label="form type" term="{form}"/>'
+        f"<id>urn:tag:sec.gov,2008:accession-number={accession}</id></entry>"
+    )
+
+
+def _write_filing(archives: Path, cik: str, accession: str, form: str, name: str,
+                  doc_kb: int, exhibits: int) -> str:
+    """Index page + main document (+ 8-K exhibits) for one filing; returns the primary document name"""
+    acc_no_dash = accession.replace("-", "")
+    filing_dir = archives / str(int(cik)) / acc_no_dash
+    slug = form.lower().replace("-", "")
+    primary = "forms-1.htm" if form == "S-1" else f"{slug}-{accession[-6:]}.htm"
+    documents = [{"filename": primary, "type": form, "size": doc_kb * 1024}]
+    _write(filing_dir / primary, _document_html(form, name, doc_kb))
+    if form == "8-K":
+        for i in range(1, exhibits + 1):
+            filename = f"ex99-{i}.htm"
+            documents.append({"filename": filename, "type": f"EX-99.{i}", "size": doc_kb * 256})
+            _write(filing_dir / filename, _document_html(f"EX-99.{i}", name, max(1, doc_kb // 4)))
+    _write(archives / str(int(cik)) / accession / "-index.htm", _index_html(cik, accession, documents))
+    return primary
+
+
+def generate_fixtures(fixtures: Path, limit: int = 0, history: int = 1000, new_per_cik: int = 2,
+                      s1_filers: int = 10, doc_kb: int = 120, exhibits: int = 2, seed: int = 7) -> Dict:
+    """
+    Synthesize fixtures for the monitored universe (no network)
+
+    Every monitored CIK gets a submissions document with `history` older
+    entries and `new_per_cik` fresh 8-K/10-Q/10-K filings on top, each with
+    its index page and documents. `s1_filers` unknown CIKs get an S-1 in
+    the S-1 atom feed. The all-forms feed lists every fresh filing.
+    """
+    rng = random.Random(seed)
+    data_dir = fixtures / "data.sec.gov" / "submissions"
+    archives = fixtures / "www.sec.gov" / "Archives" / "edgar" / "data"
+    feeds = fixtures / "www.sec.gov" / "cgi-bin" / "browse-edgar"
+    now = datetime.now(timezone.utc)
+    today = now.strftime("%Y-%m-%d")
+
+    companies = load_monitored_companies()
+    if limit:
+        companies = companies[:limit]
+
+    feed_entries = []
+    stats = Counter()
+    for company in companies:
+        cik = company["cik"].zfill(10)
+        recent = {key: [] for key in (
+            "accessionNumber", "filingDate", "reportDate", "acceptanceDateTime", "act", "form",
+            "fileNumber", "filmNumber", "items", "size", "isXBRL", "isInlineXBRL",
+            "primaryDocument", "primaryDocDescription")}
+
+        entries = []
+        for seq in range(new_per_cik):
+            form = rng.choice(["8-K", "8-K", "10-Q", "10-K"])
+            accession = f"{cik}-{now:%y}-{900000 + seq:06d}"
+            primary = _write_filing(archives, cik, accession, form, company["name"], doc_kb, exhibits)
+            entries.append((accession, today, form, primary))
+            feed_entries.append(_atom_entry(form, company["name"], cik, accession, now - timedelta(seconds=len(feed_entries))))
+            stats["filings"] += 1
+        for seq in range(history):
+            filed = now - timedelta(days=1 + seq // 3)
+            entries.append((f"{cik}-{filed:%y}-{seq:06d}", filed.strftime("%Y-%m-%d"),
+                            rng.choice(HISTORY_FORMS), f"doc{seq}.htm"))
+
+        for accession, filed, form, primary in entries:
+            recent["accessionNumber"].append(accession)
+            recent["filingDate"].append(filed)
+            recent["reportDate"].append(filed)
+            recent["acceptanceDateTime"].append(f"{filed}T16:30:00.000Z")
+            recent["act"].append("34")
+            recent["form"].append(form)
+            recent["fileNumber"].append("001-00000")
+            recent["filmNumber"].append("25000000")
+            recent["items"].append("2.02,9.01" if form == "8-K" else "")
+            recent["size"].append(doc_kb * 1024)
+            recent["isXBRL"].append(1)
+            recent["isInlineXBRL"].append(1)
+            recent["primaryDocument"].append(primary)
+            recent["primaryDocDescription"].append(form)
+
+        submissions = {
+            "cik": str(int(cik)), "entityType": "operating", "sic": "0000", "sicDescription": "",
+            "name": company["name"], "tickers": [company.get("ticker")], "exchanges": ["Nasdaq"],
+            "formerNames": [], "filings": {"recent": recent, "files": []},
+        }
+        _write(data_dir / f"CIK{cik}.json", json.dumps(submissions, separators=(",", ":")))
+        stats["ciks"] += 1
+
+    s1_entries = []
+    for i in range(s1_filers):
+        cik = f"{1990000 + i:010d}"
+        name = f"Replay IPO Corp {i}"
+        accession = f"{cik}-{now:%y}-{i:06d}"
+        primary = _write_filing(archives, cik, accession, "S-1", name, doc_kb, 0)
+        updated = now - timedelta(minutes=i)
+        s1_entries.append(_atom_entry("S-1", name, cik, accession, updated))
+        feed_entries.append(_atom_entry("S-1", name, cik, accession, updated))
+        submissions = {"cik": str(int(cik)), "name": name, "tickers": [],
+                       "filings": {"recent": {"accessionNumber": [accession], "filingDate": [today],
+                                              "form": ["S-1"], "primaryDocument": [primary]}, "files": []}}
+        _write(data_dir / f"CIK{cik}.json", json.dumps(submissions, separators=(",", ":")))
+        stats["s1"] += 1
+
+    _write(feeds / "S-1_0.atom", _atom_feed(s1_entries))
+    for page in range(0, max(1, math.ceil(len(feed_entries) / 100))):
+        _write(feeds / f"all_{page * 100}.atom", _atom_feed(feed_entries[page * 100:(page + 1) * 100]))
+
+    return dict(stats)
+
+
+# ==================== CLI ====================
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='SEC EDGAR 回放服务器',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.split("示例用法:")[1]
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    gen = subparsers.add_parser('generate', help='生成合成数据 (Synthesize fixtures, no network)')
+    gen.add_argument('--fixtures', type=Path, default=Path('data/sec_fixtures'))
+    gen.add_argument('--limit', type=int, default=0, help='只生成前 N 个监控 CIK (0 = all)')
+    gen.add_argument('--history', type=int, default=1000, help='每个 CIK 的历史 filing 数')
+    gen.add_argument('--new-per-cik', type=int, default=2, help='每个 CIK 的新 filing 数')
+    gen.add_argument('--s1-filers', type=int, default=10)
+    gen.add_argument('--doc-kb', type=int, default=120, help='主文档大小 (KB)')
+
+    serve = subparsers.add_parser('serve', help='回放 (Replay fixtures)')
+    serve.add_argument('--fixtures', type=Path, default=Path('data/sec_fixtures'))
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8899)
+    serve.add_argument('--latency-ms', type=float, default=80.0, help='中位延迟 (ms)')
+    serve.add_argument('--jitter', type=float, default=0.5, help='对数正态分布 sigma')
+    serve.add_argument('--rate', type=float, default=10.0, help='每秒请求上限，超出返回 429 (0 = unlimited)')
+    serve.add_argument('--burst', type=int, default=10)
+    serve.add_argument('--bandwidth-mbps', type=float, default=0.0, help='模拟带宽 (0 = unlimited)')
+    serve.add_argument('--record', action='store_true', help='缺失页面从真实 EDGAR 录制')
+
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        stats = generate_fixtures(args.fixtures, limit=args.limit, history=args.history,
+                                  new_per_cik=args.new_per_cik, s1_filers=args.s1_filers, doc_kb=args.doc_kb)
+        print(f"Generated fixtures in {args.fixtures}: {stats}")
+        return
+
+    server = ReplayServer(args.fixtures, latency_ms=args.latency_ms, jitter=args.jitter, rate=args.rate,
+                          burst=args.burst, bandwidth_mbps=args.bandwidth_mbps, record=args.record)
+    web.run_app(server.make_app(), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Unit tests for app/services/ixbrl_facts.py (number parsing and headline picks)
+
+Run: python -m pytest tests/test_ixbrl_facts.py
+"""
+import io
+from decimal import Decimal
+
+from app.services.ixbrl_facts import parse_ixbrl, parse_number, summarize_facts
+
+
+CONTEXTS = """
+<xbrli:context id="Q3"><xbrli:entity><xbrli:identifier scheme="http://www.sec.gov/CIK">1</xbrli:identifier></xbrli:entity>
+  <xbrli:period><xbrli:startDate>2025-07-01</xbrli:startDate><xbrli:endDate>2025-09-30</xbrli:endDate></xbrli:period></xbrli:context>
+<xbrli:context id="YTD"><xbrli:entity><xbrli:identifier scheme="http://www.sec.gov/CIK">1</xbrli:identifier></xbrli:entity>
+  <xbrli:period><xbrli:startDate>2025-01-01</xbrli:startDate><xbrli:endDate>2025-09-30</xbrli:endDate></xbrli:period></xbrli:context>
+<xbrli:context id="PQ3"><xbrli:entity><xbrli:identifier scheme="http://www.sec.gov/CIK">1</xbrli:identifier></xbrli:entity>
+  <xbrli:period><xbrli:startDate>2024-07-01</xbrli:startDate><xbrli:endDate>2024-09-30</xbrli:endDate></xbrli:period></xbrli:context>
+<xbrli:context id="Q3_SEG"><xbrli:entity><xbrli:identifier scheme="http://www.sec.gov/CIK">1</xbrli:identifier>
+  <xbrli:segment><xbrldi:explicitMember dimension="us-gaap:StatementBusinessSegmentsAxis">x:CloudMember</xbrldi:explicitMember></xbrli:segment></xbrli:entity>
+  <xbrli:period><xbrli:startDate>2025-07-01</xbrli:startDate><xbrli:endDate>2025-09-30</xbrli:endDate></xbrli:period></xbrli:context>
+<xbrli:context id="END"><xbrli:entity><xbrli:identifier scheme="http://www.sec.gov/CIK">1</xbrli:identifier></xbrli:entity>
+  <xbrli:period><xbrli:instant>2025-09-30</xbrli:instant></xbrli:period></xbrli:context>
+<xbrli:unit id="usd"><xbrli:measure>iso4217:USD</xbrli:measure></xbrli:unit>
+<xbrli:unit id="eur"><xbrli:measure>iso4217:EUR</xbrli:measure></xbrli:unit>
+<xbrli:unit id="usdPerShare"><xbrli:divide>
+  <xbrli:unitNumerator><xbrli:measure>iso4217:USD</xbrli:measure></xbrli:unitNumerator>
+  <xbrli:unitDenominator><xbrli:measure>xbrli:shares</xbrli:measure></xbrli:unitDenominator></xbrli:divide></xbrli:unit>
+"""
+
+
+def _document(facts: str, focus: str = "Q3") -> io.BytesIO:
+    html = f"""<html xmlns="http://www.w3.org/1999/xhtml" xmlns:ix="http://www.xbrl.org/2013/inlineXBRL"
+  xmlns:xbrli="http://www.xbrl.org/2003/instance" xmlns:xbrldi="http://xbrl.org/2006/xbrldi"
+  xmlns:ixt="http://www.xbrl.org/inlineXBRL/transformation/2020-02-12">
+<body>
+<div style="display:none"><ix:header><ix:resources>{CONTEXTS}</ix:resources></ix:header></div>
+<ix:nonNumeric name="dei:DocumentPeriodEndDate" contextRef="Q3">September 30, 2025</ix:nonNumeric>
+<ix:nonNumeric name="dei:DocumentFiscalPeriodFocus" contextRef="Q3">{focus}</ix:nonNumeric>
+{facts}
+</body></html>"""
+    return io.BytesIO(html.encode())
+
+
+def _summary(facts: str, **kwargs) -> dict:
+    return summarize_facts(parse_ixbrl(_document(facts)), **kwargs)
+
+
+# ==================== parse_number ====================
+
+def test_parse_number_dot_decimal():
+    assert parse_number("1,234.56", "ixt:num-dot-decimal") == Decimal("1234.56")
+    assert parse_number(" 1,234 ") == Decimal("1234")
+
+
+def test_parse_number_comma_decimal():
+    assert parse_number("1.234,56", "ixt:num-comma-decimal") == Decimal("1234.56")
+    assert parse_number("1 234,5", "ixt-sec:numspacecomma") == Decimal("1234.5")
+
+
+def test_parse_number_zero_dash_formats():
+    assert parse_number("—", "ixt:fixed-zero") == Decimal(0)
+    assert parse_number("-", "ixt:zerodash") == Decimal(0)
+    assert parse_number("", "ixt-sec:nocontent") == Decimal(0)
+    assert parse_number("–") == Decimal(0)
+
+
+def test_parse_number_words_and_garbage():
+    assert parse_number("three", "ixt-sec:numwordsen") == Decimal(3)
+    assert parse_number("None", "ixt-sec:numwordsen") == Decimal(0)
+    assert parse_number("n/a") is None
+
+
+# ==================== Scale and sign ====================
+
+def test_scale_and_sign_applied():
+    fact_set = parse_ixbrl(_document(
+        '<ix:nonFraction name="us-gaap:NetIncomeLoss" contextRef="Q3" unitRef="usd" '
+        'decimals="-6" scale="6" sign="-" format="ixt:num-dot-decimal">1,234</ix:nonFraction>'
+        '<ix:nonFraction name="us-gaap:EarningsPerShareDiluted" contextRef="Q3" unitRef="usdPerShare" '
+        'decimals="2" format="ixt:num-dot-decimal">0.87</ix:nonFraction>'
+    ))
+    facts = {fact.concept: fact for fact in fact_set.facts}
+    assert facts["us-gaap:NetIncomeLoss"].value == -1_234_000_000
+    assert facts["us-gaap:NetIncomeLoss"].unit == "USD"
+    assert facts["us-gaap:EarningsPerShareDiluted"].value == 0.87
+    assert facts["us-gaap:EarningsPerShareDiluted"].unit == "USD/shares"
+
+
+# ==================== summarize_facts ====================
+
+REVENUE_FACTS = (
+    '<ix:nonFraction name="us-gaap:Revenues" contextRef="YTD" unitRef="usd" scale="6" decimals="-6">9,000</ix:nonFraction>'
+    '<ix:nonFraction name="us-gaap:Revenues" contextRef="PQ3" unitRef="usd" scale="6" decimals="-6">2,500</ix:nonFraction>'
+    '<ix:nonFraction name="us-gaap:Revenues" contextRef="Q3_SEG" unitRef="usd" scale="6" decimals="-6">1,000</ix:nonFraction>'
+    '<ix:nonFraction name="us-gaap:Revenues" contextRef="Q3" unitRef="usd" scale="6" decimals="-6">3,100</ix:nonFraction>'
+)
+
+
+def test_quarterly_report_picks_quarter_not_ytd():
+    summary = _summary(REVENUE_FACTS)
+    assert summary["period_end"] == "2025-09-30"
+    revenue = summary["metrics"]["revenue"]
+    assert revenue["value"] == 3_100_000_000
+    assert revenue["period_start"] == "2025-07-01"
+
+
+def test_annual_report_picks_longest_duration():
+    summary = _summary(REVENUE_FACTS, annual=True)
+    assert summary["metrics"]["revenue"]["value"] == 9_000_000_000
+    assert summary["metrics"]["revenue"]["period_start"] == "2025-01-01"
+
+
+def test_instant_metrics_use_period_end():
+    summary = _summary('<ix:nonFraction name="us-gaap:Assets" contextRef="END" unitRef="usd" '
+                       'scale="3" decimals="-3">52,000</ix:nonFraction>')
+    assert summary["metrics"]["total_assets"]["value"] == 52_000_000
+    assert summary["metrics"]["total_assets"]["period_start"] is None
+
+
+def test_non_usd_revenue_and_eps_not_picked():
+    summary = _summary(
+        '<ix:nonFraction name="ifrs-full:Revenue" contextRef="Q3" unitRef="eur" scale="6">4,000</ix:nonFraction>'
+        '<ix:nonFraction name="ifrs-full:ProfitLoss" contextRef="Q3" unitRef="eur" scale="6">400</ix:nonFraction>'
+        '<ix:nonFraction name="us-gaap:GrossProfit" contextRef="Q3" unitRef="eur" scale="6">1,500</ix:nonFraction>'
+    )
+    assert "revenue" not in summary["metrics"]
+    assert "net_income" not in summary["metrics"]
+    # Metrics that never reach the Filing columns keep their reported unit
+    assert summary["metrics"]["gross_profit"]["unit"] == "EUR"
+
+
+def test_eps_falls_back_to_basic_and_records_concept():
+    summary = _summary('<ix:nonFraction name="us-gaap:EarningsPerShareBasic" contextRef="Q3" '
+                       'unitRef="usdPerShare" decimals="2">1.05</ix:nonFraction>')
+    assert summary["metrics"]["eps"]["value"] == 1.05
+    assert summary["metrics"]["eps"]["concept"] == "us-gaap:EarningsPerShareBasic"
+
+
+def test_fiscal_period_focus_selects_annual():
+    fact_set = parse_ixbrl(_document(REVENUE_FACTS, focus="FY"))
+    assert summarize_facts(fact_set)["metrics"]["revenue"]["value"] == 9_000_000_000